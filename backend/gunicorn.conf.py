@@ -0,0 +1,67 @@
+"""Gunicorn configuration for serving the API in production.
+
+Run from the backend directory with:
+
+    gunicorn --config gunicorn.conf.py asgi:app
+
+Workers run the ASGI app (see create_asgi_app), which serves GraphQL and the
+generation event streams itself and every other route through the Flask
+app. The plain WSGI app has no event streams; serve it with threaded
+workers instead:
+
+    GUNICORN_WORKER_CLASS=gthread gunicorn --config gunicorn.conf.py wsgi:app
+
+Every setting can be overridden through the environment variables below.
+Send SIGHUP to the master for a graceful reload: new workers are started
+before the old ones finish their in-flight requests. Because the app is
+preloaded, a HUP reuses the code loaded in the master; deploy new code by
+restarting the container (or with the USR2/WINCH/QUIT binary upgrade).
+"""
+
+import multiprocessing
+import os
+
+pythonpath = "src"
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+
+# Requests mostly wait on Postgres and Redis, so each process serves several
+# of them concurrently: on its event loop, which also holds the long-lived
+# event streams, or on threads with gthread; processes scale with the cores
+# available.
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "uvicorn_worker.UvicornWorker")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+
+# Import the app once in the master so workers share its memory copy-on-write
+preload_app = True
+
+# Article generation runs in the generation worker, not in requests, but
+# GraphQL queries over large pages may still take a while. Async workers
+# only use it as a heartbeat, so event streams may outlast it.
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 60))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+# Idle keep-alive connections; keep above the idle timeout of any load
+# balancer that connects directly
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+# Recycle workers periodically to bound memory growth; jitter avoids
+# restarting them all at once
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 5000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 500))
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def post_fork(server, worker):
+    """Drop database connections inherited from the preloaded master."""
+    from extensions import db
+
+    app = worker.app.wsgi()
+    # asgi:app wraps the Flask app (see FlaskAppContextMiddleware)
+    flask_app = getattr(app, "flask_app", app)
+    with flask_app.app_context():
+        # The primary and every read replica bind (SQLALCHEMY_BINDS)
+        for engine in db.engines.values():
+            engine.dispose(close=False)
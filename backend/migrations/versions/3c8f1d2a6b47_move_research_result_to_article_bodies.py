@@ -0,0 +1,46 @@
+"""move research_result to article_bodies
+
+Revision ID: 3c8f1d2a6b47
+Revises: e1a7c4b92d56
+Create Date: 2024-12-09 10:14:52.306218
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "3c8f1d2a6b47"
+down_revision = "e1a7c4b92d56"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "article_bodies",
+        sa.Column("article_id", sa.Integer(), nullable=False),
+        sa.Column("research_result", sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(["article_id"], ["articles.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("article_id"),
+    )
+    op.execute("""
+        INSERT INTO article_bodies (article_id, research_result)
+        SELECT id, research_result
+        FROM articles
+        WHERE research_result IS NOT NULL
+        """)
+    # Dropping the column leaves its TOAST data behind until the table is
+    # rewritten; run VACUUM FULL articles (or pg_repack) to reclaim the space
+    op.drop_column("articles", "research_result")
+
+
+def downgrade():
+    op.add_column("articles", sa.Column("research_result", sa.Text(), nullable=True))
+    op.execute("""
+        UPDATE articles
+        SET research_result = article_bodies.research_result
+        FROM article_bodies
+        WHERE article_bodies.article_id = articles.id
+        """)
+    op.drop_table("article_bodies")
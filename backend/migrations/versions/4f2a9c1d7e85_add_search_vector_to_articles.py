@@ -0,0 +1,78 @@
+"""add search_vector to articles
+
+Revision ID: 4f2a9c1d7e85
+Revises: cd9b9b6cd84b
+Create Date: 2024-12-02 09:14:37.518204
+
+Maintenance-window migration: adding a STORED generated column rewrites
+articles under an ACCESS EXCLUSIVE lock, which blocks reads and writes of
+the table until every row has been rewritten. Run it while the API and the
+generation worker are stopped (or serving from the static export).
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "4f2a9c1d7e85"
+down_revision = "cd9b9b6cd84b"
+branch_labels = None
+depends_on = None
+
+SEARCH_VECTOR_EXPRESSION = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', tags_to_text(tags)), 'B') || "
+    "setweight(to_tsvector('english', coalesce(excerpt, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(content, '')), 'C')"
+)
+
+
+def upgrade():
+    # array_to_string is only STABLE, which generated columns reject
+    op.execute("""
+        CREATE OR REPLACE FUNCTION tags_to_text(tags varchar[]) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE
+        AS $$ SELECT coalesce(array_to_string(tags, ' '), '') $$
+        """)
+
+    # Fail instead of queueing every other query behind the rewrite while it
+    # waits for transactions still using articles
+    op.execute("SET LOCAL lock_timeout = '5s'")
+    with op.batch_alter_table("articles", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "search_vector",
+                postgresql.TSVECTOR(),
+                sa.Computed(SEARCH_VECTOR_EXPRESSION, persisted=True),
+                nullable=True,
+            )
+        )
+
+    # Build the GIN index without blocking writes to articles
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_articles_search_vector",
+            "articles",
+            ["search_vector"],
+            unique=False,
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_articles_search_vector",
+            table_name="articles",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+    with op.batch_alter_table("articles", schema=None) as batch_op:
+        batch_op.drop_column("search_vector")
+
+    op.execute("DROP FUNCTION IF EXISTS tags_to_text(varchar[])")
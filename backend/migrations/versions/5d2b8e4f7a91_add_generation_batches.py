@@ -0,0 +1,37 @@
+"""add generation_batches
+
+Revision ID: 5d2b8e4f7a91
+Revises: 9a4e2f7c1b83
+Create Date: 2024-12-12 11:27:05.814362
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "5d2b8e4f7a91"
+down_revision = "9a4e2f7c1b83"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Provider batch jobs of `flask populate-db --batch`, kept to resume runs
+    op.create_table(
+        "generation_batches",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("stage", sa.String(length=20), nullable=False),
+        sa.Column("provider", sa.String(length=20), nullable=False),
+        sa.Column("batch_id", sa.String(length=255), nullable=False),
+        sa.Column("article_ids", postgresql.ARRAY(sa.Integer()), nullable=False),
+        sa.Column("submitted_at", sa.DateTime(), nullable=False),
+        sa.Column("ingested_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("batch_id"),
+    )
+
+
+def downgrade():
+    op.drop_table("generation_batches")
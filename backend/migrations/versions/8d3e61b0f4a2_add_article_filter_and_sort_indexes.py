@@ -0,0 +1,77 @@
+"""add article filter and sort indexes
+
+Revision ID: 8d3e61b0f4a2
+Revises: 4f2a9c1d7e85
+Create Date: 2024-12-04 16:42:11.093871
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "8d3e61b0f4a2"
+down_revision = "4f2a9c1d7e85"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction, and avoids
+    # locking articles against writes while each index builds
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_articles_relevance_score_id",
+            "articles",
+            [sa.text("relevance_score DESC"), sa.text("id DESC")],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_articles_taxonomy_category",
+            "articles",
+            ["taxonomy", "category"],
+            postgresql_include=["id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_articles_category_taxonomy",
+            "articles",
+            ["category", "taxonomy"],
+            postgresql_include=["level", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_articles_level_relevance_score_id",
+            "articles",
+            ["level", sa.text("relevance_score DESC"), sa.text("id DESC")],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_articles_tags",
+            "articles",
+            ["tags"],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for index_name in (
+            "ix_articles_tags",
+            "ix_articles_level_relevance_score_id",
+            "ix_articles_category_taxonomy",
+            "ix_articles_taxonomy_category",
+            "ix_articles_relevance_score_id",
+        ):
+            op.drop_index(
+                index_name,
+                table_name="articles",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
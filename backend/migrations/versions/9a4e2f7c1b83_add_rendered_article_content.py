@@ -0,0 +1,31 @@
+"""add rendered article content
+
+Revision ID: 9a4e2f7c1b83
+Revises: 3c8f1d2a6b47
+Create Date: 2024-12-10 15:42:18.527904
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "9a4e2f7c1b83"
+down_revision = "3c8f1d2a6b47"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Filled in by the generator and, for existing articles, `flask render-articles`
+    op.add_column("articles", sa.Column("content_html", sa.Text(), nullable=True))
+    op.add_column(
+        "articles",
+        sa.Column("toc", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_column("articles", "toc")
+    op.drop_column("articles", "content_html")
@@ -0,0 +1,38 @@
+"""add related_article_id index to article_relationships
+
+Revision ID: b52f0e7c9a13
+Revises: 8d3e61b0f4a2
+Create Date: 2024-12-04 16:58:40.612257
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b52f0e7c9a13"
+down_revision = "8d3e61b0f4a2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The primary key (article_id, related_article_id) cannot serve lookups
+    # by related_article_id alone, which linkback counts need
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_article_relationships_related_article_id",
+            "article_relationships",
+            ["related_article_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_article_relationships_related_article_id",
+            table_name="article_relationships",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,54 @@
+"""add taxonomy and category stats materialized views
+
+Revision ID: e1a7c4b92d56
+Revises: b52f0e7c9a13
+Create Date: 2024-12-06 11:27:03.845112
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e1a7c4b92d56"
+down_revision = "b52f0e7c9a13"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        CREATE MATERIALIZED VIEW taxonomy_stats AS
+        SELECT
+            taxonomy,
+            count(id) AS total_articles,
+            array_agg(DISTINCT category ORDER BY category) AS categories
+        FROM articles
+        GROUP BY taxonomy
+        """)
+    op.execute("""
+        CREATE MATERIALIZED VIEW category_stats AS
+        SELECT
+            category,
+            taxonomy,
+            count(id) AS total_articles,
+            array_agg(DISTINCT lower(level::text) ORDER BY lower(level::text))
+                AS levels
+        FROM articles
+        GROUP BY category, taxonomy
+        """)
+
+    # REFRESH MATERIALIZED VIEW CONCURRENTLY needs a unique index on each view
+    op.create_index(
+        "ux_taxonomy_stats_taxonomy", "taxonomy_stats", ["taxonomy"], unique=True
+    )
+    op.create_index(
+        "ux_category_stats_category_taxonomy",
+        "category_stats",
+        ["category", "taxonomy"],
+        unique=True,
+    )
+
+
+def downgrade():
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS category_stats")
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS taxonomy_stats")
@@ -0,0 +1,83 @@
+"""Minimal HTTP load generator for comparing serving setups.
+
+Sends the same GraphQL query from a pool of threads for a fixed duration and
+reports throughput and latency percentiles. Uses only the standard library,
+so it runs anywhere the backend does.
+
+    python scripts/load_test.py --url http://localhost:5000/api/graphql \\
+        --concurrency 32 --duration 30 --query '{ allArticles(first: 20) { edges { node { title slug } } } }'
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import List
+
+
+def run_client(
+    url: str, body: bytes, deadline: float, latencies: List[float], errors: List[int]
+) -> None:
+    while time.monotonic() < deadline:
+        request = urllib.request.Request(
+            url, data=body, headers={"Content-Type": "application/json"}
+        )
+        started = time.monotonic()
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+            latencies.append(time.monotonic() - started)
+        except (urllib.error.URLError, OSError):
+            errors.append(1)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:5000/api/graphql")
+    parser.add_argument(
+        "--query", default="{ allTaxonomies { taxonomy totalArticles } }"
+    )
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0)
+    args = parser.parse_args()
+
+    body = json.dumps({"query": args.query}).encode()
+    latencies: List[float] = []
+    errors: List[int] = []
+    deadline = time.monotonic() + args.duration
+    clients = [
+        threading.Thread(
+            target=run_client, args=(args.url, body, deadline, latencies, errors)
+        )
+        for _ in range(args.concurrency)
+    ]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+
+    if not latencies:
+        print(f"No successful requests ({len(errors)} errors)")
+        return
+
+    print(f"requests   {len(latencies)} ok, {len(errors)} errors")
+    print(f"throughput {len(latencies) / args.duration:.1f} req/s")
+    print(
+        "latency    "
+        f"p50 {percentile(latencies, 0.50) * 1000:.1f} ms, "
+        f"p95 {percentile(latencies, 0.95) * 1000:.1f} ms, "
+        f"p99 {percentile(latencies, 0.99) * 1000:.1f} ms, "
+        f"mean {statistics.mean(latencies) * 1000:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, Callable, Optional
+
+from redis import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+
+from services.generation.draft import GenerationDraft
+from services.generation.events import GenerationEventHub
+from .models import Article
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationEventStream:
+    """Server-Sent Events of an article's generation, served by the ASGI app.
+
+    The stream starts with a "snapshot" event of the article's status and
+    draft, taken after subscribing so no later change is missed, followed by
+    the article's GenerationEvents. It ends once the generation is complete
+    or has failed, or after GENERATION_EVENTS_TIMEOUT; EventSource clients
+    reconnect on their own and start from a new snapshot. Comments are sent
+    while idle so proxies keep the connection open.
+    """
+
+    HEARTBEAT = 15
+    RECONNECT_MS = 3000
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        hub: GenerationEventHub,
+        timeout: int,
+    ):
+        self.session_factory = session_factory
+        self.hub = hub
+        self.timeout = timeout
+
+    async def __call__(self, scope, receive, send) -> None:
+        slug = Request(scope, receive).path_params["slug"]
+        try:
+            queue = await self.hub.subscribe(slug)
+        except (RedisError, asyncio.TimeoutError) as e:
+            logger.warning(f"Generation events unavailable: {e}")
+            response = JSONResponse(
+                {"error": "Generation events are unavailable"}, status_code=503
+            )
+            await response(scope, receive, send)
+            return
+
+        # Unsubscribed here, as a stream cancelled before it starts never
+        # reaches the cleanup of its generator
+        try:
+            snapshot = await self.snapshot(slug)
+            if snapshot is None:
+                response = JSONResponse({"error": "Article not found"}, status_code=404)
+            else:
+                response = StreamingResponse(
+                    self.events(queue, snapshot),
+                    media_type="text/event-stream",
+                    # nginx would otherwise buffer the stream
+                    headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+                )
+            await response(scope, receive, send)
+        finally:
+            self.hub.unsubscribe(slug, queue)
+
+    async def snapshot(self, slug: str) -> Optional[dict]:
+        """Return the article's generation status and draft, if it exists."""
+        async with self.session_factory() as session:
+            article = (
+                await session.execute(
+                    select(
+                        Article.is_generated,
+                        Article.generation_started_at,
+                        Article.last_generation_error,
+                    ).where(Article.slug == slug)
+                )
+            ).first()
+        if article is None:
+            return None
+
+        if article.is_generated:
+            return {"status": "complete"}
+        if article.generation_started_at is not None:
+            status = "generating"
+        elif article.last_generation_error is not None:
+            status = "failed"
+        else:
+            status = "queued"
+        draft = await GenerationDraft.get_async(slug) or {}
+        return {
+            "status": status,
+            "error": article.last_generation_error,
+            "excerpt": draft.get("excerpt"),
+            "content": draft.get("content") or "",
+        }
+
+    async def events(self, queue: asyncio.Queue, snapshot: dict) -> AsyncIterator[str]:
+        yield f"retry: {self.RECONNECT_MS}\n"
+        yield self.format("snapshot", snapshot)
+        if snapshot["status"] in ("complete", "failed"):
+            return
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                event = await asyncio.wait_for(
+                    queue.get(), min(self.HEARTBEAT, remaining)
+                )
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if event is None:
+                return
+            # The hub hands the same event to every reader of the slug
+            yield self.format(
+                event["event"],
+                {key: value for key, value in event.items() if key != "event"},
+            )
+            if event.get("status") in ("complete", "failed"):
+                return
+
+    @staticmethod
+    def format(event: str, data: dict) -> str:
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -1,10 +1,31 @@
 import enum
+import logging
 from datetime import datetime, timezone
+from typing import Iterable, List, Optional
 
-from sqlalchemy import func
-from sqlalchemy.dialects.postgresql import ARRAY
+from redis import RedisError
+from sqlalchemy import (
+    Select,
+    case,
+    column,
+    func,
+    select,
+    table,
+    text,
+    union,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, TSVECTOR
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.associationproxy import association_proxy
+from sqlalchemy.orm import deferred
+
+from extensions import db, redis_client
+from services.generation.draft import GenerationDraft
+from services.generation.events import GenerationEvents
 
-from extensions import db
+logger = logging.getLogger(__name__)
 
 
 class ArticleLevel(enum.Enum):
@@ -13,6 +34,26 @@ class ArticleLevel(enum.Enum):
     ADVANCED = "advanced"
 
 
+# Text search configuration shared by the search vector and search queries
+SEARCH_CONFIG = "english"
+
+# Weighted document searched by searchArticles. tags_to_text is an immutable
+# wrapper around array_to_string (created in the search migration), since
+# generated columns only accept immutable expressions.
+SEARCH_VECTOR_EXPRESSION = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', tags_to_text(tags)), 'B') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(excerpt, '')), 'B') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(content, '')), 'C')"
+)
+
+LEVEL_SCORES = {
+    ArticleLevel.BASIC: 0.0,
+    ArticleLevel.INTERMEDIATE: 2.0,
+    ArticleLevel.ADVANCED: 1.0,
+}
+
+
 class Article(db.Model):
     __tablename__ = "articles"
 
@@ -26,14 +67,30 @@ class Article(db.Model):
     category = db.Column(db.String(100), nullable=False)
     tags = db.Column(ARRAY(db.String(50)), nullable=False, default=list)
 
-    # Content
-    content = db.Column(db.Text, nullable=True)
+    # Content. Deferred so listings and relationship loads skip it; it stays
+    # in this table because search_vector is generated from it.
+    content = deferred(db.Column(db.Text, nullable=True), group="content")
+    # Sanitized HTML and table of contents rendered from content on the server
+    content_html = deferred(db.Column(db.Text, nullable=True), group="content")
+    toc = deferred(db.Column(JSONB, nullable=True), group="content")
     excerpt = db.Column(db.Text, nullable=True)
     word_count = db.Column(db.Integer, nullable=False, default=0)
     relevance_score = db.Column(db.Float, nullable=False, default=0.0)
 
-    # AI Generation Fields
-    research_result = db.Column(db.Text, nullable=True)
+    # Search
+    search_vector = deferred(
+        db.Column(TSVECTOR, db.Computed(SEARCH_VECTOR_EXPRESSION, persisted=True))
+    )
+
+    # AI Generation Fields, stored in article_bodies and loaded on access
+    body = db.relationship(
+        "ArticleBody", uselist=False, cascade="all, delete-orphan", lazy="select"
+    )
+    research_result = association_proxy(
+        "body",
+        "research_result",
+        creator=lambda value: ArticleBody(research_result=value),
+    )
 
     # Status tracking
     is_generated = db.Column(db.Boolean, default=False, nullable=False)
@@ -47,7 +104,39 @@ class Article(db.Model):
         db.DateTime,
         nullable=False,
         default=lambda: datetime.now(timezone.utc),
-        onupdate=datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+    __table_args__ = (
+        db.Index("ix_articles_search_vector", "search_vector", postgresql_using="gin"),
+        # allArticles keyset pagination
+        db.Index(
+            "ix_articles_relevance_score_id",
+            relevance_score.desc(),
+            id.desc(),
+        ),
+        # Taxonomy filter and taxonomy stats (index-only)
+        db.Index(
+            "ix_articles_taxonomy_category",
+            taxonomy,
+            category,
+            postgresql_include=["id"],
+        ),
+        # Category filter with optional taxonomy, and category stats (index-only)
+        db.Index(
+            "ix_articles_category_taxonomy",
+            category,
+            taxonomy,
+            postgresql_include=["level", "id"],
+        ),
+        # Level filter
+        db.Index(
+            "ix_articles_level_relevance_score_id",
+            level,
+            relevance_score.desc(),
+            id.desc(),
+        ),
+        db.Index("ix_articles_tags", tags, postgresql_using="gin"),
     )
 
     related_articles = db.relationship(
@@ -68,6 +157,9 @@ class Article(db.Model):
         self.generation_started_at = datetime.now(timezone.utc)
         self.last_generation_error = None
         db.session.commit()
+        # The partial content of a previous attempt is void
+        GenerationDraft(self.slug).clear()
+        GenerationEvents.publish(self.slug, "status", status="generating")
 
     def mark_generation_complete(self) -> None:
         """Mark that content generation is complete."""
@@ -75,6 +167,7 @@ class Article(db.Model):
         self.generation_started_at = None
         self.last_generation_error = None
         db.session.commit()
+        GenerationEvents.publish(self.slug, "status", status="complete")
 
     def mark_generation_failed(self, error: str) -> None:
         """Mark that content generation failed."""
@@ -82,6 +175,7 @@ class Article(db.Model):
         self.generation_started_at = None
         self.last_generation_error = error
         db.session.commit()
+        GenerationEvents.publish(self.slug, "status", status="failed", error=error)
 
     @classmethod
     def create_from_suggestion(cls, data: dict) -> "Article":
@@ -132,12 +226,7 @@ class Article(db.Model):
         score += len(self.tags)
 
         # Level score
-        level_scores = {
-            ArticleLevel.BASIC: 0.0,
-            ArticleLevel.INTERMEDIATE: 2.0,
-            ArticleLevel.ADVANCED: 1.0,
-        }
-        score += level_scores[self.level]
+        score += LEVEL_SCORES[self.level]
 
         return score
 
@@ -146,6 +235,162 @@ class Article(db.Model):
         self.relevance_score = self.calculate_relevance_score()
         db.session.commit()
 
+    # Articles that lost linkbacks since the last relevance run. Incremental
+    # runs find link targets through the current links, which no longer
+    # include removed ones.
+    UNLINKED_KEY = "relevance:unlinked"
+
+    @staticmethod
+    def record_unlinked(article_ids: Iterable[int]) -> None:
+        """Queue articles that lost linkbacks for the next relevance run."""
+        article_ids = list(article_ids)
+        if not article_ids:
+            return
+        try:
+            redis_client.sadd(Article.UNLINKED_KEY, *article_ids)
+        except RedisError as e:
+            logger.warning(f"Could not record unlinked articles {article_ids}: {e}")
+
+    @classmethod
+    def bulk_update_relevance_scores(
+        cls,
+        changed_since: Optional[datetime] = None,
+        unlinked: Iterable[int] = (),
+    ) -> int:
+        """
+        Recompute relevance scores with a single set-based UPDATE.
+
+        Uses the same formula as calculate_relevance_score, computed from
+        grouped taxonomy and linkback counts instead of per-article queries.
+
+        Args:
+            changed_since: If given, only rescore articles affected by changes
+                after this time: changed articles, every article in a taxonomy
+                that gained articles, and the targets of changed articles' links
+            unlinked: With changed_since, also rescore these articles, the
+                former targets of removed links (see record_unlinked)
+
+        Returns:
+            Number of articles whose score changed
+        """
+        articles = cls.__table__
+        taxonomy_counts = select(
+            articles.c.taxonomy, func.count(articles.c.id).label("total")
+        ).group_by(articles.c.taxonomy)
+        linkbacks = select(
+            article_relationships.c.related_article_id.label("article_id"),
+            func.count().label("total"),
+        ).group_by(article_relationships.c.related_article_id)
+
+        affected = None
+        if changed_since is not None:
+            changed = select(articles.c.id).where(articles.c.updated_at > changed_since)
+            grown_taxonomies = select(articles.c.taxonomy).where(
+                articles.c.created_at > changed_since
+            )
+            affected = union(
+                changed,
+                select(articles.c.id).where(articles.c.taxonomy.in_(grown_taxonomies)),
+                select(article_relationships.c.related_article_id).where(
+                    article_relationships.c.article_id.in_(changed)
+                ),
+                select(articles.c.id).where(articles.c.id.in_(list(unlinked))),
+            )
+            linkbacks = linkbacks.where(
+                article_relationships.c.related_article_id.in_(affected)
+            )
+
+        taxonomy_counts = taxonomy_counts.subquery()
+        linkbacks = linkbacks.subquery()
+
+        score = (
+            taxonomy_counts.c.total * case((articles.c.is_generated, 2.0), else_=0.5)
+            + func.coalesce(linkbacks.c.total, 0)
+            + case((articles.c.is_generated, 1.0), else_=0.0)
+            + func.coalesce(func.array_length(articles.c.tags, 1), 0)
+            + case(
+                *[
+                    (articles.c.level == level, level_score)
+                    for level, level_score in LEVEL_SCORES.items()
+                ],
+                else_=0.0,
+            )
+        )
+        scores = (
+            select(articles.c.id, score.label("score"))
+            .join(taxonomy_counts, taxonomy_counts.c.taxonomy == articles.c.taxonomy)
+            .outerjoin(linkbacks, linkbacks.c.article_id == articles.c.id)
+        )
+        if affected is not None:
+            scores = scores.where(articles.c.id.in_(affected))
+        scores = scores.subquery()
+
+        result = db.session.execute(
+            update(articles)
+            .values(
+                relevance_score=scores.c.score,
+                # A score change is not a content change
+                updated_at=articles.c.updated_at,
+            )
+            .where(articles.c.id == scores.c.id)
+            .where(articles.c.relevance_score.is_distinct_from(scores.c.score))
+        )
+        db.session.commit()
+        return result.rowcount
+
+
+class ArticleBody(db.Model):
+    """Large generation-only text of an article, kept out of the articles rows."""
+
+    __tablename__ = "article_bodies"
+
+    article_id = db.Column(
+        db.Integer, db.ForeignKey("articles.id", ondelete="CASCADE"), primary_key=True
+    )
+    research_result = db.Column(db.Text, nullable=True)
+
+
+class GenerationBatch(db.Model):
+    """Provider batch job submitted by `populate-db --batch`.
+
+    Batches are recorded when submitted and marked ingested once their
+    results are saved, so an interrupted run resumes by polling the batches
+    still pending instead of paying for their requests again.
+    """
+
+    __tablename__ = "generation_batches"
+
+    STAGES = ("research", "article")
+
+    id = db.Column(db.Integer, primary_key=True)
+    stage = db.Column(db.String(20), nullable=False)
+    provider = db.Column(db.String(20), nullable=False)
+    batch_id = db.Column(db.String(255), nullable=False, unique=True)
+    article_ids = db.Column(ARRAY(db.Integer), nullable=False)
+    submitted_at = db.Column(
+        db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+    ingested_at = db.Column(db.DateTime, nullable=True)
+
+    @staticmethod
+    def pending(stage: str) -> List["GenerationBatch"]:
+        """Return the batches of stage whose results are not ingested yet."""
+        return (
+            GenerationBatch.query.filter_by(stage=stage, ingested_at=None)
+            .order_by(GenerationBatch.id)
+            .all()
+        )
+
+    @staticmethod
+    def any_pending() -> bool:
+        return db.session.query(
+            GenerationBatch.query.filter_by(ingested_at=None).exists()
+        ).scalar()
+
+    def mark_ingested(self) -> None:
+        self.ingested_at = datetime.now(timezone.utc)
+        db.session.commit()
+
 
 article_relationships = db.Table(
     "article_relationships",
@@ -153,4 +398,126 @@ article_relationships = db.Table(
     db.Column(
         "related_article_id", db.Integer, db.ForeignKey("articles.id"), primary_key=True
     ),
+    # Linkback counts look rows up by target; the primary key leads with article_id
+    db.Index("ix_article_relationships_related_article_id", "related_article_id"),
 )
+
+
+# Materialized views behind the navigation statistics (see the stats migration).
+# They are declared as lightweight tables so create_all and autogenerate skip them.
+taxonomy_stats = table(
+    "taxonomy_stats",
+    column("taxonomy"),
+    column("total_articles"),
+    column("categories"),
+)
+
+category_stats = table(
+    "category_stats",
+    column("category"),
+    column("taxonomy"),
+    column("total_articles"),
+    column("levels"),
+)
+
+
+class ArticleStats:
+    """Taxonomy and category statistics read from materialized views.
+
+    Reads cost the same regardless of corpus size. Inserting articles only
+    marks the views stale (mark_stale); they are refreshed at most every
+    STATS_REFRESH_INTERVAL by the generation worker or `flask refresh-stats
+    --if-stale`, and at the end of populate runs.
+    """
+
+    VIEWS = ("taxonomy_stats", "category_stats")
+    # Set when articles were inserted since the last refresh
+    STALE_KEY = "stats:stale"
+    # Held for min_interval after each refresh_if_stale refresh
+    REFRESHED_KEY = "stats:refreshed"
+
+    @staticmethod
+    def taxonomies_query() -> Select:
+        return select(taxonomy_stats).order_by(taxonomy_stats.c.taxonomy)
+
+    @staticmethod
+    def categories_query() -> Select:
+        return select(category_stats).order_by(
+            category_stats.c.category, category_stats.c.taxonomy
+        )
+
+    @staticmethod
+    def taxonomies() -> List[Row]:
+        return db.session.execute(ArticleStats.taxonomies_query()).all()
+
+    @staticmethod
+    def categories() -> List[Row]:
+        return db.session.execute(ArticleStats.categories_query()).all()
+
+    @staticmethod
+    def refresh(concurrently: bool = True) -> None:
+        """
+        Recompute both views and commit.
+
+        Args:
+            concurrently: Keep the views readable during the refresh; requires
+                the unique indexes created by the migration
+        """
+        # Cleared first: articles inserted during the refresh mark it again
+        try:
+            redis_client.delete(ArticleStats.STALE_KEY)
+        except RedisError as e:
+            logger.warning(f"Could not clear the stale article stats flag: {e}")
+
+        option = " CONCURRENTLY" if concurrently else ""
+        for view in ArticleStats.VIEWS:
+            db.session.execute(text(f"REFRESH MATERIALIZED VIEW{option} {view}"))
+        db.session.commit()
+
+    @staticmethod
+    def mark_stale() -> None:
+        """Flag the views for refresh_if_stale after new articles were committed."""
+        try:
+            redis_client.set(ArticleStats.STALE_KEY, 1)
+        except RedisError as e:
+            logger.warning(f"Could not mark article stats stale, refreshing: {e}")
+            ArticleStats._refresh_logged()
+
+    @staticmethod
+    def refresh_if_stale(min_interval: int = 0) -> bool:
+        """
+        Refresh the views if they were marked stale, logging instead of raising.
+
+        Args:
+            min_interval: Seconds that must pass between two refreshes by this
+                method, across processes; 0 refreshes whenever stale
+
+        Returns:
+            True if the views were refreshed
+        """
+        try:
+            if not redis_client.exists(ArticleStats.STALE_KEY):
+                return False
+            if min_interval and not redis_client.set(
+                ArticleStats.REFRESHED_KEY, 1, nx=True, ex=min_interval
+            ):
+                # Refreshed recently, here or by another process
+                return False
+        except RedisError as e:
+            logger.warning(f"Could not check whether article stats are stale: {e}")
+            return False
+
+        if ArticleStats._refresh_logged():
+            return True
+        ArticleStats.mark_stale()
+        return False
+
+    @staticmethod
+    def _refresh_logged() -> bool:
+        try:
+            ArticleStats.refresh()
+            return True
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.warning(f"Refreshing article stats failed: {e}")
+            return False
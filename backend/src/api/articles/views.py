@@ -1,9 +1,29 @@
-from flask import jsonify
+from flask import current_app, jsonify
 
+from db_routing import pool_stats
+from extensions import db
+from http_cache import conditional, no_store
+from services.cache.article_cache import ArticleCache
 from . import articles_bp
 from .models import Article
 
 
 @articles_bp.route("/", methods=["GET"])
+@conditional("articles")
 def get_articles():
     return jsonify({"status": "success", "message": "Articles endpoint", "data": []})
+
+
+@articles_bp.route("/cache-stats", methods=["GET"])
+@no_store
+def get_cache_stats():
+    return jsonify({"status": "success", "data": ArticleCache().stats()})
+
+
+@articles_bp.route("/db-pool-stats", methods=["GET"])
+@no_store
+def get_db_pool_stats():
+    data = pool_stats(db.engines)
+    # Engines of the async GraphQL app, when running under create_asgi_app
+    data.update(pool_stats(current_app.extensions.get("async_engines", {})))
+    return jsonify({"status": "success", "data": data})
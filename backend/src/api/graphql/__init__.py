@@ -1,12 +1,133 @@
-from flask import Blueprint
+import json
+import logging
+
+from flask import Blueprint, Response, g
+from redis import RedisError
 from strawberry.flask.views import GraphQLView
+from strawberry.http.exceptions import HTTPException
+
+from db_routing import primary, read_replica
+from extensions import db
+from http_cache import CatalogVersion
+from services.cache.article_cache import ArticleCache
 
+from .http_caching import (
+    PERSISTED_QUERY_NOT_FOUND,
+    NotModified,
+    PersistedQueries,
+    PersistedQueryNotFound,
+    ResponseVersion,
+    article_version_query,
+    request_extensions,
+    root_fields,
+)
+from .loaders import RelatedArticlesLoader
 from .schema import schema
 
+logger = logging.getLogger(__name__)
+
 graphql_bp = Blueprint("graphql", __name__)
 
+
+class ArticleGraphQLView(GraphQLView):
+    def dispatch_request(self):
+        # The schema only has read-only Query resolvers
+        with read_replica():
+            try:
+                return super().dispatch_request()
+            except PersistedQueryNotFound:
+                return Response(
+                    json.dumps(PERSISTED_QUERY_NOT_FOUND),
+                    content_type="application/json",
+                )
+            except NotModified as e:
+                return Response(status=304, headers=e.headers)
+
+    def get_context(self, request, response):
+        return {
+            "request": request,
+            "response": response,
+            "related_articles_loader": RelatedArticlesLoader(),
+        }
+
+    def should_render_graphql_ide(self, request):
+        # Persisted query GETs carry a hash instead of a query
+        if "extensions" in request.query_params:
+            return False
+        return super().should_render_graphql_ide(request)
+
+    def parse_http_body(self, request):
+        # Memoized, as execute_operation parses before the base class does
+        if "graphql_request_data" not in g:
+            data = super().parse_http_body(request)
+            body = (
+                self.parse_json(request.body)
+                if "application/json" in (request.content_type or "")
+                else None
+            )
+            try:
+                data.query = PersistedQueries.resolve(
+                    data.query, request_extensions(request.query_params, body)
+                )
+            except ValueError as e:
+                raise HTTPException(400, str(e)) from e
+            g.graphql_request_data = data
+        return g.graphql_request_data
+
+    def execute_operation(self, request, context, root_value):
+        if request.method == "GET":
+            data = self.parse_http_body(self.request_adapter_class(request))
+            self._apply_http_caching(request, context["response"], data)
+        return super().execute_operation(request, context, root_value)
+
+    @staticmethod
+    def _apply_http_caching(request, sub_response, data) -> None:
+        """Answer a current conditional GET with 304, or add validators."""
+        if not data.query:
+            return
+        fields = root_fields(data.query, data.variables, data.operation_name)
+        if not fields:
+            return
+
+        version = ResponseVersion(
+            data.query, data.variables, data.operation_name, fields
+        )
+        if version.slugs:
+            try:
+                cache_versions = ArticleCache().article_versions(version.slugs)
+            except RedisError as e:
+                logger.warning(f"Article cache versions unavailable, not caching: {e}")
+                return
+            # Versions come from the primary, like the cached bodies they describe
+            with primary():
+                for slug, cache_version in zip(version.slugs, cache_versions):
+                    version.add_article(
+                        db.session.execute(article_version_query(slug)).first(),
+                        cache_version,
+                    )
+        if version.needs_catalog:
+            try:
+                version.add_catalog(*CatalogVersion.get())
+            except RedisError as e:
+                logger.warning(f"Catalog version unavailable, not caching: {e}")
+                return
+
+        validator, headers = version.headers()
+        if validator.matches(request.headers):
+            raise NotModified(headers)
+        sub_response.headers.update(headers)
+
+    def create_response(self, response_data, sub_response):
+        if response_data.get("errors"):
+            # Never cache error responses, e.g. a query timing out
+            sub_response.headers.pop("ETag", None)
+            sub_response.headers.pop("Last-Modified", None)
+            sub_response.headers["Cache-Control"] = "no-store"
+        return super().create_response(response_data, sub_response)
+
+
 # Configure the view with GraphiQL enabled
-view = GraphQLView.as_view(
+view = ArticleGraphQLView.as_view(
     "graphql_view",
     schema=schema,
     graphiql=True,
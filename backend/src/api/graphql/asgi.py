@@ -0,0 +1,146 @@
+import logging
+from typing import Callable
+
+from redis import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.responses import JSONResponse, Response
+from strawberry.asgi import GraphQL
+from strawberry.http.exceptions import HTTPException
+
+from http_cache import CatalogVersion
+from services.cache.article_cache import AsyncArticleCache
+from .async_schema import async_schema
+from .http_caching import (
+    PERSISTED_QUERY_NOT_FOUND,
+    NotModified,
+    PersistedQueries,
+    PersistedQueryNotFound,
+    ResponseVersion,
+    article_version_query,
+    request_extensions,
+    root_fields,
+)
+from .loaders import AsyncRelatedArticlesLoader
+
+logger = logging.getLogger(__name__)
+
+
+class ArticleAsyncGraphQL(GraphQL):
+    """ASGI GraphQL endpoint executing AsyncQuery on the async engine."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        primary_session_factory: Callable[[], AsyncSession],
+        **kwargs,
+    ) -> None:
+        super().__init__(async_schema, **kwargs)
+        self.session_factory = session_factory
+        self.primary_session_factory = primary_session_factory
+
+    async def get_context(self, request, response):
+        return {
+            "request": request,
+            "response": response,
+            "session_factory": self.session_factory,
+            # For loads that refill the shared cache (see Query)
+            "primary_session_factory": self.primary_session_factory,
+            "related_articles_loader": AsyncRelatedArticlesLoader(self.session_factory),
+        }
+
+    # Persisted queries and HTTP caching work as in ArticleGraphQLView
+
+    async def run(self, request, **kwargs):
+        try:
+            return await super().run(request, **kwargs)
+        except PersistedQueryNotFound:
+            return JSONResponse(PERSISTED_QUERY_NOT_FOUND)
+        except NotModified as e:
+            return Response(status_code=304, headers=e.headers)
+
+    def should_render_graphql_ide(self, request):
+        if "extensions" in request.query_params:
+            return False
+        return super().should_render_graphql_ide(request)
+
+    async def parse_http_body(self, request):
+        state = request.request.state
+        if not hasattr(state, "graphql_request_data"):
+            data = await super().parse_http_body(request)
+            body = (
+                self.parse_json(await request.get_body())
+                if "application/json" in (request.content_type or "")
+                else None
+            )
+            try:
+                data.query = await PersistedQueries.resolve_async(
+                    data.query, request_extensions(request.query_params, body)
+                )
+            except ValueError as e:
+                raise HTTPException(400, str(e)) from e
+            state.graphql_request_data = data
+        return state.graphql_request_data
+
+    async def execute_operation(self, request, context, root_value):
+        if request.method == "GET":
+            data = await self.parse_http_body(self.request_adapter_class(request))
+            await self._apply_http_caching(request, context["response"], data)
+        return await super().execute_operation(request, context, root_value)
+
+    async def _apply_http_caching(self, request, sub_response, data) -> None:
+        if not data.query:
+            return
+        fields = root_fields(data.query, data.variables, data.operation_name)
+        if not fields:
+            return
+
+        version = ResponseVersion(
+            data.query, data.variables, data.operation_name, fields
+        )
+        if version.slugs:
+            try:
+                cache_versions = await AsyncArticleCache().article_versions(
+                    version.slugs
+                )
+            except RedisError as e:
+                logger.warning(f"Article cache versions unavailable, not caching: {e}")
+                return
+            async with self.primary_session_factory() as session:
+                for slug, cache_version in zip(version.slugs, cache_versions):
+                    result = await session.execute(article_version_query(slug))
+                    version.add_article(result.first(), cache_version)
+        if version.needs_catalog:
+            try:
+                version.add_catalog(*await CatalogVersion.get_async())
+            except RedisError as e:
+                logger.warning(f"Catalog version unavailable, not caching: {e}")
+                return
+
+        validator, headers = version.headers()
+        if validator.matches(request.headers):
+            raise NotModified(headers)
+        sub_response.headers.update(headers)
+
+    def create_response(self, response_data, sub_response):
+        if response_data.get("errors"):
+            for header in ("ETag", "Last-Modified"):
+                if header in sub_response.headers:
+                    del sub_response.headers[header]
+            sub_response.headers["Cache-Control"] = "no-store"
+        return super().create_response(response_data, sub_response)
+
+
+class FlaskAppContextMiddleware:
+    """Run every ASGI request inside the Flask app context.
+
+    Resolvers read settings through current_app; the context variable set
+    here is inherited by every task the request spawns.
+    """
+
+    def __init__(self, app, flask_app):
+        self.app = app
+        self.flask_app = flask_app
+
+    async def __call__(self, scope, receive, send):
+        with self.flask_app.app_context():
+            await self.app(scope, receive, send)
@@ -0,0 +1,187 @@
+import asyncio
+import json
+from typing import List, Optional
+
+import strawberry
+from sqlalchemy import Select
+from strawberry.types import Info
+
+from api.articles.models import ArticleStats
+from services.cache.article_cache import AsyncArticleCache
+from services.generation.job_queue import GenerationQueue
+from .projection import (
+    connection_edge_fields,
+    connection_node_fields,
+    selected_attributes,
+)
+from .queries import (
+    all_articles_query,
+    article_by_slug_query,
+    article_connection_data,
+    articles_by_category_query,
+    articles_by_level_query,
+    articles_by_taxonomy_query,
+    category_stats_data,
+    page_size,
+    search_articles_query,
+    search_connection,
+    taxonomy_stats_data,
+)
+from .types import (
+    ArticleConnection,
+    ArticleSearchConnection,
+    ArticleType,
+    TaxonomyStats,
+    CategoryStats,
+    ArticleLevelEnum,
+)
+
+
+# Exposed under the same type name so both apps serve an identical schema
+@strawberry.type(name="Query")
+class AsyncQuery:
+    """Async counterpart of Query, served by the ASGI app (see create_asgi_app).
+
+    Each resolver runs its statement on its own AsyncSession from
+    info.context["session_factory"], since the executor resolves sibling
+    fields concurrently and a session must not be shared between tasks.
+    Loads that refill the shared cache use primary_session_factory instead.
+    """
+
+    @strawberry.field(description="Get an article by its slug")
+    async def article_by_slug(self, info: Info, slug: str) -> Optional[ArticleType]:
+        async def load():
+            async with info.context["primary_session_factory"]() as session:
+                article = (await session.scalars(article_by_slug_query(slug))).first()
+                return ArticleType.from_orm(article).to_dict() if article else None
+
+        data = await AsyncArticleCache().article(slug, load)
+        article = ArticleType.from_dict(data) if data else None
+
+        if article and not article.is_generated:
+            await asyncio.to_thread(GenerationQueue().enqueue, article.id)
+
+        return article
+
+    @strawberry.field(description="Get all articles, most relevant first")
+    async def all_articles(
+        self, info: Info, first: Optional[int] = None, after: Optional[str] = None
+    ) -> ArticleConnection:
+        first = page_size(first)
+        attributes = connection_node_fields(info)
+
+        async def load():
+            async with info.context["primary_session_factory"]() as session:
+                articles = (
+                    await session.scalars(all_articles_query(first, after, attributes))
+                ).all()
+                return article_connection_data(articles, first, attributes)
+
+        variant = json.dumps([first, after, sorted(attributes)])
+        connection = ArticleConnection.from_dict(
+            await AsyncArticleCache().all_articles(variant, load)
+        )
+        info.context["related_articles_loader"].register(
+            edge.node.id for edge in connection.edges
+        )
+        return connection
+
+    @strawberry.field(
+        description="Full-text search over titles, tags, excerpts and content, "
+        "best matches first"
+    )
+    async def search_articles(
+        self,
+        info: Info,
+        query: str,
+        first: Optional[int] = None,
+        after: Optional[str] = None,
+        taxonomy: Optional[str] = None,
+        category: Optional[str] = None,
+        level: Optional[ArticleLevelEnum] = None,
+    ) -> ArticleSearchConnection:
+        first = page_size(first)
+        attributes = connection_node_fields(info)
+        statement = search_articles_query(
+            query,
+            first,
+            after,
+            taxonomy,
+            category,
+            level,
+            attributes,
+            with_snippets="snippet" in connection_edge_fields(info),
+        )
+        async with info.context["session_factory"]() as session:
+            rows = (await session.execute(statement)).all()
+
+        connection = search_connection(rows, first, attributes)
+        info.context["related_articles_loader"].register(
+            edge.node.id for edge in connection.edges
+        )
+        return connection
+
+    @strawberry.field(description="Get articles by taxonomy")
+    async def articles_by_taxonomy(
+        self, info: Info, taxonomy: str
+    ) -> List[ArticleType]:
+        return await AsyncQuery._articles(
+            info, articles_by_taxonomy_query(taxonomy, selected_attributes(info))
+        )
+
+    @strawberry.field(description="Get articles by category and optional taxonomy")
+    async def articles_by_category(
+        self, info: Info, category: str, taxonomy: Optional[str] = None
+    ) -> List[ArticleType]:
+        return await AsyncQuery._articles(
+            info,
+            articles_by_category_query(category, taxonomy, selected_attributes(info)),
+        )
+
+    @strawberry.field(description="Get articles by difficulty level")
+    async def articles_by_level(
+        self, info: Info, level: ArticleLevelEnum
+    ) -> List[ArticleType]:
+        return await AsyncQuery._articles(
+            info, articles_by_level_query(level, selected_attributes(info))
+        )
+
+    @strawberry.field(description="Get statistics about all taxonomies")
+    async def all_taxonomies(self, info: Info) -> List[TaxonomyStats]:
+        async def load():
+            async with info.context["primary_session_factory"]() as session:
+                result = await session.execute(ArticleStats.taxonomies_query())
+                return taxonomy_stats_data(result.all())
+
+        return [
+            TaxonomyStats(**data) for data in await AsyncArticleCache().taxonomies(load)
+        ]
+
+    @strawberry.field(description="Get statistics about all categories")
+    async def all_categories(self, info: Info) -> List[CategoryStats]:
+        async def load():
+            async with info.context["primary_session_factory"]() as session:
+                result = await session.execute(ArticleStats.categories_query())
+                return category_stats_data(result.all())
+
+        return [
+            CategoryStats(**data) for data in await AsyncArticleCache().categories(load)
+        ]
+
+    @staticmethod
+    async def _articles(info: Info, statement: Select) -> List[ArticleType]:
+        """Load a list of articles and let the related articles loader batch over it."""
+        async with info.context["session_factory"]() as session:
+            articles = (await session.scalars(statement)).all()
+
+        attributes = selected_attributes(info)
+        result = [
+            ArticleType.from_projection(article, attributes) for article in articles
+        ]
+        info.context["related_articles_loader"].register(
+            article.id for article in result
+        )
+        return result
+
+
+async_schema = strawberry.Schema(query=AsyncQuery)
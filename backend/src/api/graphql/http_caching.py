@@ -0,0 +1,257 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import current_app
+from graphql import GraphQLError, OperationType, parse
+from graphql.language import FieldNode, OperationDefinitionNode, VariableNode
+from graphql.utilities import value_from_ast_untyped
+from sqlalchemy import Select, func, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import aliased
+
+from api.articles.models import Article, article_relationships
+from extensions import async_redis_client, redis_client
+from http_cache import CachePolicy, Validator
+
+# Response Apollo's persisted query link expects for an unknown hash; the
+# client then retries with the full query, which registers it
+PERSISTED_QUERY_NOT_FOUND = {
+    "errors": [
+        {
+            "message": "PersistedQueryNotFound",
+            "extensions": {"code": "PERSISTED_QUERY_NOT_FOUND"},
+        }
+    ]
+}
+
+
+class PersistedQueryNotFound(Exception):
+    pass
+
+
+class NotModified(Exception):
+    """Raised to answer a conditional GET with 304 before executing it."""
+
+    def __init__(self, headers: dict):
+        super().__init__()
+        self.headers = headers
+
+
+class PersistedQueries:
+    """Automatic persisted queries: GraphQL documents stored by SHA-256 hash.
+
+    Clients send only the hash, so queries fit in (cacheable) GET URLs. An
+    unknown hash is answered with PersistedQueryNotFound; the client then
+    sends the query along with its hash once, which registers it.
+    """
+
+    KEY = "graphql:persisted:{hash}"
+
+    @staticmethod
+    def requested_hash(extensions: Optional[dict]) -> Optional[str]:
+        persisted = (extensions or {}).get("persistedQuery")
+        if not isinstance(persisted, dict) or persisted.get("version") != 1:
+            return None
+        return persisted.get("sha256Hash")
+
+    @staticmethod
+    def _validate(query: str, sha256_hash: str) -> None:
+        if len(query) > current_app.config["PERSISTED_QUERY_MAX_LENGTH"]:
+            raise ValueError("Persisted query is too long")
+        if hashlib.sha256(query.encode()).hexdigest() != sha256_hash:
+            raise ValueError("Provided sha256Hash does not match the query")
+
+    @staticmethod
+    def resolve(query: Optional[str], extensions: Optional[dict]) -> Optional[str]:
+        """
+        Return the query of a request, registering or looking up persisted ones.
+
+        Args:
+            query: The query sent with the request, if any
+            extensions: The request's extensions
+
+        Returns:
+            The query to execute
+
+        Raises:
+            PersistedQueryNotFound: Only a hash was sent and it is unknown
+            ValueError: The sent query does not match its hash
+        """
+        sha256_hash = PersistedQueries.requested_hash(extensions)
+        if sha256_hash is None:
+            return query
+
+        key = PersistedQueries.KEY.format(hash=sha256_hash)
+        if query is not None:
+            PersistedQueries._validate(query, sha256_hash)
+            redis_client.set(key, query, ex=current_app.config["PERSISTED_QUERY_TTL"])
+            return query
+
+        query = redis_client.getex(key, ex=current_app.config["PERSISTED_QUERY_TTL"])
+        if query is None:
+            raise PersistedQueryNotFound()
+        return query
+
+    @staticmethod
+    async def resolve_async(
+        query: Optional[str], extensions: Optional[dict]
+    ) -> Optional[str]:
+        sha256_hash = PersistedQueries.requested_hash(extensions)
+        if sha256_hash is None:
+            return query
+
+        key = PersistedQueries.KEY.format(hash=sha256_hash)
+        ttl = current_app.config["PERSISTED_QUERY_TTL"]
+        if query is not None:
+            PersistedQueries._validate(query, sha256_hash)
+            await async_redis_client.set(key, query, ex=ttl)
+            return query
+
+        query = await async_redis_client.getex(key, ex=ttl)
+        if query is None:
+            raise PersistedQueryNotFound()
+        return query
+
+
+def request_extensions(params: Dict[str, Any], body: Optional[Any]) -> Optional[dict]:
+    """Return the extensions of a GET request's params or a JSON request body."""
+    if isinstance(body, dict):
+        return body.get("extensions")
+    extensions = params.get("extensions")
+    if isinstance(extensions, str):
+        try:
+            return json.loads(extensions)
+        except json.JSONDecodeError:
+            return None
+    return extensions
+
+
+def root_fields(
+    query: str, variables: Optional[dict], operation_name: Optional[str]
+) -> Optional[List[Tuple[str, Dict[str, Any]]]]:
+    """
+    Return the (name, arguments) of each root field of a query operation.
+
+    Returns None when the document is invalid, not a single query operation
+    or uses fragments at the root; such requests are not HTTP cached.
+    """
+    try:
+        document = parse(query)
+    except GraphQLError:
+        return None
+
+    operations = [
+        definition
+        for definition in document.definitions
+        if isinstance(definition, OperationDefinitionNode)
+        and (
+            operation_name is None
+            or (definition.name and definition.name.value) == operation_name
+        )
+    ]
+    if len(operations) != 1 or operations[0].operation != OperationType.QUERY:
+        return None
+
+    fields = []
+    for selection in operations[0].selection_set.selections:
+        if not isinstance(selection, FieldNode):
+            return None
+        arguments = {}
+        for argument in selection.arguments:
+            if isinstance(argument.value, VariableNode):
+                value = (variables or {}).get(argument.value.name.value)
+            else:
+                value = value_from_ast_untyped(argument.value)
+            arguments[argument.name.value] = value
+        fields.append((selection.name.value, arguments))
+    return fields
+
+
+def article_version_query(slug: str) -> Select:
+    """
+    Select the version of an article page: the article's updated_at,
+    generation status and word count, and its related articles' latest
+    updated_at, ids and word counts. Word counts are listed separately
+    because their backfill leaves updated_at alone.
+    """
+    related = aliased(Article)
+    return (
+        select(
+            Article.updated_at,
+            Article.is_generated,
+            Article.word_count,
+            func.max(related.updated_at).label("related_updated_at"),
+            func.count(related.id).label("related_count"),
+            func.array_agg(
+                aggregate_order_by(
+                    func.concat(related.id, ":", related.word_count), related.id
+                )
+            ).label("related_word_counts"),
+        )
+        .outerjoin(
+            article_relationships, article_relationships.c.article_id == Article.id
+        )
+        .outerjoin(related, related.id == article_relationships.c.related_article_id)
+        .where(Article.slug == slug)
+        .group_by(Article.id)
+    )
+
+
+class ResponseVersion:
+    """Accumulates what a GraphQL GET response depends on into a Validator.
+
+    Article pages depend on their article_version_query row and on the
+    version of their ArticleCache entry, which is what the body is served
+    from; everything else (listings, search, statistics and unknown slugs,
+    which may be created later) depends on the catalog version.
+    """
+
+    def __init__(
+        self,
+        query: str,
+        variables: Optional[dict],
+        operation_name: Optional[str],
+        fields: List[Tuple[str, Dict[str, Any]]],
+    ):
+        self.fields = fields
+        self.slugs = [
+            args.get("slug") for name, args in fields if name == "articleBySlug"
+        ]
+        self.needs_catalog = len(self.slugs) < len(fields)
+        self.parts: List[Any] = [
+            query,
+            json.dumps(variables, sort_keys=True),
+            operation_name,
+        ]
+        self.modified: List[datetime] = []
+        self.generating = False
+
+    def add_article(self, row: Optional[Any], cache_version: Optional[str]) -> None:
+        if row is None:
+            self.parts.append(None)
+            self.needs_catalog = True
+            return
+        self.parts.extend(row)
+        self.parts.append(cache_version)
+        self.modified.extend(
+            stamp for stamp in (row.updated_at, row.related_updated_at) if stamp
+        )
+        # Generation will change the article soon; have clients revalidate
+        self.generating = self.generating or not row.is_generated
+
+    def add_catalog(self, token: str, modified: datetime) -> None:
+        self.parts.append(token)
+        self.modified.append(modified)
+
+    def headers(self) -> Tuple[Validator, dict]:
+        modified = [
+            stamp if stamp.tzinfo else stamp.replace(tzinfo=timezone.utc)
+            for stamp in self.modified
+        ]
+        validator = Validator.build(self.parts, max(modified, default=None))
+        policy = CachePolicy.for_operations(name for name, _ in self.fields)
+        if self.generating:
+            policy = CachePolicy(max_age=0)
+        return validator, validator.headers(policy)
@@ -0,0 +1,102 @@
+import asyncio
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Sequence, Set
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.articles.models import Article
+from extensions import db
+from .queries import related_articles_query
+
+
+class RelatedArticlesLoader:
+    """Per-request batch loader for the relatedArticles field.
+
+    Articles returned to the client register their ids here. The first time
+    any of them asks for its related articles, the related rows of every
+    registered-but-unloaded article are fetched with a single query, and the
+    ids of those rows are registered in turn. Each level of relatedArticles
+    nesting therefore costs one statement regardless of how many articles or
+    links it contains.
+    """
+
+    def __init__(self):
+        self.pending: Set[int] = set()
+        self.loaded: Dict[int, List[Article]] = {}
+
+    def register(self, article_ids: Iterable[int]) -> None:
+        """Queue article ids whose related articles may be requested."""
+        self.pending.update(
+            article_id for article_id in article_ids if article_id not in self.loaded
+        )
+
+    def load(self, article_id: int, attributes: Set[str]) -> List[Article]:
+        """
+        Return the related articles of article_id, batch loading if needed.
+
+        Args:
+            article_id: ID of the article whose related articles are requested
+            attributes: ArticleType attributes selected on the related articles
+
+        Returns:
+            Related Article rows with at least the selected columns loaded
+        """
+        if article_id not in self.loaded:
+            batch = self._take_batch(article_id)
+            rows = db.session.execute(related_articles_query(batch, attributes)).all()
+            self._store(batch, rows)
+        return self.loaded[article_id]
+
+    def _take_batch(self, article_id: int) -> Set[int]:
+        batch = self.pending | {article_id}
+        self.pending = set()
+        return batch
+
+    def _store(self, article_ids: Set[int], rows: Sequence) -> None:
+        related: Dict[int, List[Article]] = defaultdict(list)
+        for article_id, article in rows:
+            related[article_id].append(article)
+        for article_id in article_ids:
+            self.loaded[article_id] = related[article_id]
+
+        # Queue the next nesting level as a whole, before the executor walks
+        # into the first article's children
+        self.register(article.id for _, article in rows)
+
+
+class AsyncRelatedArticlesLoader(RelatedArticlesLoader):
+    """RelatedArticlesLoader for the async schema.
+
+    The async executor resolves sibling fields concurrently, so articles that
+    ask while a batch containing them is in flight wait for that batch
+    instead of starting their own.
+    """
+
+    def __init__(self, session_factory: Callable[[], AsyncSession]):
+        super().__init__()
+        self.session_factory = session_factory
+        self.in_flight: Dict[int, asyncio.Future] = {}
+
+    async def load(self, article_id: int, attributes: Set[str]) -> List[Article]:
+        if article_id in self.in_flight:
+            await self.in_flight[article_id]
+        elif article_id not in self.loaded:
+            batch = self._take_batch(article_id)
+            future = asyncio.get_running_loop().create_future()
+            self.in_flight.update(dict.fromkeys(batch, future))
+            try:
+                async with self.session_factory() as session:
+                    result = await session.execute(
+                        related_articles_query(batch, attributes)
+                    )
+                    self._store(batch, result.all())
+                future.set_result(None)
+            except Exception as e:
+                future.set_exception(e)
+                # Waiters re-raise it; mark it retrieved for this task
+                future.exception()
+                raise
+            finally:
+                for batch_id in batch:
+                    self.in_flight.pop(batch_id, None)
+        return self.loaded[article_id]
@@ -0,0 +1,159 @@
+import base64
+from typing import Iterable, List, Set, Tuple
+
+from sqlalchemy.orm import load_only
+from strawberry.types import Info
+from strawberry.types.nodes import (
+    FragmentSpread,
+    InlineFragment,
+    SelectedField,
+    convert_selections,
+)
+
+from api.articles.models import Article
+
+# GraphQL field name -> ArticleType attribute
+ARTICLE_FIELDS = {
+    "id": "id",
+    "title": "title",
+    "slug": "slug",
+    "level": "level",
+    "taxonomy": "taxonomy",
+    "category": "category",
+    "tags": "tags",
+    "content": "content",
+    "contentHtml": "content_html",
+    "tableOfContents": "toc",
+    "excerpt": "excerpt",
+    "isGenerated": "is_generated",
+    "wordCount": "word_count",
+    "updatedAt": "updated_at",
+    "relatedArticles": "related_articles",
+}
+
+# Columns every projected query needs for ordering and cursors
+ALWAYS_LOADED = {"id", "relevance_score"}
+
+# Attributes of listing entries and related article cards, as in the
+# GetArticles query
+LISTING_FIELDS = (
+    "id",
+    "title",
+    "slug",
+    "excerpt",
+    "level",
+    "taxonomy",
+    "category",
+    "tags",
+    "word_count",
+    "is_generated",
+)
+
+
+def _collect(selections: Iterable, names: Set[str]) -> None:
+    for selection in selections:
+        if isinstance(selection, SelectedField):
+            names.add(selection.name)
+        elif isinstance(selection, (FragmentSpread, InlineFragment)):
+            _collect(selection.selections, names)
+
+
+def _find(selections: Iterable, name: str) -> List:
+    """Return the sub-selections of every field called name in selections."""
+    found = []
+    for selection in selections:
+        if isinstance(selection, SelectedField):
+            if selection.name == name:
+                found.extend(selection.selections)
+        elif isinstance(selection, (FragmentSpread, InlineFragment)):
+            found.extend(_find(selection.selections, name))
+    return found
+
+
+def _find_key(selections: Iterable, key: str) -> List[SelectedField]:
+    """Return every field whose response key (alias or name) is key."""
+    found = []
+    for selection in selections:
+        if isinstance(selection, SelectedField):
+            if (selection.alias or selection.name) == key:
+                found.append(selection)
+        elif isinstance(selection, (FragmentSpread, InlineFragment)):
+            found.extend(_find_key(selection.selections, key))
+    return found
+
+
+def _attributes(selections: Iterable) -> Set[str]:
+    names: Set[str] = set()
+    _collect(selections, names)
+    return {ARTICLE_FIELDS[name] for name in names if name in ARTICLE_FIELDS}
+
+
+def selected_attributes(info: Info) -> Set[str]:
+    """Return the ArticleType attributes selected on the current field."""
+    return _attributes(info.selected_fields[0].selections)
+
+
+def connection_node_fields(info: Info) -> Set[str]:
+    """
+    Return the ArticleType attributes requested under edges.node.
+
+    Args:
+        info: Resolver info of a field returning an ArticleConnection
+
+    Returns:
+        Attribute names (snake_case) selected on the connection's nodes
+    """
+    return _attributes(
+        _find(_find(info.selected_fields[0].selections, "edges"), "node")
+    )
+
+
+def connection_edge_fields(info: Info) -> Set[str]:
+    """Return the GraphQL field names selected on a connection's edges."""
+    names: Set[str] = set()
+    _collect(_find(info.selected_fields[0].selections, "edges"), names)
+    return names
+
+
+def related_depth(info: Info) -> int:
+    """
+    Count how many relatedArticles fields enclose the current one.
+
+    The response path holds aliases, so the fields along it are looked up in
+    the operation to count them by name.
+    """
+    raw_info = info._raw_info
+    selections = convert_selections(
+        raw_info, raw_info.operation.selection_set.selections
+    )
+    depth = 0
+    for key in info.path.as_list():
+        if isinstance(key, int):
+            # List index
+            continue
+        fields = _find_key(selections, key)
+        if any(field.name == "relatedArticles" for field in fields):
+            depth += 1
+        selections = [selection for field in fields for selection in field.selections]
+    return depth
+
+
+def article_load_options(attributes: Set[str]) -> List:
+    """Build loader options that only fetch the columns backing attributes."""
+    columns = (attributes - {"related_articles"}) | ALWAYS_LOADED
+    return [load_only(*[getattr(Article, column) for column in sorted(columns)])]
+
+
+def encode_cursor(relevance_score: float, article_id: int) -> str:
+    return base64.urlsafe_b64encode(
+        f"{relevance_score!r}:{article_id}".encode()
+    ).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    """Decode a cursor into its (relevance_score, id) sort key."""
+    try:
+        score, article_id = base64.urlsafe_b64decode(cursor.encode()).split(b":")
+        return float(score), int(article_id)
+    except ValueError as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
@@ -0,0 +1,226 @@
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+from flask import current_app
+from sqlalchemy import Select, cast, func, literal, select, tuple_
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION
+from sqlalchemy.orm import load_only, selectinload, undefer_group
+
+from api.articles.models import (
+    SEARCH_CONFIG,
+    Article,
+    ArticleLevel,
+    article_relationships,
+)
+from .projection import (
+    ALWAYS_LOADED,
+    LISTING_FIELDS,
+    article_load_options,
+    decode_cursor,
+    encode_cursor,
+)
+from .types import (
+    ArticleLevelEnum,
+    ArticleSearchConnection,
+    ArticleSearchEdge,
+    ArticleType,
+    PageInfo,
+)
+
+# Statements and result shaping shared by the sync and async schemas; each
+# schema only differs in how it executes them.
+
+
+def page_size(first: Optional[int]) -> int:
+    """Apply the default and maximum page sizes to a requested page size."""
+    if first is None:
+        first = current_app.config["ARTICLES_PAGE_SIZE"]
+    return max(0, min(first, current_app.config["ARTICLES_MAX_PAGE_SIZE"]))
+
+
+def article_by_slug_query(slug: str) -> Select:
+    """Select an article with its content and related articles, for a full page.
+
+    Related articles are only shown as cards, so only their listing columns
+    are loaded.
+    """
+    return (
+        select(Article)
+        .options(
+            undefer_group("content"),
+            selectinload(Article.related_articles).load_only(
+                *[getattr(Article, name) for name in LISTING_FIELDS]
+            ),
+        )
+        .where(Article.slug == slug)
+    )
+
+
+def all_articles_query(
+    first: int, after: Optional[str], attributes: Set[str]
+) -> Select:
+    query = select(Article).options(*article_load_options(attributes))
+    if after:
+        query = query.where(
+            tuple_(Article.relevance_score, Article.id) < tuple_(*decode_cursor(after))
+        )
+    return query.order_by(Article.relevance_score.desc(), Article.id.desc()).limit(
+        first + 1
+    )
+
+
+def article_connection_data(
+    articles: Sequence[Article], first: int, attributes: Set[str]
+) -> Dict[str, Any]:
+    """Shape one page of all_articles_query results as a cacheable connection."""
+    edges = [
+        {
+            "cursor": encode_cursor(article.relevance_score, article.id),
+            "node": ArticleType.from_projection(article, attributes).to_dict(),
+        }
+        for article in articles[:first]
+    ]
+    return {
+        "edges": edges,
+        "page_info": {
+            "has_next_page": len(articles) > first,
+            "end_cursor": edges[-1]["cursor"] if edges else None,
+        },
+    }
+
+
+def search_articles_query(
+    text: str,
+    first: int,
+    after: Optional[str],
+    taxonomy: Optional[str],
+    category: Optional[str],
+    level: Optional[ArticleLevelEnum],
+    attributes: Set[str],
+    with_snippets: bool = True,
+) -> Select:
+    """Select (article, rank, snippet) rows for one page of search results."""
+    ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, text)
+    # Ranks are compared with cursor values parsed in Python, so keep them
+    # in double precision rather than ts_rank's single-precision real
+    rank = cast(func.ts_rank_cd(Article.search_vector, ts_query), DOUBLE_PRECISION)
+
+    # The GIN index finds the matches, but ts_rank_cd reads the search_vector
+    # of every match from the table, so ranking costs grow with the number
+    # of matches. Only ids and ranks are paged; just the page is then loaded
+    # with its snippets, as ts_headline re-parses each document
+    ranked = select(Article.id, rank.label("rank")).where(
+        Article.search_vector.op("@@")(ts_query)
+    )
+    if taxonomy:
+        ranked = ranked.where(Article.taxonomy == taxonomy)
+    if category:
+        ranked = ranked.where(Article.category == category)
+    if level:
+        ranked = ranked.where(Article.level == ArticleLevel(level.value))
+    if after:
+        ranked = ranked.where(tuple_(rank, Article.id) < tuple_(*decode_cursor(after)))
+    ranked = ranked.order_by(rank.desc(), Article.id.desc()).limit(first + 1).subquery()
+
+    snippet = (
+        func.ts_headline(
+            SEARCH_CONFIG,
+            func.concat_ws(" ", Article.excerpt, Article.content),
+            ts_query,
+            "StartSel=<mark>, StopSel=</mark>, MinWords=15, MaxWords=35, "
+            'MaxFragments=2, FragmentDelimiter=" ... "',
+        )
+        if with_snippets
+        else literal(None)
+    )
+    return (
+        select(Article, ranked.c.rank, snippet)
+        .options(*article_load_options(attributes))
+        .join(ranked, ranked.c.id == Article.id)
+        .order_by(ranked.c.rank.desc(), Article.id.desc())
+    )
+
+
+def search_connection(
+    rows: Sequence, first: int, attributes: Set[str]
+) -> ArticleSearchConnection:
+    """Shape search_articles_query rows as a search connection."""
+    edges = [
+        ArticleSearchEdge(
+            cursor=encode_cursor(rank, article.id),
+            node=ArticleType.from_projection(article, attributes),
+            rank=rank,
+            snippet=snippet,
+        )
+        for article, rank, snippet in rows[:first]
+    ]
+    return ArticleSearchConnection(
+        edges=edges,
+        page_info=PageInfo(
+            has_next_page=len(rows) > first,
+            end_cursor=edges[-1].cursor if edges else None,
+        ),
+    )
+
+
+def articles_by_taxonomy_query(taxonomy: str, attributes: Set[str]) -> Select:
+    return (
+        select(Article)
+        .options(*article_load_options(attributes))
+        .where(Article.taxonomy == taxonomy)
+    )
+
+
+def articles_by_category_query(
+    category: str, taxonomy: Optional[str], attributes: Set[str]
+) -> Select:
+    query = (
+        select(Article)
+        .options(*article_load_options(attributes))
+        .where(Article.category == category)
+    )
+    if taxonomy:
+        query = query.where(Article.taxonomy == taxonomy)
+    return query
+
+
+def articles_by_level_query(level: ArticleLevelEnum, attributes: Set[str]) -> Select:
+    return (
+        select(Article)
+        .options(*article_load_options(attributes))
+        .where(Article.level == ArticleLevel(level.value))
+    )
+
+
+def taxonomy_stats_data(rows: Sequence) -> List[Dict[str, Any]]:
+    return [
+        {
+            "taxonomy": r.taxonomy,
+            "total_articles": r.total_articles,
+            "categories": r.categories,
+        }
+        for r in rows
+    ]
+
+
+def category_stats_data(rows: Sequence) -> List[Dict[str, Any]]:
+    return [
+        {
+            "category": r.category,
+            "taxonomy": r.taxonomy,
+            "total_articles": r.total_articles,
+            "levels": r.levels,
+        }
+        for r in rows
+    ]
+
+
+def related_articles_query(article_ids: Set[int], attributes: Set[str]) -> Select:
+    """Select (article_id, related Article) rows for every id in article_ids."""
+    columns = (attributes - {"related_articles"}) | ALWAYS_LOADED
+    return (
+        select(article_relationships.c.article_id, Article)
+        .join(Article, Article.id == article_relationships.c.related_article_id)
+        .where(article_relationships.c.article_id.in_(article_ids))
+        .options(load_only(*[getattr(Article, column) for column in sorted(columns)]))
+        .order_by(Article.relevance_score.desc(), Article.id)
+    )
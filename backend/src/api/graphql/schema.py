@@ -1,14 +1,40 @@
-from threading import Thread
-from typing import List, Optional
+import json
+from typing import List, Optional, Set
 
 import strawberry
-from flask import current_app
-from sqlalchemy import func
-from sqlalchemy.orm import joinedload
-
-from api.articles.models import Article
-from services.ai.article_generator import ArticleGenerator
-from .types import ArticleType, TaxonomyStats, CategoryStats, ArticleLevelEnum
+from strawberry.types import Info
+
+from api.articles.models import ArticleStats
+from db_routing import primary
+from extensions import db
+from services.cache.article_cache import ArticleCache
+from services.generation.job_queue import GenerationQueue
+from .projection import (
+    connection_edge_fields,
+    connection_node_fields,
+    selected_attributes,
+)
+from .queries import (
+    all_articles_query,
+    article_by_slug_query,
+    article_connection_data,
+    articles_by_category_query,
+    articles_by_level_query,
+    articles_by_taxonomy_query,
+    category_stats_data,
+    page_size,
+    search_articles_query,
+    search_connection,
+    taxonomy_stats_data,
+)
+from .types import (
+    ArticleConnection,
+    ArticleSearchConnection,
+    ArticleType,
+    TaxonomyStats,
+    CategoryStats,
+    ArticleLevelEnum,
+)
 
 
 @strawberry.type
@@ -18,74 +44,163 @@ class Query:
         article = Query.resolve_article_by_slug(slug)
 
         if article and not article.is_generated:
-            article_generator = ArticleGenerator()
-            app = current_app._get_current_object()
-
-            def generate_with_context():
-                with app.app_context():
-                    article_generator.research_and_generate_article(
-                        article.title,
-                        article.level.value,
-                        article.taxonomy,
-                        article.category,
-                        article.tags,
-                        article.excerpt,
-                    )
-
-            thread = Thread(target=generate_with_context)
-            thread.daemon = True
-            thread.start()
+            GenerationQueue().enqueue(article.id)
 
         return article
 
     @staticmethod
-    def resolve_article_by_slug(slug: str) -> Optional[Article]:
-        return (
-            Article.query.options(joinedload(Article.related_articles))
-            .filter_by(slug=slug)
-            .first()
+    def resolve_article_by_slug(slug: str) -> Optional[ArticleType]:
+        # Values stored in the shared cache are read from the primary, so a
+        # lagging replica cannot refill it with the state before a change
+        def load():
+            with primary():
+                article = db.session.scalars(article_by_slug_query(slug)).first()
+                return ArticleType.from_orm(article).to_dict() if article else None
+
+        data = ArticleCache().article(slug, load)
+        return ArticleType.from_dict(data) if data else None
+
+    @strawberry.field(description="Get all articles, most relevant first")
+    def all_articles(
+        self, info: Info, first: Optional[int] = None, after: Optional[str] = None
+    ) -> ArticleConnection:
+        connection = Query.resolve_all_articles(
+            first, after, connection_node_fields(info)
+        )
+        info.context["related_articles_loader"].register(
+            edge.node.id for edge in connection.edges
         )
+        return connection
 
-    @strawberry.field(description="Get all articles")
-    def all_articles(self) -> List[ArticleType]:
-        return Query.resolve_all_articles()
+    @staticmethod
+    def resolve_all_articles(
+        first: Optional[int],
+        after: Optional[str],
+        attributes: Set[str],
+    ) -> ArticleConnection:
+        first = page_size(first)
+
+        def load():
+            with primary():
+                articles = db.session.scalars(
+                    all_articles_query(first, after, attributes)
+                ).all()
+                return article_connection_data(articles, first, attributes)
+
+        variant = json.dumps([first, after, sorted(attributes)])
+        return ArticleConnection.from_dict(ArticleCache().all_articles(variant, load))
+
+    @strawberry.field(
+        description="Full-text search over titles, tags, excerpts and content, "
+        "best matches first"
+    )
+    def search_articles(
+        self,
+        info: Info,
+        query: str,
+        first: Optional[int] = None,
+        after: Optional[str] = None,
+        taxonomy: Optional[str] = None,
+        category: Optional[str] = None,
+        level: Optional[ArticleLevelEnum] = None,
+    ) -> ArticleSearchConnection:
+        connection = Query.resolve_search_articles(
+            query,
+            first,
+            after,
+            taxonomy,
+            category,
+            level,
+            connection_node_fields(info),
+            with_snippets="snippet" in connection_edge_fields(info),
+        )
+        info.context["related_articles_loader"].register(
+            edge.node.id for edge in connection.edges
+        )
+        return connection
 
     @staticmethod
-    def resolve_all_articles() -> List[Article]:
-        return Article.query.order_by(Article.relevance_score.desc()).all()
+    def resolve_search_articles(
+        text: str,
+        first: Optional[int],
+        after: Optional[str],
+        taxonomy: Optional[str],
+        category: Optional[str],
+        level: Optional[ArticleLevelEnum],
+        attributes: Set[str],
+        with_snippets: bool = True,
+    ) -> ArticleSearchConnection:
+        first = page_size(first)
+        rows = db.session.execute(
+            search_articles_query(
+                text,
+                first,
+                after,
+                taxonomy,
+                category,
+                level,
+                attributes,
+                with_snippets,
+            )
+        ).all()
+        return search_connection(rows, first, attributes)
 
     @strawberry.field(description="Get articles by taxonomy")
-    def articles_by_taxonomy(self, taxonomy: str) -> List[ArticleType]:
-        return Query.resolve_articles_by_taxonomy(taxonomy)
+    def articles_by_taxonomy(self, info: Info, taxonomy: str) -> List[ArticleType]:
+        return Query._register(
+            info,
+            Query.resolve_articles_by_taxonomy(taxonomy, selected_attributes(info)),
+        )
 
     @staticmethod
-    def resolve_articles_by_taxonomy(taxonomy: str) -> List[ArticleType]:
-        articles = Article.query.filter_by(taxonomy=taxonomy).all()
-        return [ArticleType.from_orm(article) for article in articles]
+    def resolve_articles_by_taxonomy(
+        taxonomy: str, attributes: Set[str]
+    ) -> List[ArticleType]:
+        articles = db.session.scalars(
+            articles_by_taxonomy_query(taxonomy, attributes)
+        ).all()
+        return [
+            ArticleType.from_projection(article, attributes) for article in articles
+        ]
 
     @strawberry.field(description="Get articles by category and optional taxonomy")
     def articles_by_category(
-        self, category: str, taxonomy: Optional[str] = None
+        self, info: Info, category: str, taxonomy: Optional[str] = None
     ) -> List[ArticleType]:
-        return Query.resolve_articles_by_category(category, taxonomy)
+        return Query._register(
+            info,
+            Query.resolve_articles_by_category(
+                category, taxonomy, selected_attributes(info)
+            ),
+        )
 
     @staticmethod
     def resolve_articles_by_category(
-        category: str, taxonomy: Optional[str] = None
+        category: str, taxonomy: Optional[str], attributes: Set[str]
     ) -> List[ArticleType]:
-        query = Article.query.filter_by(category=category)
-        if taxonomy:
-            query = query.filter_by(taxonomy=taxonomy)
-        return [ArticleType.from_orm(article) for article in query.all()]
+        articles = db.session.scalars(
+            articles_by_category_query(category, taxonomy, attributes)
+        ).all()
+        return [
+            ArticleType.from_projection(article, attributes) for article in articles
+        ]
 
     @strawberry.field(description="Get articles by difficulty level")
-    def articles_by_level(self, level: ArticleLevelEnum) -> List[ArticleType]:
-        return Query.resolve_articles_by_level(level)
+    def articles_by_level(
+        self, info: Info, level: ArticleLevelEnum
+    ) -> List[ArticleType]:
+        return Query._register(
+            info, Query.resolve_articles_by_level(level, selected_attributes(info))
+        )
 
     @staticmethod
-    def resolve_articles_by_level(level: ArticleLevelEnum) -> List[ArticleType]:
-        articles = Article.query.filter_by(level=level.value).all()
-        return [ArticleType.from_orm(article) for article in articles]
+    def resolve_articles_by_level(
+        level: ArticleLevelEnum, attributes: Set[str]
+    ) -> List[ArticleType]:
+        articles = db.session.scalars(articles_by_level_query(level, attributes)).all()
+        return [
+            ArticleType.from_projection(article, attributes) for article in articles
+        ]
 
     @strawberry.field(description="Get statistics about all taxonomies")
     def all_taxonomies(self) -> List[TaxonomyStats]:
@@ -93,20 +208,11 @@ class Query:
 
     @staticmethod
     def resolve_all_taxonomies() -> List[TaxonomyStats]:
-        results = (
-            db.session.query(
-                Article.taxonomy,
-                func.count(Article.id).label("total"),
-                func.array_agg(func.distinct(Article.category)).label("categories"),
-            )
-            .group_by(Article.taxonomy)
-            .all()
-        )
+        def load():
+            with primary():
+                return taxonomy_stats_data(ArticleStats.taxonomies())
 
-        return [
-            TaxonomyStats(taxonomy=r[0], total_articles=r[1], categories=r[2])
-            for r in results
-        ]
+        return [TaxonomyStats(**data) for data in ArticleCache().taxonomies(load)]
 
     @strawberry.field(description="Get statistics about all categories")
     def all_categories(self) -> List[CategoryStats]:
@@ -114,26 +220,19 @@ class Query:
 
     @staticmethod
     def resolve_all_categories() -> List[CategoryStats]:
-        results = (
-            db.session.query(
-                Article.category,
-                Article.taxonomy,
-                func.count(Article.id).label("total"),
-                func.array_agg(func.distinct(Article.level)).label("levels"),
-            )
-            .group_by(Article.category, Article.taxonomy)
-            .all()
-        )
+        def load():
+            with primary():
+                return category_stats_data(ArticleStats.categories())
 
-        return [
-            CategoryStats(
-                category=r[0],
-                taxonomy=r[1],
-                total_articles=r[2],
-                levels=[level.value for level in r[3]],
-            )
-            for r in results
-        ]
+        return [CategoryStats(**data) for data in ArticleCache().categories(load)]
+
+    @staticmethod
+    def _register(info: Info, articles: List[ArticleType]) -> List[ArticleType]:
+        """Let the related articles loader batch over a returned list."""
+        info.context["related_articles_loader"].register(
+            article.id for article in articles
+        )
+        return articles
 
 
 schema = strawberry.Schema(query=Query)
@@ -1,10 +1,14 @@
-from dataclasses import dataclass
+import inspect
+from dataclasses import dataclass, fields
 from enum import Enum
-from typing import List, Optional
+from typing import Awaitable, List, Optional, Set
 
 import strawberry
+from flask import current_app
+from strawberry.types import Info
 
 from api.articles.models import Article
+from .projection import LISTING_FIELDS, related_depth, selected_attributes
 
 
 class Level(Enum):
@@ -16,6 +20,14 @@ class Level(Enum):
 ArticleLevelEnum = strawberry.enum(Level)
 
 
+@dataclass
+@strawberry.type
+class TocEntry:
+    level: int
+    anchor: str
+    title: str
+
+
 @dataclass
 @strawberry.type
 class ArticleType:
@@ -27,11 +39,52 @@ class ArticleType:
     category: str
     tags: List[str]
     content: Optional[str]
+    # Sanitized HTML rendered from content, null until the article is rendered
+    content_html: Optional[str]
     excerpt: Optional[str]  # Make sure we include excerpt
     is_generated: bool
     word_count: int
     updated_at: Optional[str]
-    related_articles: List["ArticleType"]  # Add related articles
+    # Rendered headings as stored in Article.toc
+    toc: strawberry.Private[Optional[List[dict]]] = None
+    # Related articles loaded together with the article, if any
+    prefetched_related: strawberry.Private[Optional[List["ArticleType"]]] = None
+
+    @strawberry.field(description="Anchored headings of contentHtml, in order")
+    def table_of_contents(self) -> List[TocEntry]:
+        return [TocEntry(**entry) for entry in self.toc or []]
+
+    @strawberry.field
+    def related_articles(self, info: Info) -> List["ArticleType"]:
+        max_depth = current_app.config["GRAPHQL_MAX_RELATED_DEPTH"]
+        if related_depth(info) > max_depth:
+            raise ValueError(
+                f"relatedArticles cannot be nested more than {max_depth} levels deep"
+            )
+
+        loader = info.context["related_articles_loader"]
+        if self.prefetched_related is not None:
+            loader.register(article.id for article in self.prefetched_related)
+            return self.prefetched_related
+
+        attributes = selected_attributes(info)
+        rows = loader.load(self.id, attributes)
+        if inspect.isawaitable(rows):
+            # AsyncRelatedArticlesLoader; the async executor awaits the result
+            return ArticleType._project_related_async(rows, attributes)
+        return ArticleType._project_related(rows, attributes)
+
+    @staticmethod
+    def _project_related(
+        rows: List[Article], attributes: Set[str]
+    ) -> List["ArticleType"]:
+        return [ArticleType.from_projection(article, attributes) for article in rows]
+
+    @staticmethod
+    async def _project_related_async(
+        rows: Awaitable[List[Article]], attributes: Set[str]
+    ) -> List["ArticleType"]:
+        return ArticleType._project_related(await rows, attributes)
 
     @classmethod
     def from_orm(cls, article: Article) -> "ArticleType":
@@ -44,17 +97,72 @@ class ArticleType:
             category=article.category,
             tags=article.tags,
             content=article.content,
+            content_html=article.content_html,
+            toc=article.toc,
             excerpt=article.excerpt,
             is_generated=article.is_generated,
             word_count=article.word_count,
             updated_at=article.updated_at.isoformat() if article.updated_at else None,
-            related_articles=[
-                ArticleType.from_orm(related) for related in article.related_articles
-            ]
-            if article.related_articles
-            else [],
+            # Related articles are cards: their content is never loaded
+            prefetched_related=[
+                ArticleType.from_projection(related, set(LISTING_FIELDS))
+                for related in article.related_articles
+            ],
         )
 
+    @classmethod
+    def from_projection(cls, article: Article, attributes: Set[str]) -> "ArticleType":
+        """
+        Build an article from a row loaded with only some of its columns.
+
+        Attributes outside the projection are left empty; they were not
+        selected in the query, so GraphQL never resolves them.
+        """
+        data = dict.fromkeys(ARTICLE_DATA_FIELDS)
+        for name in (attributes | {"id"}) & data.keys():
+            if name == "level":
+                data[name] = article.level.value
+            elif name == "updated_at":
+                data[name] = (
+                    article.updated_at.isoformat() if article.updated_at else None
+                )
+            else:
+                data[name] = getattr(article, name)
+        return cls(**data)
+
+    def to_dict(self) -> dict:
+        """Serialize the article, and any prefetched related articles, for caching."""
+        data = {name: getattr(self, name) for name in ARTICLE_DATA_FIELDS}
+        data["prefetched_related"] = (
+            [article.to_dict() for article in self.prefetched_related]
+            if self.prefetched_related is not None
+            else None
+        )
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ArticleType":
+        """Rebuild an article from its cached dictionary form."""
+        related = data.get("prefetched_related")
+        return cls(
+            **{
+                **data,
+                "prefetched_related": (
+                    [ArticleType.from_dict(article) for article in related]
+                    if related is not None
+                    else None
+                ),
+            }
+        )
+
+
+# Plain data attributes of ArticleType, excluding resolved and private fields
+ARTICLE_DATA_FIELDS = [
+    field.name
+    for field in fields(ArticleType)
+    if field.name not in ("prefetched_related", "related_articles", "table_of_contents")
+]
+
 
 @dataclass
 @strawberry.type
@@ -71,3 +179,54 @@ class CategoryStats:
     taxonomy: str
     total_articles: int
     levels: List[str]
+
+
+@dataclass
+@strawberry.type
+class PageInfo:
+    has_next_page: bool
+    end_cursor: Optional[str]
+
+
+@dataclass
+@strawberry.type
+class ArticleEdge:
+    cursor: str
+    node: ArticleType
+
+
+@dataclass
+@strawberry.type
+class ArticleConnection:
+    edges: List[ArticleEdge]
+    page_info: PageInfo
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ArticleConnection":
+        """Rebuild a connection from its cached dictionary form."""
+        return cls(
+            edges=[
+                ArticleEdge(
+                    cursor=edge["cursor"], node=ArticleType.from_dict(edge["node"])
+                )
+                for edge in data["edges"]
+            ],
+            page_info=PageInfo(**data["page_info"]),
+        )
+
+
+@dataclass
+@strawberry.type
+class ArticleSearchEdge:
+    cursor: str
+    node: ArticleType
+    rank: float
+    # Matching fragments with terms wrapped in <mark>; other text is unescaped
+    snippet: Optional[str]
+
+
+@dataclass
+@strawberry.type
+class ArticleSearchConnection:
+    edges: List[ArticleSearchEdge]
+    page_info: PageInfo
@@ -1,14 +1,26 @@
 import os
+import random
+from contextlib import asynccontextmanager
 
 from flask import Flask
 
+from sqlalchemy import make_url
+
 from cli import (
+    benchmark_indexes_command,
+    export_static_command,
+    generation_worker_command,
+    llm_cache_command,
+    llm_usage_command,
     populate_db_command,
+    refresh_stats_command,
+    render_articles_command,
     update_relevance_scores_command,
     update_word_counts_command,
 )
 from config import config
-from extensions import db, migrate, jwt, cors, redis_client
+from db_routing import REPLICA_BIND_PREFIX
+from extensions import db, migrate, jwt, cors, redis_client, async_redis_client
 
 
 def create_app(config_name=None):
@@ -25,7 +37,7 @@ def create_app(config_name=None):
     jwt.init_app(app)
     cors.init_app(app)
 
-    redis_client.from_url(app.config["REDIS_URL"])
+    redis_client.init_app(app)
 
     # Register blueprints
     from api.articles import articles_bp
@@ -39,12 +51,20 @@ def create_app(config_name=None):
     app.cli.add_command(populate_db_command)
     app.cli.add_command(update_word_counts_command)
     app.cli.add_command(update_relevance_scores_command)
+    app.cli.add_command(refresh_stats_command)
+    app.cli.add_command(generation_worker_command)
+    app.cli.add_command(llm_cache_command)
+    app.cli.add_command(llm_usage_command)
+    app.cli.add_command(benchmark_indexes_command)
+    app.cli.add_command(render_articles_command)
+    app.cli.add_command(export_static_command)
 
     # Configure logging
     if not app.debug:
         import logging
         from logging.handlers import RotatingFileHandler
 
+        os.makedirs("logs", exist_ok=True)
         file_handler = RotatingFileHandler(
             "logs/app.log", maxBytes=10240, backupCount=10
         )
@@ -60,3 +80,113 @@ def create_app(config_name=None):
         app.logger.info("Application startup")
 
     return app
+
+
+def async_database_url(url: str) -> str:
+    """Return the SQLAlchemy URL of the same database on the asyncpg driver."""
+    return (
+        make_url(url)
+        .set(drivername="postgresql+asyncpg")
+        .render_as_string(hide_password=False)
+    )
+
+
+def create_asgi_app(config_name=None):
+    """
+    ASGI application factory serving GraphQL with async resolvers.
+
+    /api/graphql runs AsyncQuery on an asyncpg engine and
+    /api/articles/<slug>/events streams generation progress; every other
+    route is handed to the regular Flask app, so REST endpoints keep working
+    on the same port. The sync WSGI app from create_app stays available.
+    """
+    from a2wsgi import WSGIMiddleware
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from starlette.applications import Starlette
+    from starlette.middleware.cors import CORSMiddleware
+    from starlette.routing import Mount, Route
+
+    from api.articles.events import GenerationEventStream
+    from api.graphql.asgi import ArticleAsyncGraphQL, FlaskAppContextMiddleware
+    from services.generation.events import GenerationEventHub
+
+    flask_app = create_app(config_name)
+    settings = flask_app.config
+
+    # Every async resolver is read-only, so sessions go to a random replica,
+    # or to the primary when none is configured. Reads that refill the shared
+    # cache or version responses always use the primary.
+    options = {
+        key: value
+        for key, value in settings["SQLALCHEMY_ENGINE_OPTIONS"].items()
+        if key in ("pool_timeout", "pool_recycle", "pool_pre_ping")
+    }
+    options.update(
+        pool_size=settings["ASYNC_DB_POOL_SIZE"],
+        max_overflow=settings["ASYNC_DB_MAX_OVERFLOW"],
+    )
+    if settings["READ_STATEMENT_TIMEOUT_MS"]:
+        options["connect_args"] = {
+            "server_settings": {
+                "statement_timeout": str(settings["READ_STATEMENT_TIMEOUT_MS"])
+            }
+        }
+    urls = {"async_primary": settings["SQLALCHEMY_DATABASE_URI"]}
+    urls.update(
+        (f"async_{key}", bind["url"])
+        for key, bind in settings["SQLALCHEMY_BINDS"].items()
+        if key.startswith(REPLICA_BIND_PREFIX)
+    )
+    engines = {
+        name: create_async_engine(async_database_url(url), **options)
+        for name, url in urls.items()
+    }
+    flask_app.extensions["async_engines"] = engines
+    session_makers = {
+        name: async_sessionmaker(engine, expire_on_commit=False)
+        for name, engine in engines.items()
+    }
+    replica_makers = [
+        maker for name, maker in session_makers.items() if name != "async_primary"
+    ] or [session_makers["async_primary"]]
+
+    def session_factory():
+        return random.choice(replica_makers)()
+
+    primary_session_factory = session_makers["async_primary"]
+
+    async_redis_client.init_app(flask_app)
+
+    graphql = CORSMiddleware(
+        ArticleAsyncGraphQL(session_factory, primary_session_factory, graphiql=True),
+        allow_origins=["*"],
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Server-Sent Events of generations in progress, instead of client polling
+    event_hub = GenerationEventHub()
+    generation_events = CORSMiddleware(
+        GenerationEventStream(
+            primary_session_factory, event_hub, settings["GENERATION_EVENTS_TIMEOUT"]
+        ),
+        allow_origins=["*"],
+        allow_methods=["GET"],
+    )
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        await event_hub.close()
+        for engine in engines.values():
+            await engine.dispose()
+
+    app = Starlette(
+        routes=[
+            Route("/api/graphql", graphql),
+            Route("/api/articles/{slug}/events", generation_events),
+            Mount("/", app=WSGIMiddleware(flask_app)),
+        ],
+        lifespan=lifespan,
+    )
+    return FlaskAppContextMiddleware(app, flask_app)
@@ -0,0 +1,9 @@
+"""ASGI entry point for production servers (see gunicorn.conf.py).
+
+Serves GraphQL with async resolvers and the generation event streams; for
+development, run it with uvicorn asgi:app --app-dir src --port 5000.
+"""
+
+from app import create_asgi_app
+
+app = create_asgi_app()
@@ -1,53 +1,325 @@
+from datetime import datetime, timedelta
+
 import click
+from flask import current_app
 from flask.cli import with_appcontext
-from api.articles.models import Article
-from extensions import db
+from sqlalchemy import func, select
+from api.articles.models import Article, ArticleStats
+from extensions import db, redis_client
+from services.ai.response_cache import LLMResponseCache
+from services.ai.usage import LLMUsage
+from services.cache.article_cache import ArticleCache
+from services.data_population.content_render import ContentRenderBackfill
 from services.data_population.populate import DatabasePopulator
+from services.data_population.word_counts import WordCountBackfill
+from services.diagnostics.query_plans import QueryPlan, QueryPlanBenchmark
+from services.export.static_site import StaticSiteExporter
+from services.generation.worker import GenerationWorker
 
 
 @click.command("populate-db")
 @click.option("--force", is_flag=True, help="Force regeneration of existing articles")
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Always call the providers, bypassing the LLM cache",
+)
+@click.option(
+    "--batch",
+    is_flag=True,
+    help="Generate through provider batch jobs: cheaper, but may take hours; "
+    "rerun to resume",
+)
 @with_appcontext
-def populate_db_command(force):
+def populate_db_command(force, no_cache, batch):
     """Populate database with initial articles."""
+    if no_cache:
+        current_app.config["LLM_CACHE_ENABLED"] = False
+
     populator = DatabasePopulator()
-    populator.populate_initial_articles(force=force)
+    populator.populate_initial_articles(
+        force=force,
+        on_progress=lambda progress: click.echo(str(progress)),
+        batch=batch,
+    )
     click.echo("Database population completed.")
 
+    response_cache = LLMResponseCache.from_config()
+    if response_cache:
+        stats = response_cache.stats()
+        click.echo(
+            f"LLM cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.0%} hit rate)"
+        )
+
+
+@click.command("llm-cache")
+@click.option("--clear", is_flag=True, help="Delete every cached response")
+@with_appcontext
+def llm_cache_command(clear):
+    """Show or clear the LLM response cache."""
+    response_cache = LLMResponseCache(
+        current_app.config["LLM_CACHE_DIR"], current_app.config["LLM_CACHE_MAX_BYTES"]
+    )
+    if clear:
+        click.echo(f"Removed {response_cache.clear()} cached responses.")
+        return
+
+    stats = response_cache.stats()
+    click.echo(
+        f"{stats['entries']} cached responses, {stats['bytes'] / 1024 / 1024:.1f} MiB"
+    )
+
+
+@click.command("llm-usage")
+@click.option("--reset", is_flag=True, help="Reset the counters")
+@with_appcontext
+def llm_usage_command(reset):
+    """Show provider token usage, including prompt cache writes and reads."""
+    if reset:
+        LLMUsage.reset()
+        click.echo("LLM usage counters reset.")
+        return
+
+    for name, counters in sorted(LLMUsage.stats().items()):
+        cached = counters["cache_read_input_tokens"]
+        prompt_tokens = (
+            counters["input_tokens"] + counters["cache_creation_input_tokens"] + cached
+        )
+        click.echo(
+            f"{name}: {counters['requests']} requests, "
+            f"{prompt_tokens} prompt tokens "
+            f"({counters['cache_creation_input_tokens']} written to and "
+            f"{cached} read from the prompt cache, "
+            f"{cached / prompt_tokens if prompt_tokens else 0:.0%} cached), "
+            f"{counters['output_tokens']} output tokens"
+        )
+
 
 @click.command("update-word-counts")
+@click.option(
+    "--batch-size", type=int, default=1000, help="Articles updated per transaction"
+)
+@click.option(
+    "--start-after",
+    type=int,
+    default=None,
+    help="Only update articles with a greater id (defaults to the last checkpoint)",
+)
+@click.option("--restart", is_flag=True, help="Ignore the saved checkpoint")
+@click.option(
+    "--in-sql", is_flag=True, help="Count words in the database instead of Python"
+)
 @with_appcontext
-def update_word_counts_command():
+def update_word_counts_command(batch_size, start_after, restart, in_sql):
     """Update word_count for all articles with content."""
+    backfill = WordCountBackfill(batch_size=batch_size)
+    if restart:
+        backfill.reset_checkpoint()
+    if start_after is None:
+        start_after = backfill.last_checkpoint()
+    if start_after:
+        click.echo(f"Resuming after article {start_after}.")
+
     try:
-        # Get all articles with content
-        articles = Article.query.filter(Article.content.isnot(None)).all()
+        updated_count = backfill.run(
+            start_after=start_after,
+            in_sql=in_sql,
+            progress=lambda count, last_id: click.echo(
+                f"Updated {count} articles (last id {last_id})"
+            ),
+        )
+        if updated_count:
+            ArticleCache().invalidate_listings()
+        click.echo(f"Successfully updated word count for {updated_count} articles.")
 
-        if not articles:
-            click.echo("No articles with content found.")
-            return
+    except Exception as e:
+        db.session.rollback()
+        click.echo(f"Error updating word counts: {str(e)}", err=True)
+        raise
 
-        updated_count = 0
-        for article in articles:
-            # Count words in content (splitting by whitespace)
-            word_count = len(article.content.split())
-            article.word_count = word_count
-            updated_count += 1
 
-        db.session.commit()
-        click.echo(f"Successfully updated word count for {updated_count} articles.")
+@click.command("render-articles")
+@click.option(
+    "--batch-size", type=int, default=200, help="Articles rendered per transaction"
+)
+@click.option(
+    "--start-after",
+    type=int,
+    default=None,
+    help="Only render articles with a greater id (defaults to the last checkpoint)",
+)
+@click.option("--restart", is_flag=True, help="Ignore the saved checkpoint")
+@click.option(
+    "--all",
+    "rerender",
+    is_flag=True,
+    help="Re-render articles that already have HTML (after a renderer change)",
+)
+@with_appcontext
+def render_articles_command(batch_size, start_after, restart, rerender):
+    """Render stored Markdown content to HTML and a table of contents."""
+    backfill = ContentRenderBackfill(batch_size=batch_size)
+    if restart:
+        backfill.reset_checkpoint()
+    if start_after is None:
+        start_after = backfill.last_checkpoint()
+    if start_after:
+        click.echo(f"Resuming after article {start_after}.")
+
+    try:
+        rendered_count = backfill.run(
+            start_after=start_after,
+            rerender=rerender,
+            progress=lambda count, last_id: click.echo(
+                f"Rendered {count} articles (last id {last_id})"
+            ),
+        )
+        click.echo(f"Successfully rendered {rendered_count} articles.")
 
     except Exception as e:
         db.session.rollback()
-        click.echo(f"Error updating word counts: {str(e)}", err=True)
+        click.echo(f"Error rendering articles: {str(e)}", err=True)
         raise
 
 
+@click.command("export-static")
+@click.option(
+    "--output-dir",
+    default=None,
+    help="Directory to write to (defaults to STATIC_EXPORT_DIR)",
+)
+@click.option(
+    "--full", is_flag=True, help="Rewrite every article, not just updated ones"
+)
+@with_appcontext
+def export_static_command(output_dir, full):
+    """Export generated articles and listings as static files for nginx."""
+    output_dir = output_dir or current_app.config["STATIC_EXPORT_DIR"]
+    stats = StaticSiteExporter(output_dir).run(full=full)
+    click.echo(
+        f"Exported to {output_dir}: {stats['written']} files written, "
+        f"{stats['unchanged']} unchanged, {stats['removed']} removed."
+    )
+
+
+RELEVANCE_WATERMARK_KEY = "relevance:last_run"
+# Rows are stamped with updated_at on the application clock when flushed, so
+# a transaction still open when a run starts may commit rows stamped before
+# it; the next incremental run reaches this far back to rescore them
+RELEVANCE_WATERMARK_MARGIN = timedelta(minutes=5)
+
+
 @click.command("update-relevance-scores")
+@click.option(
+    "--incremental",
+    is_flag=True,
+    help="Only rescore articles affected by changes since the last run",
+)
 @with_appcontext
-def update_relevance_scores_command():
+def update_relevance_scores_command(incremental):
     """Update relevance scores for all articles."""
-    articles = Article.query.all()
-    for article in articles:
-        article.update_relevance_score()
-    click.echo("Updated relevance scores for all articles.")
+    changed_since = None
+    if incremental:
+        last_run = redis_client.get(RELEVANCE_WATERMARK_KEY)
+        if last_run:
+            changed_since = datetime.fromisoformat(last_run)
+        else:
+            click.echo("No previous run recorded, rescoring all articles.")
+
+    # Read before rescoring; articles unlinked meanwhile wait for the next run
+    unlinked = [
+        int(article_id) for article_id in redis_client.smembers(Article.UNLINKED_KEY)
+    ]
+    # Begins the transaction of the rescore: now() is its start on the
+    # database clock, and anything committed earlier is rescored by this run
+    started_at = db.session.scalar(select(func.timezone("UTC", func.now())))
+    updated_count = Article.bulk_update_relevance_scores(
+        changed_since=changed_since, unlinked=unlinked
+    )
+    redis_client.set(
+        RELEVANCE_WATERMARK_KEY,
+        (started_at - RELEVANCE_WATERMARK_MARGIN).isoformat(),
+    )
+    if unlinked:
+        redis_client.srem(Article.UNLINKED_KEY, *unlinked)
+    if updated_count:
+        # Scores order the listings
+        ArticleCache().invalidate_listings()
+    click.echo(f"Updated relevance scores for {updated_count} articles.")
+
+
+@click.command("refresh-stats")
+@click.option(
+    "--blocking",
+    is_flag=True,
+    help="Refresh without CONCURRENTLY (faster, but blocks readers meanwhile)",
+)
+@click.option(
+    "--if-stale",
+    is_flag=True,
+    help="Only refresh if articles were inserted since the last refresh "
+    "(for running on an interval without a generation worker)",
+)
+@with_appcontext
+def refresh_stats_command(blocking, if_stale):
+    """Refresh the materialized taxonomy and category statistics."""
+    if if_stale:
+        if not ArticleStats.refresh_if_stale():
+            click.echo("Taxonomy and category statistics are up to date.")
+            return
+    else:
+        ArticleStats.refresh(concurrently=not blocking)
+    ArticleCache().invalidate_listings()
+    click.echo("Taxonomy and category statistics refreshed.")
+
+
+@click.command("generation-worker")
+@click.option(
+    "--concurrency",
+    type=int,
+    default=None,
+    help="Number of articles generated in parallel (defaults to config)",
+)
+@with_appcontext
+def generation_worker_command(concurrency):
+    """Process queued article generation jobs."""
+    if concurrency is None:
+        concurrency = current_app.config["GENERATION_WORKER_CONCURRENCY"]
+    worker = GenerationWorker(current_app._get_current_object(), concurrency)
+    worker.run()
+    click.echo("Generation worker stopped.")
+
+
+@click.command("benchmark-indexes")
+@click.option(
+    "--rows",
+    default=0,
+    type=int,
+    help="Synthetic articles to add for the run (rolled back afterwards)",
+)
+@click.option(
+    "--no-analyze", is_flag=True, help="Show estimated plans without executing"
+)
+@click.option("--verbose", is_flag=True, help="Print the full plans")
+@with_appcontext
+def benchmark_indexes_command(rows, no_analyze, verbose):
+    """Compare resolver query plans without and with the filter/sort indexes."""
+    plans = QueryPlanBenchmark(synthetic_rows=rows, analyze=not no_analyze).run()
+
+    for plan in plans:
+        if verbose:
+            click.echo(f"=== {plan.name} ===")
+            click.echo(f"--- before ---\n{plan.before}")
+            click.echo(f"--- after ---\n{plan.after}\n")
+
+    click.echo(f"{'query':<28} {'before':>12} {'after':>12}  plan after")
+    for plan in plans:
+        before = QueryPlan.execution_ms(plan.before)
+        after = QueryPlan.execution_ms(plan.after)
+        click.echo(
+            f"{plan.name:<28} "
+            f"{f'{before:.2f} ms' if before is not None else '-':>12} "
+            f"{f'{after:.2f} ms' if after is not None else '-':>12}  "
+            f"{plan.after.splitlines()[0].strip()}"
+        )
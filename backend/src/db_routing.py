@@ -0,0 +1,103 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator
+
+from flask import current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Bind keys of read replica engines in SQLALCHEMY_BINDS
+REPLICA_BIND_PREFIX = "replica_"
+
+_read_only: ContextVar[bool] = ContextVar("read_only", default=False)
+
+
+@contextmanager
+def read_replica() -> Iterator[None]:
+    """
+    Route the session's SELECTs inside the block to a read replica.
+
+    Writes and flushes still go to the primary, and reads fall back to it
+    when no replica is configured. Replicas lag the primary, so only wrap
+    code that tolerates slightly stale reads.
+    """
+    token = _read_only.set(True)
+    try:
+        yield
+    finally:
+        _read_only.reset(token)
+
+
+@contextmanager
+def primary() -> Iterator[None]:
+    """
+    Route the session's reads inside the block to the primary, also within
+    read_replica().
+
+    For reads that must see the latest commit, such as loads that refill
+    the shared Redis cache right after an invalidation, or the versions
+    that HTTP validators are computed from.
+    """
+    token = _read_only.set(False)
+    try:
+        yield
+    finally:
+        _read_only.reset(token)
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that sends reads under read_replica() to replicas."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and _read_only.get()
+            and not self._flushing
+            and getattr(clause, "is_select", False)
+        ):
+            replicas = replica_engines(self._db.engines)
+            if replicas:
+                return random.choice(list(replicas.values()))
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def replica_engines(engines: Dict) -> Dict[str, Engine]:
+    return {
+        key: engine
+        for key, engine in engines.items()
+        if key and key.startswith(REPLICA_BIND_PREFIX)
+    }
+
+
+@event.listens_for(RoutingSession, "after_begin")
+def _limit_read_statements(session, transaction, connection) -> None:
+    """Apply READ_STATEMENT_TIMEOUT_MS to transactions begun under read_replica()."""
+    if not _read_only.get():
+        return
+    timeout = current_app.config["READ_STATEMENT_TIMEOUT_MS"]
+    if timeout:
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout)}")
+
+
+def pool_stats(engines: Dict) -> Dict[str, Dict[str, int]]:
+    """
+    Report connection pool usage of each engine.
+
+    Args:
+        engines: Engines by name (bind key, or None for the primary)
+
+    Returns:
+        Pool size, idle, in-use and overflow connections per engine name
+    """
+    stats = {}
+    for key, engine in engines.items():
+        pool = getattr(engine, "sync_engine", engine).pool
+        stats[key or "primary"] = {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        }
+    return stats
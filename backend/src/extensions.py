@@ -3,9 +3,37 @@ from flask_jwt_extended import JWTManager
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
 
-db = SQLAlchemy()
+from db_routing import RoutingSession
+
+
+class FlaskRedis:
+    """Redis client created by init_app from the app's REDIS_URL.
+
+    Module-level like db, so modules can import it before the app exists;
+    attribute access is forwarded to the client.
+    """
+
+    def __init__(self, client_class=Redis):
+        self.client_class = client_class
+        self.client = None
+
+    def init_app(self, app) -> None:
+        self.client = self.client_class.from_url(
+            app.config["REDIS_URL"], decode_responses=True
+        )
+
+    def __getattr__(self, name):
+        if self.client is None:
+            raise RuntimeError("Redis client used before init_app")
+        return getattr(self.client, name)
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 migrate = Migrate()
 jwt = JWTManager()
 cors = CORS()
-redis_client = Redis()
+redis_client = FlaskRedis()
+# Used by the async GraphQL app only (see create_asgi_app)
+async_redis_client = FlaskRedis(AsyncRedis)
@@ -0,0 +1,163 @@
+import hashlib
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Callable, Iterable, Mapping, Optional, Tuple
+
+from flask import current_app, request
+from redis import RedisError
+from werkzeug.http import parse_date, parse_etags
+
+from extensions import async_redis_client, redis_client
+
+logger = logging.getLogger(__name__)
+
+# Set to the time of the last change to article listings or statistics. It
+# versions every response that is not about a single article.
+CATALOG_MODIFIED_KEY = "http:catalog_modified"
+
+
+@dataclass
+class CachePolicy:
+    max_age: int
+    stale_while_revalidate: int = 0
+
+    @classmethod
+    def for_operations(cls, names: Iterable[str]) -> "CachePolicy":
+        """Return the strictest configured policy of the named operations."""
+        policies = current_app.config["HTTP_CACHE_POLICIES"]
+        selected = [policies.get(name, policies["default"]) for name in names]
+        if not selected:
+            selected = [policies["default"]]
+        return cls(
+            max_age=min(max_age for max_age, _ in selected),
+            stale_while_revalidate=min(swr for _, swr in selected),
+        )
+
+    @property
+    def header(self) -> str:
+        if self.max_age <= 0:
+            # Always revalidate; a matching ETag makes that a 304
+            return "no-cache"
+        header = f"public, max-age={self.max_age}"
+        if self.stale_while_revalidate:
+            header += f", stale-while-revalidate={self.stale_while_revalidate}"
+        return header
+
+
+@dataclass
+class Validator:
+    """Version of a response: its ETag and Last-Modified time."""
+
+    etag: str
+    last_modified: Optional[datetime]
+
+    @classmethod
+    def build(cls, parts: Iterable, last_modified: Optional[datetime]) -> "Validator":
+        digest = hashlib.sha1(
+            "\x1f".join(str(part) for part in parts).encode()
+        ).hexdigest()
+        if last_modified and last_modified.tzinfo is None:
+            # Article timestamps are stored as naive UTC
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        return cls(etag=digest, last_modified=last_modified)
+
+    def matches(self, headers: Mapping[str, str]) -> bool:
+        """
+        Check whether a conditional request's cached copy is still current.
+
+        If-None-Match takes precedence over If-Modified-Since (RFC 9110).
+        """
+        if_none_match = headers.get("If-None-Match")
+        if if_none_match:
+            return parse_etags(if_none_match).contains_weak(self.etag)
+
+        if_modified_since = parse_date(headers.get("If-Modified-Since"))
+        if if_modified_since and self.last_modified:
+            # HTTP dates have second precision
+            return self.last_modified.replace(microsecond=0) <= if_modified_since
+        return False
+
+    def headers(self, policy: CachePolicy) -> dict:
+        headers = {"ETag": f'W/"{self.etag}"', "Cache-Control": policy.header}
+        if self.last_modified:
+            headers["Last-Modified"] = self.last_modified.strftime(
+                "%a, %d %b %Y %H:%M:%S GMT"
+            )
+        return headers
+
+
+class CatalogVersion:
+    """Last change to listings and statistics, kept in Redis.
+
+    Bumped by ArticleCache.invalidate_listings, i.e. whenever articles are
+    added, rescored or recounted. When the key is missing (e.g. after a Redis
+    flush) it restarts at the current time, which never matches old ETags.
+    """
+
+    @staticmethod
+    def get() -> Tuple[str, datetime]:
+        """Return the version token and the time it was set."""
+        now = datetime.now(timezone.utc).isoformat()
+        redis_client.set(CATALOG_MODIFIED_KEY, now, nx=True)
+        token = redis_client.get(CATALOG_MODIFIED_KEY) or now
+        return token, datetime.fromisoformat(token)
+
+    @staticmethod
+    async def get_async() -> Tuple[str, datetime]:
+        now = datetime.now(timezone.utc).isoformat()
+        await async_redis_client.set(CATALOG_MODIFIED_KEY, now, nx=True)
+        token = await async_redis_client.get(CATALOG_MODIFIED_KEY) or now
+        return token, datetime.fromisoformat(token)
+
+    @staticmethod
+    def bump() -> None:
+        redis_client.set(CATALOG_MODIFIED_KEY, datetime.now(timezone.utc).isoformat())
+
+
+def conditional(operation: str) -> Callable:
+    """
+    Make a GET view conditional on the catalog version.
+
+    Responses carry an ETag, Last-Modified and the operation's Cache-Control
+    policy; a request whose cached copy is current gets an empty 304.
+
+    Args:
+        operation: Key of the view's policy in HTTP_CACHE_POLICIES
+    """
+
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                token, modified = CatalogVersion.get()
+            except RedisError as e:
+                logger.warning(f"Catalog version unavailable, not caching: {e}")
+                return view(*args, **kwargs)
+
+            validator = Validator.build([request.full_path, token], modified)
+            headers = validator.headers(CachePolicy.for_operations([operation]))
+            if validator.matches(request.headers):
+                return current_app.response_class(status=304, headers=headers)
+
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                response.headers.update(headers)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def no_store(view: Callable) -> Callable:
+    """Mark a view's responses as never cacheable (e.g. live diagnostics)."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        response = current_app.make_response(view(*args, **kwargs))
+        response.headers["Cache-Control"] = "no-store"
+        return response
+
+    return wrapper
@@ -1,20 +1,30 @@
-import json
+import logging
 import time
-from typing import Dict, List, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
-from anthropic import Anthropic
 from flask import current_app
 
+from .catalog import estimate_tokens, serialize_catalog
 from .constants import (
+    ARTICLE_CATALOG_PROMPT,
+    ARTICLE_REQUEST_PROMPT,
+    ARTICLE_SYSTEM_PROMPT,
     ARTICLE_WORD_LIMITS,
     LEVEL_DESCRIPTIONS,
-    ARTICLE_GENERATION_PROMPT,
 )
+from .rate_limiter import ProviderRateLimiter
+from .response_cache import LLMResponseCache
+from .response_parser import ArticleStreamParser, ParsedArticle, TruncatedResponse
+from .sdk_clients import SDKClients
+from .usage import LLMUsage
+
+logger = logging.getLogger(__name__)
 
 
 class AnthropicClient:
     def __init__(self):
-        self.client = Anthropic(api_key=current_app.config["ANTHROPIC_API_KEY"])
+        self.client = SDKClients.anthropic()
+        self.response_cache = LLMResponseCache.from_config()
 
     def generate_article_content(
         self,
@@ -24,169 +34,288 @@ class AnthropicClient:
         category: str,
         tags: List[str],
         research_document: str,
-        existing_articles: List[Dict],
+        catalog_section: List[Dict],
+        related_candidates: List[Dict],
+        on_excerpt: Optional[Callable[[str], None]] = None,
+        on_content: Optional[Callable[[str], None]] = None,
+        rate_limiter: Optional[ProviderRateLimiter] = None,
     ) -> Tuple[str, str, List[Dict]]:
-        """Generate article content and related articles."""
-
-        # Format existing articles for the prompt
-        existing_articles_text = json.dumps(
-            [
-                {
-                    "id": art["id"],
-                    "title": art["title"],
-                    "taxonomy": art["taxonomy"],
-                    "category": art["category"],
-                    "level": art["level"],
-                    "tags": art["tags"],
-                }
-                for art in existing_articles
-            ],
-            indent=2,
+        """
+        Generate article content and related articles.
+
+        The response is parsed as it streams in: on_excerpt is called once
+        the excerpt is complete and on_content with each chunk of article
+        content, well before the related articles arrive. rate_limiter, if
+        given, is acquired before every call to the API, continuations
+        included.
+        """
+        request = AnthropicClient.article_request(
+            title=title,
+            level=level,
+            taxonomy=taxonomy,
+            category=category,
+            tags=tags,
+            research_document=research_document,
+            catalog_section=catalog_section,
+            related_candidates=related_candidates,
         )
+        parser = ArticleStreamParser(on_excerpt=on_excerpt, on_content=on_content)
 
-        prompt = ARTICLE_GENERATION_PROMPT.format(
+        content = self.response_cache.get(request) if self.response_cache else None
+        if content is not None:
+            parser.feed(content)
+            parsed = parser.finish()
+        else:
+            parsed = self._generate(request, parser, rate_limiter)
+            # Keep complete responses so a retry after a later failure is free
+            if self.response_cache:
+                self.response_cache.set(request, parser.received)
+
+        return parsed.excerpt, parsed.content, parsed.related_articles
+
+    @staticmethod
+    def article_request(
+        title: str,
+        level: str,
+        taxonomy: str,
+        category: str,
+        tags: List[str],
+        research_document: str,
+        catalog_section: List[Dict],
+        related_candidates: List[Dict],
+    ) -> Dict[str, Any]:
+        """
+        Build the generation request of an article.
+
+        The system prompt and the category's catalog section form a prefix
+        shared by every article of the category; with ANTHROPIC_PROMPT_CACHING
+        both end in a cache breakpoint, so only the per-article request is
+        billed at the full input price once the prefix is cached.
+
+        Args:
+            catalog_section: CatalogSnapshot section of the article's category
+            related_candidates: Other existing articles, most related first
+        """
+        cache_control = (
+            {"cache_control": {"type": "ephemeral"}}
+            if current_app.config["ANTHROPIC_PROMPT_CACHING"]
+            else {}
+        )
+        catalog_prompt = ARTICLE_CATALOG_PROMPT.format(
+            existing_articles=serialize_catalog(catalog_section)
+        )
+        article_prompt = ARTICLE_REQUEST_PROMPT.format(
+            related_articles=serialize_catalog(related_candidates),
             title=title,
             level_description=LEVEL_DESCRIPTIONS[level],
             taxonomy=taxonomy,
             category=category,
             tags=", ".join(tags),
             word_limit=ARTICLE_WORD_LIMITS[level],
-            existing_articles=existing_articles_text,
             research_document=research_document,
         )
+        return {
+            "model": "claude-3-5-sonnet-latest",
+            "max_tokens": 4096,
+            "temperature": 0.7,
+            "system": [
+                {"type": "text", "text": ARTICLE_SYSTEM_PROMPT, **cache_control}
+            ],
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": catalog_prompt, **cache_control},
+                        {"type": "text", "text": article_prompt},
+                    ],
+                }
+            ],
+        }
 
-        # Add a small delay before making the request
-        time.sleep(0.1)
+    @staticmethod
+    def estimate_request_tokens(request: Dict[str, Any]) -> int:
+        """Estimate the tokens of a request: its prompt and its max_tokens."""
+        texts = [block["text"] for block in request["system"]]
+        for message in request["messages"]:
+            content = message["content"]
+            if isinstance(content, str):
+                texts.append(content)
+            else:
+                texts.extend(block["text"] for block in content)
+        return sum(estimate_tokens(text) for text in texts) + request["max_tokens"]
+
+    def _generate(
+        self,
+        request: Dict[str, Any],
+        parser: ArticleStreamParser,
+        rate_limiter: Optional[ProviderRateLimiter] = None,
+    ) -> ParsedArticle:
+        """
+        Run request through parser, continuing a response that stops early.
+
+        A response cut off by max_tokens (or that just omits its end marker)
+        is continued by prefilling the assistant turn with the text so far,
+        instead of regenerating the article from scratch.
+
+        Raises:
+            TruncatedResponse: The response is still incomplete after
+                ANTHROPIC_MAX_CONTINUATIONS continuations
+            ValueError: The response does not follow the expected format
+        """
+        max_continuations = current_app.config["ANTHROPIC_MAX_CONTINUATIONS"]
+        started = time.monotonic()
+        for continuation in range(max_continuations + 1):
+            messages = request["messages"]
+            if continuation:
+                # The API rejects a final assistant turn ending in whitespace
+                messages = messages + [
+                    {"role": "assistant", "content": parser.rstrip()}
+                ]
+            completion = {**request, "messages": messages}
+            if rate_limiter:
+                # A continuation resends the prompt and the text so far
+                rate_limiter.acquire(
+                    AnthropicClient.estimate_request_tokens(completion)
+                )
+            stop_reason = self._complete(completion, parser)
+            try:
+                parsed = parser.finish()
+            except TruncatedResponse as e:
+                if continuation == max_continuations:
+                    raise
+                logger.warning(
+                    f"Response stopped ({stop_reason}) inside the {e.section} "
+                    f"section after {len(parser.received)} characters, continuing"
+                )
+                continue
 
-        response = self.client.messages.create(
-            model="claude-3-5-sonnet-latest",
-            max_tokens=4096,
-            temperature=0.7,
-            messages=[{"role": "user", "content": prompt}],
+            logger.info(
+                f"Generated {len(parsed.content)} characters in "
+                f"{time.monotonic() - started:.1f}s "
+                f"with {continuation} continuations"
+            )
+            return parsed
+
+    def _complete(self, request: Dict[str, Any], parser: ArticleStreamParser) -> str:
+        """Feed one completion of request to parser and return its stop reason."""
+        # Cache breakpoints are a beta feature of the pinned SDK
+        messages = (
+            self.client.beta.prompt_caching.messages
+            if current_app.config["ANTHROPIC_PROMPT_CACHING"]
+            else self.client.messages
+        )
+        if not current_app.config["ANTHROPIC_STREAMING"]:
+            response = messages.create(**request)
+            AnthropicClient._record_usage(response.usage)
+            if not response.content or not response.content[0].text:
+                raise ValueError("Empty response from Anthropic API")
+            parser.feed(response.content[0].text)
+            return response.stop_reason
+
+        started = time.monotonic()
+        with messages.stream(**request) as stream:
+            # Leaving the block early (e.g. on a format error) closes the
+            # connection, which stops generation and its billing
+            for text in stream.text_stream:
+                first_excerpt = parser.excerpt is None
+                parser.feed(text)
+                if first_excerpt and parser.excerpt is not None:
+                    logger.debug(
+                        f"Excerpt received after {time.monotonic() - started:.1f}s"
+                    )
+            response = stream.get_final_message()
+        AnthropicClient._record_usage(response.usage)
+        return response.stop_reason
+
+    def submit_batch(self, requests: Dict[str, Dict[str, Any]]) -> str:
+        """
+        Submit article requests as a Message Batch, at half the interactive price.
+
+        Args:
+            requests: article_request requests by custom ID
+
+        Returns:
+            The batch ID
+        """
+        # The SDK replaces its betas argument with the batches beta, so the
+        # prompt caching beta is passed as a header
+        betas = ["message-batches-2024-09-24"]
+        if current_app.config["ANTHROPIC_PROMPT_CACHING"]:
+            betas.append("prompt-caching-2024-07-31")
+        batch = self.client.beta.messages.batches.create(
+            requests=[
+                {"custom_id": custom_id, "params": request}
+                for custom_id, request in requests.items()
+            ],
+            extra_headers={"anthropic-beta": ",".join(betas)},
+        )
+        return batch.id
+
+    def batch_ended(self, batch_id: str) -> bool:
+        """Return whether the batch has ended, logging its progress."""
+        batch = self.client.beta.messages.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        logger.info(
+            f"Anthropic batch {batch_id} {batch.processing_status}: "
+            f"{counts.processing} processing, {counts.succeeded} succeeded, "
+            f"{counts.errored} errored, {counts.canceled} canceled, "
+            f"{counts.expired} expired"
         )
+        return batch.processing_status == "ended"
+
+    def batch_results(
+        self, batch_id: str
+    ) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+        """
+        Yield the results of an ended batch.
+
+        Responses are not parsed here; a response cut off by max_tokens
+        cannot be continued in the batch and fails in _parse_response.
+
+        Returns:
+            (custom ID, response text, error) tuples; exactly one of the
+            response text and the error is None
+        """
+        for entry in self.client.beta.messages.batches.results(batch_id):
+            result = entry.result
+            if result.type == "errored":
+                yield entry.custom_id, None, result.error.error.message
+                continue
+            if result.type != "succeeded":
+                # Canceled or expired before it was processed
+                yield entry.custom_id, None, f"Request {result.type}"
+                continue
+
+            AnthropicClient._record_usage(result.message.usage, "article-batch")
+            if not result.message.content or not result.message.content[0].text:
+                yield entry.custom_id, None, "Empty response from Anthropic API"
+            else:
+                yield entry.custom_id, result.message.content[0].text, None
 
-        # Ensure we have a complete response
-        content = response.content[0].text
-        if not content:
-            raise ValueError("Empty response from Anthropic API")
-
-        # Add a small delay after getting the response
-        time.sleep(0.1)
-
-        # Basic validation before parsing
-        if not all(
-            marker in content
-            for marker in [
-                "EXCERPT_START",
-                "EXCERPT_END",
-                "RELATED_ARTICLES_START",
-                "RELATED_ARTICLES_END",
-            ]
-        ):
-            raise ValueError("Response missing required markers")
-
-        # Parse the response with retries
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                (
-                    excerpt,
-                    article_content,
-                    related_articles_json,
-                ) = AnthropicClient._parse_response(content)
-                return excerpt, article_content, related_articles_json
-            except Exception as e:
-                if attempt == max_retries - 1:
-                    raise
-                time.sleep(0.2 * (attempt + 1))
+    @staticmethod
+    def _record_usage(usage, operation: str = "article") -> None:
+        LLMUsage.record(
+            "anthropic",
+            operation,
+            input_tokens=usage.input_tokens,
+            output_tokens=usage.output_tokens,
+            cache_creation_input_tokens=getattr(
+                usage, "cache_creation_input_tokens", None
+            )
+            or 0,
+            cache_read_input_tokens=getattr(usage, "cache_read_input_tokens", None)
+            or 0,
+        )
 
     @staticmethod
     def _parse_response(content: str) -> Tuple[str, str, List[Dict]]:
         """Parse the response to separate excerpt, article content, and related articles."""
+        parser = ArticleStreamParser()
         try:
-            # Debug position of markers
-            current_app.logger.debug(f"Content length: {len(content)}")
-            current_app.logger.debug(f"First 100 chars: {content[:100]}")
-            current_app.logger.debug(f"Last 100 chars: {content[-100:]}")
-
-            # Extract excerpt
-            excerpt_start = content.find("EXCERPT_START")
-            excerpt_end = content.find("EXCERPT_END")
-
-            current_app.logger.debug(
-                f"Excerpt markers: start={excerpt_start}, end={excerpt_end}"
-            )
-
-            if excerpt_start == -1 or excerpt_end == -1:
-                current_app.logger.error("Missing excerpt markers")
-                raise ValueError("Response does not contain proper excerpt markers")
-
-            excerpt = content[
-                excerpt_start + len("EXCERPT_START") : excerpt_end
-            ].strip()
-            current_app.logger.debug(f"Extracted excerpt: {excerpt[:50]}...")
-
-            # Look for related articles section
-            start_marker = "RELATED_ARTICLES_START"
-            end_marker = "RELATED_ARTICLES_END"
-
-            json_start = content.find(start_marker)
-            json_end = content.find(end_marker)
-
-            current_app.logger.debug(
-                f"JSON markers: start={json_start}, end={json_end}"
-            )
-
-            if json_start == -1:
-                current_app.logger.error("No 'RELATED_ARTICLES_START' marker found")
-                raise ValueError("Response does not contain related articles section")
-
-            if json_end == -1:
-                current_app.logger.error("No 'RELATED_ARTICLES_END' marker found")
-                raise ValueError("Response does not contain end marker")
-
-            # Extract article content
-            article_content_start = excerpt_end + len("EXCERPT_END")
-            article_content = content[article_content_start:json_start].strip()
-
-            # Debug content lengths
-            current_app.logger.debug(f"Article content length: {len(article_content)}")
-            current_app.logger.debug(
-                f"Article content starts with: {article_content[:50]}..."
-            )
-
-            # Extract and parse JSON content
-            json_content = content[json_start + len(start_marker) : json_end].strip()
-            current_app.logger.debug(f"JSON content length: {len(json_content)}")
-            current_app.logger.debug(
-                f"JSON content starts with: {json_content[:50]}..."
-            )
-
-            try:
-                data = json.loads(json_content)
-                current_app.logger.debug(
-                    f"Successfully parsed JSON with keys: {data.keys()}"
-                )
-
-                if not isinstance(data, dict) or "articles" not in data:
-                    current_app.logger.error(
-                        f"Invalid JSON structure. Data type: {type(data)}"
-                    )
-                    raise ValueError("Invalid JSON structure: missing articles array")
-
-                related_articles = data["articles"]
-                current_app.logger.debug(
-                    f"Found {len(related_articles)} related articles"
-                )
-
-                return excerpt, article_content, related_articles
-
-            except json.JSONDecodeError as e:
-                current_app.logger.error(f"JSON parsing error: {e}")
-                current_app.logger.error(f"Attempted to parse:\n{json_content}")
-                raise ValueError(f"Failed to parse JSON: {e}")
-
-        except Exception as e:
-            current_app.logger.error(f"Error parsing Anthropic response: {e}")
-            current_app.logger.error(f"Full response content:\n{content}")
+            parser.feed(content)
+            parsed = parser.finish()
+        except ValueError as e:
+            logger.error(f"Error parsing Anthropic response: {e}")
+            logger.debug(f"Full response content:\n{content}")
             raise ValueError("Failed to parse Anthropic response") from e
+        return parsed.excerpt, parsed.content, parsed.related_articles
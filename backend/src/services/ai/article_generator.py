@@ -1,13 +1,160 @@
+import threading
+import time
+from collections import Counter, defaultdict
 from difflib import SequenceMatcher
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from flask import current_app
+from sqlalchemy import Select, func, or_, select
 
-from api.articles.models import Article, ArticleLevel
+from api.articles.models import Article, ArticleLevel, ArticleStats
 from api.articles.utils import generate_slug
 from extensions import db
+from services.cache.article_cache import ArticleCache
+from services.generation.draft import GenerationDraft
+from services.rendering.markdown_renderer import MarkdownRenderer, RenderedArticle
 from .anthropic_client import AnthropicClient
+from .catalog import CatalogSnapshot, select_catalog_candidates, title_trigrams
 from .openai_client import OpenAIClient
+from .rate_limiter import ProviderRateLimiter
+
+# Columns of the catalog entries offered to the model and matched against
+CATALOG_COLUMNS = (
+    Article.id,
+    Article.title,
+    Article.taxonomy,
+    Article.category,
+    Article.level,
+    Article.tags,
+)
+
+
+class ArticleSimilarityIndex:
+    """In-memory postings over existing articles for duplicate detection.
+
+    Titles are indexed by trigram and articles by (taxonomy, category) and by
+    tag, so only the few best candidates of each kind reach SequenceMatcher.
+    Build it once per run and add() the articles created meanwhile, rather
+    than rebuilding it for every lookup; saves outside a run share the
+    process-wide index returned by shared().
+    """
+
+    CANDIDATE_LIMIT = 10
+
+    _shared: Optional[Tuple[float, "ArticleSimilarityIndex"]] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, existing_articles: List[Dict[str, Any]]):
+        # Shared with the caller: add() appends to it
+        self.articles = existing_articles
+        self.titles: Dict[str, int] = {}
+        self.trigrams: Dict[str, Set[int]] = defaultdict(set)
+        self.sections: Dict[Tuple[str, str], Set[int]] = defaultdict(set)
+        self.tags: Dict[str, Set[int]] = defaultdict(set)
+        self.ids: Set[int] = set()
+        self.max_id = 0
+        # add() may run in one thread while another looks up candidates
+        self.lock = threading.Lock()
+
+        for position, article in enumerate(existing_articles):
+            self._post(position, article)
+
+    @classmethod
+    def shared(cls, max_age: float) -> "ArticleSimilarityIndex":
+        """
+        Return the process-wide index over the catalog.
+
+        The index is built from the whole catalog once, then catches up with
+        the articles inserted since (by any process) on every call; it is
+        rebuilt once older than max_age, dropping deleted or renamed articles.
+
+        Args:
+            max_age: Seconds before the index is rebuilt
+
+        Returns:
+            The index, up to date with the committed catalog
+        """
+        now = time.monotonic()
+        with cls._shared_lock:
+            built = cls._shared
+            if built is None or now - built[0] >= max_age:
+                index = cls(ArticleGenerator.existing_articles_data())
+                cls._shared = (now, index)
+                return index
+
+            index = built[1]
+            for article in ArticleGenerator.existing_articles_data(
+                after_id=index.max_id
+            ):
+                index.add(article)
+            return index
+
+    def add(self, article: Dict[str, Any]) -> None:
+        """Append an article to the indexed catalog, unless already indexed."""
+        with self.lock:
+            if article["id"] in self.ids:
+                # A shared() catch-up indexed it after its save committed
+                return
+            self.articles.append(article)
+            self._post(len(self.articles) - 1, article)
+
+    def _post(self, position: int, article: Dict[str, Any]) -> None:
+        self.ids.add(article["id"])
+        self.max_id = max(self.max_id, article["id"])
+        self.titles.setdefault(article["title"].lower(), position)
+        for trigram in title_trigrams(article["title"]):
+            self.trigrams[trigram].add(position)
+        self.sections[(article["taxonomy"], article["category"])].add(position)
+        for tag in set(article["tags"]):
+            self.tags[tag].add(position)
+
+    def candidates(self, new_article: Dict[str, Any]) -> List[int]:
+        """
+        Return catalog positions that could match new_article.
+
+        Args:
+            new_article: Suggested article with title, taxonomy, category and tags
+
+        Returns:
+            Positions in the existing articles list, in catalog order
+        """
+        with self.lock:
+            return self._candidates(new_article)
+
+    def _candidates(self, new_article: Dict[str, Any]) -> List[int]:
+        candidates = set()
+
+        exact = self.titles.get(new_article["title"].lower())
+        if exact is not None:
+            candidates.add(exact)
+
+        shared_trigrams = Counter()
+        for trigram in title_trigrams(new_article["title"]):
+            shared_trigrams.update(self.trigrams.get(trigram, ()))
+
+        # Title similarity only counts within the same taxonomy and category
+        section = self.sections.get(
+            (new_article["taxonomy"], new_article["category"]), set()
+        )
+        candidates.update(self._most_similar(section, shared_trigrams))
+
+        # Three or more shared tags lower the title threshold in any section
+        shared_tags = Counter()
+        for tag in set(new_article["tags"]):
+            shared_tags.update(self.tags.get(tag, ()))
+        tag_matches = {
+            position for position, count in shared_tags.items() if count >= 3
+        }
+        candidates.update(self._most_similar(tag_matches, shared_trigrams))
+
+        return sorted(candidates)
+
+    def _most_similar(self, positions: Set[int], shared_trigrams: Counter) -> List[int]:
+        return sorted(
+            (position for position in positions if shared_trigrams[position]),
+            key=lambda position: shared_trigrams[position],
+            reverse=True,
+        )[: self.CANDIDATE_LIMIT]
 
 
 class ArticleMatcher:
@@ -20,10 +167,21 @@ class ArticleMatcher:
 
     @staticmethod
     def find_similar_article(
-        new_article: Dict[str, Any], existing_articles: List[Dict[str, Any]]
+        new_article: Dict[str, Any],
+        existing_articles: List[Dict[str, Any]],
+        index: Optional[ArticleSimilarityIndex] = None,
     ) -> Optional[int]:
-        """Find if a similar article exists in the database."""
-        for existing in existing_articles:
+        """
+        Find if a similar article exists in the catalog.
+
+        Pass the index of existing_articles when matching several articles,
+        so it is not rebuilt for every lookup.
+        """
+        if index is None:
+            index = ArticleSimilarityIndex(existing_articles)
+        for position in index.candidates(new_article):
+            existing = existing_articles[position]
+
             # Check exact title match
             if new_article["title"].lower() == existing["title"].lower():
                 return existing["id"]
@@ -57,6 +215,9 @@ class ArticleMatcher:
 
 
 class ArticleGenerator:
+    # Postgres advisory lock serializing saves across threads and processes
+    SAVE_LOCK_KEY = 0x41525449434C45
+
     def __init__(self):
         self.anthropic_client = AnthropicClient()
         self.openai_client = OpenAIClient()
@@ -72,37 +233,14 @@ class ArticleGenerator:
     ) -> Tuple[Article, List[Article]]:
         """Complete workflow to research and generate an article."""
         try:
-            # First, get the existing article
-            article = Article.query.filter_by(title=title).first()
-            if not article:
-                raise ValueError(f"Article with title '{title}' not found in database")
-
-            # Check if we already have research document
-            if article.research_result:
-                current_app.logger.info(
-                    f"Using existing research document for article: {title}"
-                )
-                research_document = article.research_result
-            else:
-                current_app.logger.info(
-                    f"Generating new research document for article: {title}"
-                )
-                research_prompt = OpenAIClient.generate_research_prompt(
-                    title=title,
-                    level=level,
-                    taxonomy=taxonomy,
-                    category=category,
-                    tags=tags,
-                    excerpt=excerpt,
-                )
-                research_document = self.openai_client.generate_research(
-                    research_prompt
-                )
-
-                # Save the research document immediately
-                article.research_result = research_document
-                db.session.commit()
-                current_app.logger.info(f"Saved research document for article: {title}")
+            research_document = self.research_article(
+                title=title,
+                level=level,
+                taxonomy=taxonomy,
+                category=category,
+                tags=tags,
+                excerpt=excerpt,
+            )
 
             # Generate or update the article content
             try:
@@ -131,6 +269,48 @@ class ArticleGenerator:
             current_app.logger.error(f"Error args: {e.args}")
             raise
 
+    def research_article(
+        self,
+        title: str,
+        level: str,
+        taxonomy: str,
+        category: str,
+        tags: List[str],
+        excerpt: str,
+    ) -> str:
+        """Return the article's research document, generating and saving it if missing."""
+        # First, get the existing article
+        article = Article.query.filter_by(title=title).first()
+        if not article:
+            raise ValueError(f"Article with title '{title}' not found in database")
+
+        # Check if we already have research document
+        if article.research_result:
+            current_app.logger.info(
+                f"Using existing research document for article: {title}"
+            )
+            return article.research_result
+
+        current_app.logger.info(
+            f"Generating new research document for article: {title}"
+        )
+        research_prompt = OpenAIClient.generate_research_prompt(
+            title=title,
+            level=level,
+            taxonomy=taxonomy,
+            category=category,
+            tags=tags,
+            excerpt=excerpt,
+        )
+        research_document = self.openai_client.generate_research(research_prompt)
+
+        # Save the research document immediately
+        article.research_result = research_document
+        db.session.commit()
+        current_app.logger.info(f"Saved research document for article: {title}")
+
+        return research_document
+
     def generate_article(
         self,
         title: str,
@@ -139,20 +319,146 @@ class ArticleGenerator:
         category: str,
         tags: List[str],
         research_document: str,
+        rate_limiter: Optional[ProviderRateLimiter] = None,
     ) -> Tuple[Article, List[Article]]:
-        """Generate article content and create related article records."""
-        # Get existing articles for context
-        existing_articles = Article.query.with_entities(
-            Article.id,
-            Article.title,
-            Article.taxonomy,
-            Article.category,
-            Article.level,
-            Article.tags,
-        ).all()
+        """
+        Generate article content and create related article records.
+
+        rate_limiter, if given, is acquired before every generation request.
+        """
+        catalog_section, related_candidates = ArticleGenerator.prompt_catalog(
+            title, taxonomy, category, tags
+        )
+
+        # Readers can follow the content as it streams in
+        slug = db.session.scalar(select(Article.slug).where(Article.title == title))
+        draft = GenerationDraft(slug)
+        draft.clear()
+
+        # Generate content using Anthropic
+        (
+            excerpt,
+            content,
+            related_articles_data,
+        ) = self.anthropic_client.generate_article_content(
+            title=title,
+            level=level,
+            taxonomy=taxonomy,
+            category=category,
+            tags=tags,
+            research_document=research_document,
+            catalog_section=catalog_section,
+            related_candidates=related_candidates,
+            on_excerpt=draft.set_excerpt,
+            on_content=draft.append,
+            rate_limiter=rate_limiter,
+        )
+        draft.flush()
+
+        saved = ArticleGenerator.save_generated_article(
+            title=title,
+            research_document=research_document,
+            excerpt=excerpt,
+            content=content,
+            related_articles_data=related_articles_data,
+        )
+        draft.clear()
+        return saved
+
+    @staticmethod
+    def prompt_catalog(
+        title: str,
+        taxonomy: str,
+        category: str,
+        tags: List[str],
+        existing_articles_data: Optional[List[Dict[str, Any]]] = None,
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Select the existing articles offered to the model for an article.
+
+        The category's catalog section is shared by the prompts of all its
+        articles, so the provider can cache it; the rest of the catalog
+        contributes its most related entries to the per-article part.
+
+        Args:
+            existing_articles_data: Catalog to select from, when already
+                loaded; defaults to the catalog_candidates of the article
+
+        Returns:
+            The catalog section and the related candidates
+        """
+        if existing_articles_data is None:
+            existing_articles_data = ArticleGenerator.catalog_candidates(
+                taxonomy, category, tags
+            )
+        catalog_section = CatalogSnapshot.section(
+            taxonomy,
+            category,
+            existing_articles_data,
+            limit=current_app.config["PROMPT_CATALOG_SIZE"],
+            token_budget=current_app.config["PROMPT_CATALOG_TOKEN_BUDGET"],
+            max_age=current_app.config["PROMPT_CATALOG_SNAPSHOT_TTL"],
+        )
+        section_ids = {article["id"] for article in catalog_section}
+        related_candidates = select_catalog_candidates(
+            target={
+                "title": title,
+                "taxonomy": taxonomy,
+                "category": category,
+                "tags": tags,
+            },
+            existing_articles=[
+                article
+                for article in existing_articles_data
+                if article["id"] not in section_ids
+            ],
+            limit=current_app.config["PROMPT_RELATED_SIZE"],
+            token_budget=current_app.config["PROMPT_RELATED_TOKEN_BUDGET"],
+        )
+        return catalog_section, related_candidates
+
+    @staticmethod
+    def existing_articles_data(after_id: int = 0) -> List[Dict[str, Any]]:
+        """
+        Return the catalog of existing articles used for related suggestions.
+
+        Args:
+            after_id: Only return the articles with a greater id
+        """
+        return ArticleGenerator._catalog_entries(
+            select(*CATALOG_COLUMNS).where(Article.id > after_id).order_by(Article.id)
+        )
+
+    @staticmethod
+    def catalog_candidates(
+        taxonomy: str, category: str, tags: List[str]
+    ) -> List[Dict[str, Any]]:
+        """
+        Return the catalog entries that can be offered for an article.
+
+        Only articles sharing its taxonomy, its category or a tag rank among
+        the related candidates (see select_catalog_candidates) ahead of
+        title similarity alone, so the rest of the catalog is not loaded.
+        Each condition is served by an index of the articles table.
+        """
+        return ArticleGenerator._catalog_entries(
+            select(*CATALOG_COLUMNS)
+            .where(
+                or_(
+                    Article.taxonomy == taxonomy,
+                    Article.category == category,
+                    Article.tags.overlap(tags),
+                )
+            )
+            .order_by(Article.id)
+        )
+
+    @staticmethod
+    def _catalog_entries(query: Select) -> List[Dict[str, Any]]:
+        existing_articles = db.session.execute(query).all()
 
         # Convert to dictionary and handle enum serialization
-        existing_articles_data = [
+        return [
             {
                 "id": art.id,
                 "title": art.title,
@@ -164,62 +470,148 @@ class ArticleGenerator:
             for art in existing_articles
         ]
 
-        # Generate content using Anthropic
-        (
+    @staticmethod
+    def save_generated_article(
+        title: str,
+        research_document: str,
+        excerpt: str,
+        content: str,
+        related_articles_data: List[Dict[str, Any]],
+        existing_articles_data: Optional[List[Dict[str, Any]]] = None,
+        similarity_index: Optional[ArticleSimilarityIndex] = None,
+    ) -> Tuple[Article, List[Article]]:
+        """
+        Store generated content and link or create its related articles.
+
+        Bulk callers pass one similarity_index over existing_articles_data
+        for the whole run; the articles created here are added to it. Other
+        saves match suggestions against the process-wide
+        ArticleSimilarityIndex.shared(). Creating articles marks ArticleStats
+        stale rather than refreshing it.
+        """
+        # Render outside the lock; only the database writes need serializing
+        rendered = MarkdownRenderer.render(content)
+
+        # Serialize writers, in every worker and populate-db process, so
+        # concurrent generations cannot create the same related article
+        # twice. The lock is held until the save commits or rolls back.
+        db.session.execute(
+            select(func.pg_advisory_xact_lock(ArticleGenerator.SAVE_LOCK_KEY))
+        )
+        if similarity_index is None:
+            if existing_articles_data is not None:
+                similarity_index = ArticleSimilarityIndex(existing_articles_data)
+            else:
+                # Caught up under the lock, with every committed article
+                similarity_index = ArticleSimilarityIndex.shared(
+                    current_app.config["SIMILARITY_INDEX_TTL"]
+                )
+        return ArticleGenerator._save_generated_article(
+            title,
+            research_document,
             excerpt,
             content,
+            rendered,
             related_articles_data,
-        ) = self.anthropic_client.generate_article_content(
-            title=title,
-            level=level,
-            taxonomy=taxonomy,
-            category=category,
-            tags=tags,
-            research_document=research_document,
-            existing_articles=existing_articles_data,
+            similarity_index,
         )
 
+    @staticmethod
+    def _save_generated_article(
+        title: str,
+        research_document: str,
+        excerpt: str,
+        content: str,
+        rendered: RenderedArticle,
+        related_articles_data: List[Dict[str, Any]],
+        similarity_index: ArticleSimilarityIndex,
+    ) -> Tuple[Article, List[Article]]:
+        article = Article.query.filter_by(title=title).first()
+
         # Process related articles with similarity checking
         related_articles = []
+        created_articles = []
         for article_data in related_articles_data:
+            if article_data.get("id") == article.id:
+                # The shared catalog section may list the article itself
+                continue
             if "id" in article_data:
                 # Direct reference to existing article
                 related_article = Article.query.get(article_data["id"])
             else:
                 # Check for similar existing articles
                 similar_id = ArticleMatcher.find_similar_article(
-                    article_data, existing_articles_data
+                    article_data, similarity_index.articles, similarity_index
                 )
 
-                if similar_id:
-                    related_article = Article.query.get(similar_id)
+                # None if deleted since the shared index was built
+                related_article = Article.query.get(similar_id) if similar_id else None
+                if related_article is not None:
                     current_app.logger.info(
                         f"Found similar existing article: {related_article.title}"
                     )
                 else:
-                    # Create new article
-                    related_article = Article(
-                        title=article_data["title"],
-                        slug=generate_slug(article_data["title"]),
-                        level=ArticleLevel[article_data["level"].upper()],
-                        taxonomy=article_data["taxonomy"],
-                        category=article_data["category"],
-                        tags=article_data["tags"],
-                        is_generated=False,
-                        excerpt=article_data["excerpt"],
-                    )
-                    db.session.add(related_article)
+                    # Another generation may have created it after the snapshot
+                    slug = generate_slug(article_data["title"])
+                    related_article = Article.query.filter_by(slug=slug).first()
+
+                    if related_article is None:
+                        # Create new article
+                        related_article = Article(
+                            title=article_data["title"],
+                            slug=slug,
+                            level=ArticleLevel[article_data["level"].upper()],
+                            taxonomy=article_data["taxonomy"],
+                            category=article_data["category"],
+                            tags=article_data["tags"],
+                            is_generated=False,
+                            excerpt=article_data["excerpt"],
+                        )
+                        db.session.add(related_article)
+                        created_articles.append(related_article)
 
             related_articles.append(related_article)
 
+        # Former targets lose a linkback, which their relevance counts
+        unlinked = {related.id for related in article.related_articles} - {
+            related.id for related in related_articles
+        }
+
         # Update the existing article
-        article = Article.query.filter_by(title=title).first()
         article.content = content
+        article.content_html = rendered.html
+        article.toc = rendered.toc
         article.excerpt = excerpt
         article.research_result = research_document
         article.is_generated = True
         article.related_articles = related_articles
 
         db.session.commit()
+        Article.record_unlinked(unlinked)
+
+        # Only once committed, so a failed save leaves no phantom entries
+        for created in created_articles:
+            similarity_index.add(
+                {
+                    "id": created.id,
+                    "title": created.title,
+                    "taxonomy": created.taxonomy,
+                    "category": created.category,
+                    "level": created.level.value,
+                    "tags": created.tags,
+                }
+            )
+
+        if created_articles:
+            ArticleStats.mark_stale()
+
+        cache = ArticleCache()
+        # Pages linking to the article show its card, which changed too
+        cache.invalidate_articles(
+            [article.slug]
+            + [related.slug for related in related_articles]
+            + [referrer.slug for referrer in article.referenced_by]
+        )
+        cache.invalidate_listings()
 
         return article, related_articles
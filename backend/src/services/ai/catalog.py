@@ -0,0 +1,155 @@
+import heapq
+import json
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+# Short keys used when the catalog is embedded in a prompt
+CATALOG_KEYS = {
+    "id": "i",
+    "title": "t",
+    "taxonomy": "x",
+    "category": "c",
+    "level": "l",
+    "tags": "g",
+}
+
+
+def title_trigrams(title: str) -> Set[str]:
+    """Character trigrams of a lowercased, space-padded title."""
+    padded = f"  {title.lower()} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of text (about four characters per token)."""
+    return len(text) // 4
+
+
+def serialize_catalog_entry(article: Dict[str, Any]) -> str:
+    """Serialize one catalog entry as compact JSON with short keys."""
+    return json.dumps(
+        {short: article[key] for key, short in CATALOG_KEYS.items()},
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+
+
+def serialize_catalog(articles: List[Dict[str, Any]]) -> str:
+    """Serialize catalog entries as a compact JSON array, one entry per line."""
+    return "[\n" + ",\n".join(serialize_catalog_entry(art) for art in articles) + "\n]"
+
+
+def select_catalog_candidates(
+    target: Dict[str, Any],
+    existing_articles: List[Dict[str, Any]],
+    limit: int,
+    token_budget: int,
+) -> List[Dict[str, Any]]:
+    """
+    Pick the existing articles most related to target for the generation prompt.
+
+    Articles are ranked by shared category, taxonomy and tags, with title
+    trigram similarity breaking ties and ranking articles that share none.
+
+    Args:
+        target: Article being generated (title, taxonomy, category, tags)
+        existing_articles: Catalog entries as built by ArticleGenerator
+        limit: Maximum number of entries to return
+        token_budget: Maximum estimated tokens of the serialized entries
+
+    Returns:
+        Catalog entries, most related first
+    """
+    target_title = target["title"].lower()
+    target_trigrams = title_trigrams(target["title"])
+    target_tags = set(target["tags"])
+
+    def rank(article: Dict[str, Any]):
+        structural = (
+            3 * (article["category"] == target["category"])
+            + 2 * (article["taxonomy"] == target["taxonomy"])
+            + len(target_tags & set(article["tags"]))
+        )
+        trigrams = title_trigrams(article["title"])
+        lexical = len(target_trigrams & trigrams) / len(target_trigrams | trigrams)
+        return structural, lexical
+
+    ranked = heapq.nlargest(
+        limit,
+        (art for art in existing_articles if art["title"].lower() != target_title),
+        key=rank,
+    )
+
+    return within_token_budget(ranked, token_budget)
+
+
+def within_token_budget(
+    articles: Iterable[Dict[str, Any]], token_budget: int
+) -> List[Dict[str, Any]]:
+    """Return the leading catalog entries whose serialization fits token_budget."""
+    selected = []
+    used_tokens = 0
+    for article in articles:
+        tokens = estimate_tokens(serialize_catalog_entry(article))
+        if used_tokens + tokens > token_budget:
+            break
+        selected.append(article)
+        used_tokens += tokens
+    return selected
+
+
+class CatalogSnapshot:
+    """Per-category sections of the catalog, frozen for a while.
+
+    A section is embedded in the cacheable prefix of generation prompts, so
+    it must stay byte-identical across the articles of its taxonomy and
+    category: it lists the category's entries, then the rest of the
+    taxonomy's, each in id order, and is only rebuilt once it is older than
+    max_age. Articles created since are offered to the model through the
+    per-article candidates instead, and duplicates are still caught when
+    suggestions are saved.
+    """
+
+    _sections: Dict[Tuple[str, str], Tuple[float, List[Dict[str, Any]]]] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def section(
+        cls,
+        taxonomy: str,
+        category: str,
+        existing_articles: List[Dict[str, Any]],
+        limit: int,
+        token_budget: int,
+        max_age: float,
+    ) -> List[Dict[str, Any]]:
+        """
+        Return the catalog section of a taxonomy's category.
+
+        Args:
+            taxonomy: Taxonomy of the article being generated
+            category: Category of the article being generated
+            existing_articles: Catalog entries as built by ArticleGenerator,
+                including every entry of the taxonomy
+            limit: Maximum number of entries in the section
+            token_budget: Maximum estimated tokens of the serialized entries
+            max_age: Seconds before the section is rebuilt
+
+        Returns:
+            Catalog entries of the category, then of the rest of the
+            taxonomy, each in id order
+        """
+        now = time.monotonic()
+        with cls._lock:
+            built = cls._sections.get((taxonomy, category))
+            if built is not None and now - built[0] < max_age:
+                return built[1]
+
+            entries = sorted(
+                (art for art in existing_articles if art["taxonomy"] == taxonomy),
+                key=lambda art: (art["category"] != category, art["id"]),
+            )
+            section = within_token_budget(entries[:limit], token_budget)
+            cls._sections[(taxonomy, category)] = (now, section)
+            return section
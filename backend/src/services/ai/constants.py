@@ -46,23 +46,11 @@ The research will be used to write an article that helps developers prepare for
 Please provide comprehensive research that will allow us to write an informative article.
 """
 
-ARTICLE_GENERATION_PROMPT = """You are writing a technical article for a programming interview preparation website.
-
-Context:
-- Title: {title}
-- Target Audience: {level_description}
-- Topic Area: {taxonomy}
-- Category: {category}
-- Tags: {tags}
-- Word Limit For Article: {word_limit} words
-- Word Limit For Excerpt: 80 words
-- Character Limit For Related Articles: 4000 characters
-
-Existing Articles in our database:
-{existing_articles}
-
-Research Document:
-{research_document}
+# The generation prompt is split so that its start is identical across
+# requests and can be cached by the provider: the fixed instructions (system
+# prompt), then a catalog section shared by every article of a category, then
+# the per-article request.
+ARTICLE_SYSTEM_PROMPT = """You are writing technical articles for a programming interview preparation website. Each request gives the context and research document of one article, along with existing articles in our database.
 
 Requirements:
 For the article
@@ -81,7 +69,7 @@ For excerpt
 For related articles:
 1. Suggest 5 related articles based on the content.  These suggestions should contain the following metadata: title, taxonomy, category, level, tags, and excerpt.
 2. The word limit for the related article excerpt is 50 words.  The total character limit for all related articles is 4000 characters.
-2. CAREFULLY review the existing articles list provided above
+2. CAREFULLY review the existing articles lists provided in the request
 3. If you suggest an article that's very similar to an existing one (similar title, same category, or overlapping tags), use the existing article's ID
 4. Avoid suggesting articles that would duplicate existing content
 5. Each suggestion should be clearly distinct from existing articles
@@ -100,17 +88,17 @@ EXCERPT_END
 Article content...
 
 RELATED_ARTICLES_START
-{{
+{
     "articles": [
-        {{
+        {
             "title": "New Article Title",
             "taxonomy": "Example Taxonomy",
             "category": "Example Category",
             "level": "basic",
             "tags": ["tag1", "tag2"],
             "excerpt": "A brief (maximum 50-word) description..."
-        }},
-        {{
+        },
+        {
             "id": 123,  // For existing articles, just include the id
             "title": "Existing Article Title",
             "taxonomy": "Example Taxonomy",
@@ -118,9 +106,29 @@ RELATED_ARTICLES_START
             "level": "basic",
             "tags": ["tag1", "tag2"],
             "excerpt": "A brief description..."
-        }}
+        }
     ]
-}}
+}
 RELATED_ARTICLES_END
+"""
+
+ARTICLE_CATALOG_PROMPT = """Existing Articles in our database (keys: i=id, t=title, x=taxonomy, c=category, l=level, g=tags):
+{existing_articles}"""
+
+ARTICLE_REQUEST_PROMPT = """More existing articles, most related first (same keys):
+{related_articles}
+
+Context:
+- Title: {title}
+- Target Audience: {level_description}
+- Topic Area: {taxonomy}
+- Category: {category}
+- Tags: {tags}
+- Word Limit For Article: {word_limit} words
+- Word Limit For Excerpt: 80 words
+- Character Limit For Related Articles: 4000 characters
+
+Research Document:
+{research_document}
 
 Begin your response now:"""
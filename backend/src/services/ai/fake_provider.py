@@ -0,0 +1,373 @@
+import hashlib
+import itertools
+import json
+import re
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from openai.types.chat import ChatCompletion
+
+from .catalog import estimate_tokens
+
+
+class FakeAnthropic:
+    """Local stand-in for the Anthropic client (ANTHROPIC_PROVIDER=fake).
+
+    Serves messages and beta.prompt_caching.messages (create and stream)
+    without network access, so generation can be run end to end locally:
+
+    - Responses are deterministic articles in the format the generation
+      prompt asks for, suggesting two articles of the request's catalog
+      and three new ones.
+    - max_tokens cuts responses off with stop_reason "max_tokens", and a
+      final assistant message is continued, as the API does.
+    - The prompt cache is emulated: prefixes ending at a cache_control
+      breakpoint are cached for CACHE_TTL seconds, and usage reports cache
+      writes and reads like the API.
+    - beta.messages.batches serves Message Batches, which have ended by
+      the time they are created.
+    """
+
+    CACHE_TTL = 300
+    # Shorter prefixes are not cached, as for Sonnet models
+    MIN_CACHEABLE_TOKENS = 1024
+    STREAM_CHUNK_CHARS = 40
+
+    # Shared by every instance, like the provider's cache
+    _prompt_cache: Dict[str, float] = {}
+    _prompt_cache_lock = threading.Lock()
+
+    def __init__(self):
+        self.messages = FakeMessages(self)
+        self.beta = SimpleNamespace(
+            prompt_caching=SimpleNamespace(messages=self.messages),
+            messages=SimpleNamespace(batches=FakeMessageBatches(self)),
+        )
+
+    def complete(self, request: Dict[str, Any]) -> Tuple[str, str, SimpleNamespace]:
+        """Return the text, stop reason and usage of a request."""
+        messages = request["messages"]
+        prefill = ""
+        if messages[-1]["role"] == "assistant":
+            prefill = messages[-1]["content"]
+
+        text = FakeAnthropic.article(FakeAnthropic._text(messages[0]["content"]))
+        if prefill and text.startswith(prefill):
+            text = text[len(prefill) :]
+
+        stop_reason = "end_turn"
+        max_chars = request["max_tokens"] * 4
+        if len(text) > max_chars:
+            text = text[:max_chars]
+            stop_reason = "max_tokens"
+
+        usage = self._usage(request)
+        usage.output_tokens = estimate_tokens(text)
+        return text, stop_reason, usage
+
+    @staticmethod
+    def article(prompt: str) -> str:
+        """Return the complete response to a generation prompt."""
+
+        title = _field(prompt, "Title", "Untitled")
+        taxonomy = _field(prompt, "Topic Area", "General")
+        category = _field(prompt, "Category", "General")
+        tags = [tag.strip() for tag in _field(prompt, "Tags").split(",") if tag.strip()]
+        word_limit = int(_field(prompt, "Word Limit For Article", "250").split()[0])
+
+        paragraph = (
+            f"{title} comes up in interviews about {category.lower()}. "
+            "Explain the trade-offs, walk through an example and name the "
+            "failure modes an interviewer is likely to probe."
+        )
+        sections = []
+        while sum(len(section.split()) for section in sections) < word_limit:
+            number = len(sections) + 1
+            sections.append(f"## Part {number}\n\n{paragraph}")
+        sections.insert(1, f"```python\ndef example():\n    return {title!r}\n```")
+
+        existing_ids = [int(i) for i in re.findall(r'"i":(\d+)', prompt)][:2]
+        suggestions: List[Dict[str, Any]] = [{"id": i} for i in existing_ids]
+        for suffix, level in (
+            ("Fundamentals", "basic"),
+            ("in Practice", "intermediate"),
+            ("at Scale", "advanced"),
+        ):
+            suggestions.append(
+                {
+                    "title": f"{title} {suffix}",
+                    "taxonomy": taxonomy,
+                    "category": category,
+                    "level": level,
+                    "tags": tags[:3],
+                    "excerpt": f"{title} {suffix.lower()} for {level} interviews.",
+                }
+            )
+
+        return (
+            "EXCERPT_START\n"
+            f"A {word_limit}-word overview of {title} for interview preparation.\n"
+            "EXCERPT_END\n\n"
+            f"# {title}\n\n" + "\n\n".join(sections) + "\n\n"
+            "RELATED_ARTICLES_START\n"
+            + json.dumps({"articles": suggestions}, indent=2)
+            + "\nRELATED_ARTICLES_END"
+        )
+
+    def _usage(self, request: Dict[str, Any]) -> SimpleNamespace:
+        # Cumulative prefix hash and tokens at each cache_control breakpoint
+        blocks = FakeAnthropic._blocks(request.get("system")) + [
+            block
+            for message in request["messages"]
+            for block in FakeAnthropic._blocks(message["content"])
+        ]
+        prefix = hashlib.sha256(request["model"].encode())
+        tokens = 0
+        breakpoints = []
+        for block in blocks:
+            prefix.update(block["text"].encode())
+            tokens += estimate_tokens(block["text"])
+            if block.get("cache_control") and tokens >= self.MIN_CACHEABLE_TOKENS:
+                breakpoints.append((prefix.hexdigest(), tokens))
+
+        # The longest cached prefix is read, the rest up to the last
+        # breakpoint written; every breakpoint's entry is refreshed
+        now = time.monotonic()
+        read = 0
+        with self._prompt_cache_lock:
+            for key, prefix_tokens in breakpoints:
+                cached_at = self._prompt_cache.get(key)
+                if cached_at is not None and now - cached_at < self.CACHE_TTL:
+                    read = prefix_tokens
+                self._prompt_cache[key] = now
+
+        written = breakpoints[-1][1] - read if breakpoints else 0
+        return SimpleNamespace(
+            input_tokens=tokens - read - written,
+            cache_creation_input_tokens=written,
+            cache_read_input_tokens=read,
+            output_tokens=0,
+        )
+
+    @staticmethod
+    def _blocks(content: Any) -> List[Dict[str, Any]]:
+        if content is None:
+            return []
+        if isinstance(content, str):
+            return [{"type": "text", "text": content}]
+        return [block for block in content if block.get("type") == "text"]
+
+    @staticmethod
+    def _text(content: Any) -> str:
+        return "\n\n".join(block["text"] for block in FakeAnthropic._blocks(content))
+
+
+def _field(prompt: str, name: str, default: str = "") -> str:
+    """Return a "- Name: value" context field of a prompt."""
+    match = re.search(rf"^- {name}: (.*)$", prompt, re.MULTILINE)
+    return match.group(1).strip() if match else default
+
+
+class FakeMessages:
+    def __init__(self, provider: FakeAnthropic):
+        self.provider = provider
+
+    def create(self, **request) -> SimpleNamespace:
+        text, stop_reason, usage = self.provider.complete(request)
+        return _message(text, stop_reason, usage)
+
+    def stream(self, **request) -> "FakeMessageStream":
+        return FakeMessageStream(*self.provider.complete(request))
+
+
+def _message(text: str, stop_reason: str, usage: SimpleNamespace) -> SimpleNamespace:
+    return SimpleNamespace(
+        content=[SimpleNamespace(type="text", text=text)],
+        stop_reason=stop_reason,
+        usage=usage,
+    )
+
+
+class FakeMessageStream:
+    def __init__(self, text: str, stop_reason: str, usage: SimpleNamespace):
+        self.text = text
+        self.stop_reason = stop_reason
+        self.usage = usage
+
+    def __enter__(self) -> "FakeMessageStream":
+        return self
+
+    def __exit__(self, *exc_info) -> Optional[bool]:
+        return None
+
+    @property
+    def text_stream(self) -> Iterator[str]:
+        size = FakeAnthropic.STREAM_CHUNK_CHARS
+        for start in range(0, len(self.text), size):
+            yield self.text[start : start + size]
+
+    def get_final_message(self) -> SimpleNamespace:
+        return _message(self.text, self.stop_reason, self.usage)
+
+
+class FakeMessageBatches:
+    # Batches by ID, shared by every instance like the provider's storage
+    _batches: Dict[str, List[SimpleNamespace]] = {}
+    _ids = itertools.count(1)
+
+    def __init__(self, provider: FakeAnthropic):
+        self.provider = provider
+
+    def create(self, requests: List[Dict[str, Any]], **options) -> SimpleNamespace:
+        results = []
+        for request in requests:
+            message = _message(*self.provider.complete(request["params"]))
+            results.append(
+                SimpleNamespace(
+                    custom_id=request["custom_id"],
+                    result=SimpleNamespace(type="succeeded", message=message),
+                )
+            )
+        batch_id = f"msgbatch_fake_{next(self._ids)}"
+        self._batches[batch_id] = results
+        return self.retrieve(batch_id)
+
+    def retrieve(self, batch_id: str, **options) -> SimpleNamespace:
+        # Batches of another process are gone, as if their results expired
+        results = self._batches.get(batch_id, [])
+        return SimpleNamespace(
+            id=batch_id,
+            processing_status="ended",
+            request_counts=SimpleNamespace(
+                processing=0,
+                succeeded=len(results),
+                errored=0,
+                canceled=0,
+                expired=0,
+            ),
+        )
+
+    def results(self, batch_id: str, **options) -> Iterator[SimpleNamespace]:
+        return iter(self._batches.get(batch_id, []))
+
+
+class FakeOpenAI:
+    """Local stand-in for the OpenAI client (OPENAI_PROVIDER=fake).
+
+    Serves chat completions with deterministic research documents, and the
+    Batch API: batch input files are completed when the batch is created,
+    and their results are served as an output file.
+    """
+
+    # Files and batches by ID, shared by every instance
+    _files: Dict[str, str] = {}
+    _batches: Dict[str, SimpleNamespace] = {}
+    _ids = itertools.count(1)
+
+    def __init__(self):
+        self.chat = SimpleNamespace(
+            completions=SimpleNamespace(
+                create=lambda **request: ChatCompletion.model_validate(
+                    FakeOpenAI.completion(request)
+                )
+            )
+        )
+        self.files = SimpleNamespace(create=self._create_file, content=self._content)
+        self.batches = SimpleNamespace(
+            create=self._create_batch, retrieve=self._retrieve_batch
+        )
+
+    @staticmethod
+    def completion(request: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the chat completion of a research request, as JSON."""
+        prompt = request["messages"][-1]["content"]
+        title = _field(prompt, "Title", "Untitled")
+        research_document = f"# Research: {title}\n\n" + "\n\n".join(
+            f"## {section}\n\n{title}: {section.lower()} for "
+            f"{_field(prompt, 'Category', 'General')} interviews."
+            for section in (
+                "Core concepts",
+                "Technical details",
+                "Common misconceptions",
+                "Interview question patterns",
+                "Best practices",
+            )
+        )
+        prompt_tokens = sum(
+            estimate_tokens(message["content"]) for message in request["messages"]
+        )
+        completion_tokens = estimate_tokens(research_document)
+        return {
+            "id": f"chatcmpl-fake-{next(FakeOpenAI._ids)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request["model"],
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": research_document},
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def _create_file(self, file: Tuple[str, bytes], purpose: str) -> SimpleNamespace:
+        file_id = f"file-fake-{next(self._ids)}"
+        self._files[file_id] = file[1].decode()
+        return SimpleNamespace(id=file_id, purpose=purpose)
+
+    def _content(self, file_id: str) -> SimpleNamespace:
+        return SimpleNamespace(text=self._files[file_id])
+
+    def _create_batch(
+        self, input_file_id: str, endpoint: str, completion_window: str, **options
+    ) -> SimpleNamespace:
+        lines = []
+        for line in self._files[input_file_id].splitlines():
+            request = json.loads(line)
+            lines.append(
+                json.dumps(
+                    {
+                        "id": f"batch_req_fake_{next(self._ids)}",
+                        "custom_id": request["custom_id"],
+                        "response": {
+                            "status_code": 200,
+                            "body": FakeOpenAI.completion(request["body"]),
+                        },
+                        "error": None,
+                    }
+                )
+            )
+        output_file_id = self._create_file(
+            ("output.jsonl", "\n".join(lines).encode()), "batch_output"
+        ).id
+        batch_id = f"batch_fake_{next(self._ids)}"
+        self._batches[batch_id] = SimpleNamespace(
+            id=batch_id,
+            status="completed",
+            output_file_id=output_file_id,
+            error_file_id=None,
+            errors=None,
+            request_counts=SimpleNamespace(
+                total=len(lines), completed=len(lines), failed=0
+            ),
+        )
+        return self._batches[batch_id]
+
+    def _retrieve_batch(self, batch_id: str, **options) -> SimpleNamespace:
+        # Batches of another process are gone, as if they expired
+        return self._batches.get(batch_id) or SimpleNamespace(
+            id=batch_id,
+            status="expired",
+            output_file_id=None,
+            error_file_id=None,
+            errors=None,
+            request_counts=None,
+        )
@@ -1,18 +1,29 @@
-from typing import List
+import json
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-import openai
 from flask import current_app
+from openai.types.chat import ChatCompletion
 
 from .constants import (
     RESEARCH_WORD_LIMITS,
     LEVEL_DESCRIPTIONS,
     RESEARCH_PROMPT_TEMPLATE,
 )
+from .response_cache import LLMResponseCache
+from .sdk_clients import SDKClients
+from .usage import LLMUsage
+
+logger = logging.getLogger(__name__)
+
+# Batch statuses after which a batch no longer changes
+BATCH_FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
 
 
 class OpenAIClient:
     def __init__(self):
-        self.client = openai.OpenAI(api_key=current_app.config["OPENAI_API_KEY"])
+        self.client = SDKClients.openai()
+        self.response_cache = LLMResponseCache.from_config()
 
     @staticmethod
     def generate_research_prompt(
@@ -35,22 +46,136 @@ class OpenAIClient:
             excerpt=excerpt,
         )
 
+    @staticmethod
+    def research_request(prompt: str) -> Dict[str, Any]:
+        """Build the chat completion request of a research prompt."""
+        return {
+            "model": "o1-preview",
+            "messages": [
+                {
+                    "role": "assistant",
+                    "content": "You are a technical writer researching content for programming interview preparation articles.",
+                },
+                {"role": "user", "content": prompt},
+            ],
+        }
+
     def generate_research(self, prompt: str) -> str:
         """Generate research document using OpenAI API."""
+        request = OpenAIClient.research_request(prompt)
+        if self.response_cache:
+            cached = self.response_cache.get(request)
+            if cached is not None:
+                return cached
+
         try:
-            response = self.client.chat.completions.create(
-                model="o1-preview",
-                messages=[
-                    {
-                        "role": "assistant",
-                        "content": "You are a technical writer researching content for programming interview preparation articles.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-            )
+            response = self.client.chat.completions.create(**request)
+            research_document = response.choices[0].message.content
+            OpenAIClient._record_usage(response.usage)
 
-            return response.choices[0].message.content
+            if self.response_cache and research_document:
+                self.response_cache.set(request, research_document)
+            return research_document
 
         except Exception as e:
             current_app.logger.error(f"Error generating research with OpenAI: {e}")
             raise ValueError("Failed to generate research document") from e
+
+    def submit_batch(self, requests: Dict[str, Dict[str, Any]]) -> str:
+        """
+        Submit research requests as a batch job, at half the interactive price.
+
+        Args:
+            requests: Chat completion requests by custom ID
+
+        Returns:
+            The batch ID
+        """
+        lines = [
+            json.dumps(
+                {
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": request,
+                }
+            )
+            for custom_id, request in requests.items()
+        ]
+        input_file = self.client.files.create(
+            file=("research.jsonl", "\n".join(lines).encode()), purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        return batch.id
+
+    def batch_ended(self, batch_id: str) -> bool:
+        """Return whether the batch has ended, logging its progress."""
+        batch = self.client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        if counts:
+            logger.info(
+                f"OpenAI batch {batch_id} {batch.status}: {counts.completed} "
+                f"completed, {counts.failed} failed of {counts.total}"
+            )
+        else:
+            logger.info(f"OpenAI batch {batch_id} {batch.status}")
+        return batch.status in BATCH_FINAL_STATUSES
+
+    def batch_results(
+        self, batch_id: str
+    ) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+        """
+        Yield the results of an ended batch.
+
+        Requests without a result (e.g. when the batch expired) are not
+        yielded.
+
+        Returns:
+            (custom ID, research document, error) tuples; exactly one of the
+            research document and the error is None
+        """
+        batch = self.client.batches.retrieve(batch_id)
+        if batch.errors and batch.errors.data:
+            logger.error(
+                f"OpenAI batch {batch_id} {batch.status}: "
+                + "; ".join(error.message or error.code for error in batch.errors.data)
+            )
+
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                result = json.loads(line)
+                response = result.get("response") or {}
+                if result.get("error") or response.get("status_code") != 200:
+                    error = result.get("error") or response.get("body", {}).get("error")
+                    yield result["custom_id"], None, str(error)
+                    continue
+
+                completion = ChatCompletion.model_validate(response["body"])
+                OpenAIClient._record_usage(completion.usage, "research-batch")
+                research_document = completion.choices[0].message.content
+                if research_document:
+                    yield result["custom_id"], research_document, None
+                else:
+                    yield result["custom_id"], None, "Empty research document"
+
+    @staticmethod
+    def _record_usage(usage, operation: str = "research") -> None:
+        # OpenAI caches long prompt prefixes automatically; cached tokens
+        # are part of prompt_tokens
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = (getattr(details, "cached_tokens", None) or 0) if details else 0
+        LLMUsage.record(
+            "openai",
+            operation,
+            input_tokens=usage.prompt_tokens - cached,
+            output_tokens=usage.completion_tokens,
+            cache_read_input_tokens=cached,
+        )
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+
+class LLMResponseCache:
+    """Content-addressed on-disk cache of LLM completions.
+
+    Entries are keyed by a hash of the full request (model, parameters and
+    messages), so only byte-identical requests share a response. When the
+    directory grows past max_bytes, the least recently used entries are
+    evicted down to 90% of the limit.
+    """
+
+    _instances: Dict[str, "LLMResponseCache"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.total_bytes: Optional[int] = None
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> Optional["LLMResponseCache"]:
+        """Return the process-wide cache for the app config, or None if disabled."""
+        if not current_app.config["LLM_CACHE_ENABLED"]:
+            return None
+        directory = current_app.config["LLM_CACHE_DIR"]
+        with cls._instances_lock:
+            if directory not in cls._instances:
+                cls._instances[directory] = cls(
+                    directory, current_app.config["LLM_CACHE_MAX_BYTES"]
+                )
+            return cls._instances[directory]
+
+    @staticmethod
+    def key(request: Dict[str, Any]) -> str:
+        """Hash a provider request into its cache key."""
+        canonical = json.dumps(request, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def get(self, request: Dict[str, Any]) -> Optional[str]:
+        """Return the cached completion for request, if any."""
+        path = self._path(LLMResponseCache.key(request))
+        try:
+            with open(path, encoding="utf-8") as f:
+                completion = json.load(f)["completion"]
+            # Refresh the entry's recency for LRU eviction
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            with self.lock:
+                self.misses += 1
+            return None
+
+        with self.lock:
+            self.hits += 1
+        return completion
+
+    def set(self, request: Dict[str, Any], completion: str) -> None:
+        """Store the completion for request."""
+        path = self._path(LLMResponseCache.key(request))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps({"request": request, "completion": completion}).encode()
+
+        # Write atomically so concurrent readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+
+        # Replaced under the lock, so the size of an overwritten entry is
+        # subtracted exactly once
+        with self.lock:
+            try:
+                replaced_bytes = os.stat(path).st_size
+            except OSError:
+                replaced_bytes = 0
+            os.replace(tmp_path, path)
+
+            if self.total_bytes is None:
+                self.total_bytes = self._scan_size()
+            else:
+                self.total_bytes += len(data) - replaced_bytes
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for this process and on-disk usage."""
+        entries = self._entries()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+        }
+
+    def clear(self) -> int:
+        """Delete every entry and return how many were removed."""
+        entries = self._entries()
+        for path, _, _ in entries:
+            os.remove(path)
+        with self.lock:
+            self.total_bytes = 0
+        return len(entries)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _entries(self):
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".json"):
+                    stat = os.stat(os.path.join(root, name))
+                    entries.append(
+                        (os.path.join(root, name), stat.st_size, stat.st_mtime)
+                    )
+        return entries
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self) -> None:
+        target = int(self.max_bytes * 0.9)
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        self.total_bytes = total
+        logger.info(f"Evicted LLM cache entries down to {total} bytes")
@@ -0,0 +1,197 @@
+import json
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+EXCERPT_START = "EXCERPT_START"
+EXCERPT_END = "EXCERPT_END"
+RELATED_ARTICLES_START = "RELATED_ARTICLES_START"
+RELATED_ARTICLES_END = "RELATED_ARTICLES_END"
+
+
+class TruncatedResponse(ValueError):
+    """The response ended before the related articles section was closed."""
+
+    def __init__(self, section: str):
+        super().__init__(f"Response ended inside the {section} section")
+        self.section = section
+
+
+@dataclass
+class ParsedArticle:
+    excerpt: str
+    content: str
+    related_articles: List[Dict]
+
+
+class ArticleStreamParser:
+    """Incremental parser of article generation responses (ARTICLE_SYSTEM_PROMPT).
+
+    Text is fed as it arrives and scanned once; markers split across chunks
+    are found by holding back a marker's length of text. The excerpt is
+    reported as soon as EXCERPT_END arrives and article content as it
+    streams; whitespace is held back until it is known not to be trailing,
+    so the reported chunks add up to the final, stripped content.
+    """
+
+    PREAMBLE, EXCERPT, CONTENT, RELATED, DONE = (
+        "preamble",
+        "excerpt",
+        "content",
+        "related articles",
+        "done",
+    )
+
+    # Section each marker closes, and the section that follows it
+    TRANSITIONS = {
+        PREAMBLE: (EXCERPT_START, EXCERPT),
+        EXCERPT: (EXCERPT_END, CONTENT),
+        CONTENT: (RELATED_ARTICLES_START, RELATED),
+        RELATED: (RELATED_ARTICLES_END, DONE),
+    }
+
+    # A response that has not started its excerpt by now ignored the format
+    PREAMBLE_LIMIT = 1000
+
+    def __init__(
+        self,
+        on_excerpt: Optional[Callable[[str], None]] = None,
+        on_content: Optional[Callable[[str], None]] = None,
+    ):
+        self.on_excerpt = on_excerpt
+        self.on_content = on_content
+        self.section = self.PREAMBLE
+        self.text: List[str] = []
+        self.pending = ""
+        self.preamble_length = 0
+        self.excerpt: Optional[str] = None
+        self.excerpt_parts: List[str] = []
+        self.content_parts: List[str] = []
+        self.content_whitespace = ""
+        self.related_parts: List[str] = []
+        self.related_articles: Optional[List[Dict]] = None
+
+    @property
+    def received(self) -> str:
+        """Return all text fed so far."""
+        return "".join(self.text)
+
+    def feed(self, text: str) -> None:
+        """
+        Consume the next chunk of the response.
+
+        Raises:
+            ValueError: The response does not follow the expected format
+        """
+        self.text.append(text)
+        if self.section == self.DONE:
+            return
+
+        self.pending += text
+        while self.section != self.DONE:
+            marker, next_section = self.TRANSITIONS[self.section]
+            position = self.pending.find(marker)
+            if position == -1:
+                # Keep what could be the start of a split marker
+                keep = len(marker) - 1
+                if len(self.pending) > keep:
+                    self._consume(self.pending[:-keep])
+                    self.pending = self.pending[-keep:]
+                return
+
+            self._consume(self.pending[:position])
+            self.pending = self.pending[position + len(marker) :]
+            self._close_section()
+            self.section = next_section
+
+    def rstrip(self) -> str:
+        """
+        Drop the response's trailing whitespace, before it is continued.
+
+        The whitespace has not been reported yet: parsing holds it back.
+
+        Returns:
+            The response so far without trailing whitespace
+        """
+        received = self.received.rstrip()
+        self.text = [received]
+        self.pending = self.pending.rstrip()
+        if not self.pending:
+            self.content_whitespace = ""
+            parts = {self.EXCERPT: self.excerpt_parts, self.RELATED: self.related_parts}
+            section_parts = parts.get(self.section, [])
+            while section_parts and not section_parts[-1].strip():
+                section_parts.pop()
+            if section_parts:
+                section_parts[-1] = section_parts[-1].rstrip()
+        return received
+
+    def finish(self) -> ParsedArticle:
+        """
+        Return the parsed response once all of it has been fed.
+
+        A related articles section that is complete JSON but lacks its end
+        marker is accepted.
+
+        Raises:
+            TruncatedResponse: The response stopped before its end
+            ValueError: The related articles JSON is invalid
+        """
+        if self.section == self.RELATED:
+            try:
+                self.related_articles = self._related_articles(
+                    "".join(self.related_parts) + self.pending
+                )
+            except ValueError:
+                raise TruncatedResponse(self.section)
+            self.section = self.DONE
+
+        if self.section != self.DONE:
+            raise TruncatedResponse(self.section)
+        return ParsedArticle(
+            excerpt=self.excerpt,
+            content="".join(self.content_parts),
+            related_articles=self.related_articles,
+        )
+
+    def _consume(self, text: str) -> None:
+        if self.section == self.PREAMBLE:
+            self.preamble_length += len(text)
+            if self.preamble_length > self.PREAMBLE_LIMIT:
+                raise ValueError("Response does not start with an excerpt")
+        elif self.section == self.EXCERPT:
+            self.excerpt_parts.append(text)
+        elif self.section == self.CONTENT:
+            self._consume_content(text)
+        else:
+            self.related_parts.append(text)
+
+    def _consume_content(self, text: str) -> None:
+        # Hold back trailing whitespace until more content follows it
+        text = self.content_whitespace + text
+        if not self.content_parts:
+            text = text.lstrip()
+        chunk = text.rstrip()
+        self.content_whitespace = text[len(chunk) :]
+        if chunk:
+            self.content_parts.append(chunk)
+            if self.on_content:
+                self.on_content(chunk)
+
+    def _close_section(self) -> None:
+        if self.section == self.EXCERPT:
+            self.excerpt = "".join(self.excerpt_parts).strip()
+            if self.on_excerpt:
+                self.on_excerpt(self.excerpt)
+        elif self.section == self.RELATED:
+            self.related_articles = self._related_articles("".join(self.related_parts))
+
+    @staticmethod
+    def _related_articles(json_content: str) -> List[Dict]:
+        try:
+            data = json.loads(json_content.strip())
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Failed to parse JSON: {e}") from e
+
+        if not isinstance(data, dict) or "articles" not in data:
+            raise ValueError("Invalid JSON structure: missing articles array")
+        return data["articles"]
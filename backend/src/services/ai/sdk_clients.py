@@ -0,0 +1,98 @@
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Tuple, Union
+
+import httpx
+import openai
+from anthropic import Anthropic, DefaultHttpxClient
+from flask import current_app
+
+from .fake_provider import FakeAnthropic, FakeOpenAI
+
+logger = logging.getLogger(__name__)
+
+
+class SDKClients:
+    """Process-wide provider SDK clients, created on first use.
+
+    Every SDK client owns an HTTP connection pool, so AnthropicClient and
+    OpenAIClient share one client per provider: ArticleGenerator,
+    DatabasePopulator and the worker threads reuse kept-alive connections
+    instead of each paying for TLS handshakes and leaving a pool behind. The
+    SDKs' sync clients are safe to share between threads.
+
+    Clients are keyed by process, so a client created before a fork (e.g.
+    with gunicorn --preload) is never shared with the children, and by
+    their settings (LLM_HTTP_*), so a changed configuration gets a new one.
+    """
+
+    _clients: Dict[Tuple, Any] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def anthropic() -> Union[Anthropic, FakeAnthropic]:
+        config = current_app.config
+        if config["ANTHROPIC_PROVIDER"] == "fake":
+            return SDKClients._get("fake anthropic", (), FakeAnthropic)
+
+        def create() -> Anthropic:
+            return Anthropic(
+                api_key=config["ANTHROPIC_API_KEY"],
+                http_client=DefaultHttpxClient(**SDKClients._http_options()),
+                max_retries=config["LLM_MAX_RETRIES"],
+            )
+
+        return SDKClients._get("anthropic", (config["ANTHROPIC_API_KEY"],), create)
+
+    @staticmethod
+    def openai() -> Union[openai.OpenAI, FakeOpenAI]:
+        config = current_app.config
+        if config["OPENAI_PROVIDER"] == "fake":
+            return SDKClients._get("fake openai", (), FakeOpenAI)
+
+        def create() -> openai.OpenAI:
+            return openai.OpenAI(
+                api_key=config["OPENAI_API_KEY"],
+                http_client=openai.DefaultHttpxClient(**SDKClients._http_options()),
+                max_retries=config["LLM_MAX_RETRIES"],
+            )
+
+        return SDKClients._get("openai", (config["OPENAI_API_KEY"],), create)
+
+    @staticmethod
+    def _http_options() -> Dict[str, Any]:
+        config = current_app.config
+        return {
+            "limits": httpx.Limits(
+                max_connections=config["LLM_HTTP_MAX_CONNECTIONS"],
+                max_keepalive_connections=config["LLM_HTTP_MAX_KEEPALIVE"],
+                keepalive_expiry=config["LLM_HTTP_KEEPALIVE_EXPIRY"],
+            ),
+            "timeout": httpx.Timeout(
+                config["LLM_HTTP_TIMEOUT"], connect=config["LLM_HTTP_CONNECT_TIMEOUT"]
+            ),
+        }
+
+    @staticmethod
+    def _get(name: str, identity: Tuple, create: Callable[[], Any]) -> Any:
+        config = current_app.config
+        key = (
+            os.getpid(),
+            name,
+            *identity,
+            config["LLM_HTTP_MAX_CONNECTIONS"],
+            config["LLM_HTTP_MAX_KEEPALIVE"],
+            config["LLM_HTTP_KEEPALIVE_EXPIRY"],
+            config["LLM_HTTP_TIMEOUT"],
+            config["LLM_HTTP_CONNECT_TIMEOUT"],
+            config["LLM_MAX_RETRIES"],
+        )
+        client = SDKClients._clients.get(key)
+        if client is None:
+            with SDKClients._lock:
+                client = SDKClients._clients.get(key)
+                if client is None:
+                    logger.info(f"Creating the {name} client")
+                    client = SDKClients._clients[key] = create()
+        return client
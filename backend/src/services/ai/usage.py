@@ -0,0 +1,73 @@
+import logging
+from typing import Dict
+
+from redis import RedisError
+
+from extensions import redis_client
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = (
+    "requests",
+    "input_tokens",
+    "cache_creation_input_tokens",
+    "cache_read_input_tokens",
+    "output_tokens",
+)
+
+
+class LLMUsage:
+    """Token usage of provider calls, logged per call and totalled in Redis.
+
+    Totals are kept per provider and operation, across processes, so the
+    effect of prompt caching on a populate run can be read afterwards with
+    `flask llm-usage`. input_tokens excludes the tokens written to and read
+    from the provider's prompt cache, as the providers report them.
+    """
+
+    KEY = "llm:usage"
+
+    @staticmethod
+    def record(
+        provider: str,
+        operation: str,
+        input_tokens: int,
+        output_tokens: int,
+        cache_creation_input_tokens: int = 0,
+        cache_read_input_tokens: int = 0,
+    ) -> None:
+        logger.info(
+            f"{provider} {operation}: {input_tokens} input tokens, "
+            f"{cache_creation_input_tokens} written to and "
+            f"{cache_read_input_tokens} read from the prompt cache, "
+            f"{output_tokens} output tokens"
+        )
+        counts = {
+            "requests": 1,
+            "input_tokens": input_tokens,
+            "cache_creation_input_tokens": cache_creation_input_tokens,
+            "cache_read_input_tokens": cache_read_input_tokens,
+            "output_tokens": output_tokens,
+        }
+        try:
+            with redis_client.pipeline(transaction=False) as pipe:
+                for counter, count in counts.items():
+                    pipe.hincrby(
+                        LLMUsage.KEY, f"{provider}:{operation}:{counter}", count
+                    )
+                pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Could not record LLM usage: {e}")
+
+    @staticmethod
+    def stats() -> Dict[str, Dict[str, int]]:
+        """Return the counters grouped by provider and operation."""
+        stats: Dict[str, Dict[str, int]] = {}
+        for field, count in redis_client.hgetall(LLMUsage.KEY).items():
+            name, counter = field.rsplit(":", 1)
+            stats.setdefault(name, dict.fromkeys(COUNTERS, 0))[counter] = int(count)
+        return stats
+
+    @staticmethod
+    def reset() -> None:
+        redis_client.delete(LLMUsage.KEY)
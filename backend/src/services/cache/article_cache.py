@@ -0,0 +1,259 @@
+import hashlib
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Union
+
+from flask import current_app
+from redis import RedisError, WatchError
+
+from extensions import async_redis_client, redis_client
+from http_cache import CATALOG_MODIFIED_KEY, CatalogVersion
+
+logger = logging.getLogger(__name__)
+
+
+class ArticleCache:
+    """Read-through Redis cache for serialized GraphQL article results.
+
+    Values are stored as JSON under namespaced keys. Redis errors never fail a
+    read: the loader result is returned uncached instead.
+
+    Each value has a version key that invalidation changes: an article's
+    counter, or the catalog version for listings. A miss reads the version
+    before loading and only stores the loaded value if the version is still
+    the same, so a load that started before an invalidation cannot write
+    the old data back. Listing keys are recorded in a set as they are
+    stored, so invalidate_listings deletes them without scanning the keyspace.
+    """
+
+    ARTICLE_KEY = "cache:article:{slug}"
+    ARTICLE_VERSION_KEY = "cache:article:{slug}:version"
+    ALL_ARTICLES_KEY = "cache:articles:all:{variant}"
+    TAXONOMIES_KEY = "cache:taxonomies"
+    CATEGORIES_KEY = "cache:categories"
+    LISTING_KEYS_KEY = "cache:listings"
+    STATS_KEY = "cache:stats"
+
+    def __init__(self):
+        self.redis = redis_client
+        self.article_ttl = current_app.config["CACHE_ARTICLE_TTL"]
+        self.pending_article_ttl = current_app.config["CACHE_PENDING_ARTICLE_TTL"]
+        self.list_ttl = current_app.config["CACHE_LIST_TTL"]
+
+    def get_or_set(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: Union[int, Callable[[Any], int]],
+        namespace: str,
+        version_key: str,
+    ) -> Any:
+        """
+        Return the cached value for key, calling loader and storing on a miss.
+
+        Args:
+            key: Redis key of the cached value
+            loader: Callable returning a JSON-serializable value
+            ttl: Expiry of the cached value in seconds, or a callable
+                returning it for the loaded value
+            namespace: Name the hit/miss counters are recorded under
+            version_key: Key that invalidation of the value changes
+
+        Returns:
+            The cached or freshly loaded value
+        """
+        try:
+            cached, version = self.redis.mget(key, version_key)
+        except RedisError as e:
+            logger.warning(f"Cache read failed for {key}: {e}")
+            return loader()
+
+        if cached is not None:
+            self._record(namespace, "hits")
+            return json.loads(cached)
+
+        self._record(namespace, "misses")
+        value = loader()
+        expiry = ttl(value) if callable(ttl) else ttl
+        try:
+            with self.redis.pipeline() as pipe:
+                pipe.watch(version_key)
+                if pipe.get(version_key) == version:
+                    pipe.multi()
+                    pipe.set(key, json.dumps(value), ex=expiry)
+                    self._track_listing(pipe, key, version_key, expiry)
+                    pipe.execute()
+                else:
+                    logger.debug(f"Not caching {key}: invalidated while loading")
+        except WatchError:
+            logger.debug(f"Not caching {key}: invalidated while loading")
+        except RedisError as e:
+            logger.warning(f"Cache write failed for {key}: {e}")
+        return value
+
+    def _track_listing(self, pipe, key: str, version_key: str, expiry: int) -> None:
+        if version_key != CATALOG_MODIFIED_KEY:
+            return
+        # Listings all expire after list_ttl, so the set outlives its keys
+        pipe.sadd(self.LISTING_KEYS_KEY, key)
+        pipe.expire(self.LISTING_KEYS_KEY, expiry)
+
+    def article(self, slug: str, loader: Callable[[], Any]) -> Any:
+        return self.get_or_set(
+            self.ARTICLE_KEY.format(slug=slug),
+            loader,
+            self._article_ttl,
+            "article",
+            self.ARTICLE_VERSION_KEY.format(slug=slug),
+        )
+
+    def all_articles(self, variant: str, loader: Callable[[], Any]) -> Any:
+        """Cache one page/projection of the allArticles connection."""
+        key = self.ALL_ARTICLES_KEY.format(
+            variant=hashlib.sha1(variant.encode()).hexdigest()
+        )
+        return self.get_or_set(
+            key, loader, self.list_ttl, "all_articles", CATALOG_MODIFIED_KEY
+        )
+
+    def taxonomies(self, loader: Callable[[], Any]) -> Any:
+        return self.get_or_set(
+            self.TAXONOMIES_KEY,
+            loader,
+            self.list_ttl,
+            "taxonomies",
+            CATALOG_MODIFIED_KEY,
+        )
+
+    def categories(self, loader: Callable[[], Any]) -> Any:
+        return self.get_or_set(
+            self.CATEGORIES_KEY,
+            loader,
+            self.list_ttl,
+            "categories",
+            CATALOG_MODIFIED_KEY,
+        )
+
+    def _article_ttl(self, data: Optional[dict]) -> int:
+        # An article about to be generated (or unknown, and maybe created
+        # later) changes soon; its placeholder must not outlive that by long
+        if data and data.get("is_generated"):
+            return self.article_ttl
+        return self.pending_article_ttl
+
+    def article_versions(self, slugs: List[str]) -> List[Optional[str]]:
+        """Return the cache versions of article pages, for HTTP validators."""
+        return self.redis.mget(
+            [self.ARTICLE_VERSION_KEY.format(slug=slug) for slug in slugs]
+        )
+
+    def invalidate_articles(self, slugs: Iterable[str]) -> None:
+        """Drop the cached article pages for slugs and bump their versions."""
+        slugs = list(slugs)
+        if not slugs:
+            return
+        try:
+            with self.redis.pipeline() as pipe:
+                for slug in slugs:
+                    pipe.incr(self.ARTICLE_VERSION_KEY.format(slug=slug))
+                pipe.delete(*(self.ARTICLE_KEY.format(slug=slug) for slug in slugs))
+                pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Cache invalidation failed for {slugs}: {e}")
+
+    def invalidate_listings(self) -> None:
+        """Drop every cached listing and taxonomy/category statistic."""
+        try:
+            # Bumped first: a listing loaded before it is no longer stored,
+            # and one stored before it is in the set read below. Also
+            # changes the validators of HTTP-cached listing responses.
+            CatalogVersion.bump()
+            keys = self.redis.smembers(self.LISTING_KEYS_KEY)
+            if keys:
+                with self.redis.pipeline() as pipe:
+                    pipe.delete(*keys)
+                    pipe.srem(self.LISTING_KEYS_KEY, *keys)
+                    pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Cache invalidation of listings failed: {e}")
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Return hit and miss counters grouped by namespace."""
+        try:
+            counters = self.redis.hgetall(self.STATS_KEY)
+        except RedisError as e:
+            logger.warning(f"Cache stats unavailable: {e}")
+            return {}
+
+        stats: Dict[str, Dict[str, int]] = {}
+        for field, count in counters.items():
+            namespace, kind = field.rsplit(":", 1)
+            stats.setdefault(namespace, {"hits": 0, "misses": 0})[kind] = int(count)
+        return stats
+
+    def _record(self, namespace: str, kind: str) -> None:
+        try:
+            self.redis.hincrby(self.STATS_KEY, f"{namespace}:{kind}", 1)
+        except RedisError:
+            pass
+
+
+class AsyncArticleCache(ArticleCache):
+    """ArticleCache for the async schema, on the asyncio Redis client.
+
+    Keys are shared with ArticleCache, so invalidation from the sync code
+    paths applies to both. get_or_set and the per-namespace helpers return
+    awaitables, and loaders must be coroutine functions.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.redis = async_redis_client
+
+    async def get_or_set(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Union[int, Callable[[Any], int]],
+        namespace: str,
+        version_key: str,
+    ) -> Any:
+        try:
+            cached, version = await self.redis.mget(key, version_key)
+        except RedisError as e:
+            logger.warning(f"Cache read failed for {key}: {e}")
+            return await loader()
+
+        if cached is not None:
+            await self._record(namespace, "hits")
+            return json.loads(cached)
+
+        await self._record(namespace, "misses")
+        value = await loader()
+        expiry = ttl(value) if callable(ttl) else ttl
+        try:
+            async with self.redis.pipeline() as pipe:
+                await pipe.watch(version_key)
+                if await pipe.get(version_key) == version:
+                    pipe.multi()
+                    pipe.set(key, json.dumps(value), ex=expiry)
+                    self._track_listing(pipe, key, version_key, expiry)
+                    await pipe.execute()
+                else:
+                    logger.debug(f"Not caching {key}: invalidated while loading")
+        except WatchError:
+            logger.debug(f"Not caching {key}: invalidated while loading")
+        except RedisError as e:
+            logger.warning(f"Cache write failed for {key}: {e}")
+        return value
+
+    async def article_versions(self, slugs: List[str]) -> List[Optional[str]]:
+        return await self.redis.mget(
+            [self.ARTICLE_VERSION_KEY.format(slug=slug) for slug in slugs]
+        )
+
+    async def _record(self, namespace: str, kind: str) -> None:
+        try:
+            await self.redis.hincrby(self.STATS_KEY, f"{namespace}:{kind}", 1)
+        except RedisError:
+            pass
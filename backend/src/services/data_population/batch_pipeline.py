@@ -0,0 +1,327 @@
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from api.articles.models import Article, ArticleBody, GenerationBatch
+from extensions import db
+from services.ai.anthropic_client import AnthropicClient
+from services.ai.article_generator import ArticleGenerator, ArticleSimilarityIndex
+from services.ai.openai_client import OpenAIClient
+from services.generation.job_queue import GenerationQueue
+from .pipeline import PipelineProgress
+
+logger = logging.getLogger(__name__)
+
+STAGE_PROVIDERS = {"research": "openai", "article": "anthropic"}
+
+
+class BatchPipeline:
+    """Research -> writing through provider batch jobs, for bulk backfills.
+
+    Every research request is submitted as an OpenAI batch, then every
+    article request as an Anthropic Message Batch; batch requests cost half
+    as much and do not count against the interactive rate limits, at the
+    price of latency (up to 24 hours). Batches are recorded as
+    GenerationBatch rows as soon as they are submitted, so a run that is
+    interrupted resumes by ingesting the batches still pending instead of
+    resubmitting their requests.
+
+    Like GenerationPipeline, every article is claimed through
+    GenerationQueue.claim and marked started before its research is
+    submitted, and released once its article is saved or has failed; the
+    results of articles this run could not claim are ignored.
+
+    Results are saved like interactive generations, through
+    AnthropicClient._parse_response and ArticleGenerator's relationship
+    linking. A response cut off by max_tokens cannot be continued inside a
+    batch; its article fails and is left for the next run.
+    """
+
+    def __init__(
+        self,
+        article_generator: ArticleGenerator,
+        max_requests: int,
+        poll_interval: int,
+        claim_ttl: int,
+        on_progress: Optional[Callable[[PipelineProgress], None]] = None,
+    ):
+        self.article_generator = article_generator
+        self.max_requests = max_requests
+        self.poll_interval = poll_interval
+        self.claim_ttl = claim_ttl
+        self.on_progress = on_progress
+
+    def run(self, article_ids: List[int]) -> PipelineProgress:
+        """
+        Research and write every article in article_ids.
+
+        Args:
+            article_ids: IDs of the articles to generate
+
+        Returns:
+            Final progress counters
+        """
+        self.progress = PipelineProgress(total=len(article_ids))
+        self.queue = GenerationQueue()
+        self.claimed = set()
+        # Last error of each claimed article, reported if no later batch of
+        # the stage succeeds for it
+        self.errors = {}
+
+        try:
+            article_ids = self._claim(article_ids)
+            self._run_stage("research", article_ids)
+            researched = list(
+                db.session.scalars(
+                    select(ArticleBody.article_id)
+                    .where(ArticleBody.article_id.in_(self.claimed))
+                    .where(ArticleBody.research_result.is_not(None))
+                    .order_by(ArticleBody.article_id)
+                )
+            )
+            self.progress.researched = len(researched)
+            self._report()
+            for article_id in sorted(self.claimed - set(researched)):
+                self._fail(article_id, "No research result")
+
+            self._run_stage("article", researched)
+            for article_id in sorted(self.claimed):
+                self._fail(article_id, "No article result")
+        finally:
+            # Interrupted: the articles of pending batches are claimed again
+            # when the run is resumed
+            for article_id in list(self.claimed):
+                self._release(article_id)
+
+        return self.progress
+
+    def _claim(self, article_ids: List[int]) -> List[int]:
+        """Claim and mark started the articles of article_ids, returning them."""
+        claimed = []
+        for article_id in article_ids:
+            if not self.queue.claim(article_id, ttl=self.claim_ttl):
+                logger.info(f"Skipping article {article_id}: generation pending")
+                self._advance("skipped")
+                continue
+
+            article = Article.query.get(article_id)
+            if article is None or not article.needs_generation:
+                # Generated (or deleted) since the run started
+                self.queue.release(article_id)
+                self._advance("skipped")
+                continue
+
+            article.mark_generation_started()
+            self.claimed.add(article_id)
+            claimed.append(article_id)
+        return claimed
+
+    def _release(self, article_id: int) -> None:
+        self.claimed.discard(article_id)
+        self.queue.release(article_id)
+
+    def _fail(self, article_id: int, error: str) -> None:
+        error = self.errors.get(article_id, error)
+        article = Article.query.get(article_id)
+        if article is not None:
+            logger.error(
+                f"Error generating content for article '{article.title}': {error}"
+            )
+            article.mark_generation_failed(error)
+        self._release(article_id)
+        self._advance("failed")
+
+    def _run_stage(self, stage: str, article_ids: List[int]) -> None:
+        # Batches left by an interrupted run go first, so that their failed
+        # requests are resubmitted with the rest
+        self._ingest_pending(stage)
+        self._submit(stage, article_ids)
+        self._ingest_pending(stage)
+
+    def _client(self, stage: str) -> Union[OpenAIClient, AnthropicClient]:
+        if stage == "research":
+            return self.article_generator.openai_client
+        return self.article_generator.anthropic_client
+
+    def _submit(self, stage: str, article_ids: List[int]) -> None:
+        requests = self._requests(stage, article_ids)
+        if not requests:
+            return
+
+        ids = list(requests)
+        for start in range(0, len(ids), self.max_requests):
+            chunk = ids[start : start + self.max_requests]
+            batch_id = self._client(stage).submit_batch(
+                {f"{stage}-{article_id}": requests[article_id] for article_id in chunk}
+            )
+            db.session.add(
+                GenerationBatch(
+                    stage=stage,
+                    provider=STAGE_PROVIDERS[stage],
+                    batch_id=batch_id,
+                    article_ids=chunk,
+                )
+            )
+            db.session.commit()
+            logger.info(
+                f"Submitted {stage} batch {batch_id} with {len(chunk)} requests"
+            )
+
+    def _requests(
+        self, stage: str, article_ids: List[int]
+    ) -> Dict[int, Dict[str, Any]]:
+        """Build the requests of the articles that still need stage."""
+        articles = (
+            Article.query.filter(Article.id.in_(article_ids))
+            .filter_by(is_generated=False)
+            .options(selectinload(Article.body))
+            .order_by(Article.id)
+            .all()
+        )
+
+        if stage == "research":
+            return {
+                article.id: OpenAIClient.research_request(
+                    OpenAIClient.generate_research_prompt(
+                        title=article.title,
+                        level=article.level.value,
+                        taxonomy=article.taxonomy,
+                        category=article.category,
+                        tags=article.tags,
+                        excerpt=article.excerpt,
+                    )
+                )
+                for article in articles
+                if not article.research_result
+            }
+
+        existing_articles_data = ArticleGenerator.existing_articles_data()
+        requests = {}
+        for article in articles:
+            if not article.research_result:
+                continue
+            catalog_section, related_candidates = ArticleGenerator.prompt_catalog(
+                article.title,
+                article.taxonomy,
+                article.category,
+                article.tags,
+                existing_articles_data,
+            )
+            requests[article.id] = AnthropicClient.article_request(
+                title=article.title,
+                level=article.level.value,
+                taxonomy=article.taxonomy,
+                category=article.category,
+                tags=article.tags,
+                research_document=article.research_result,
+                catalog_section=catalog_section,
+                related_candidates=related_candidates,
+            )
+        return requests
+
+    def _ingest_pending(self, stage: str) -> None:
+        client = self._client(stage)
+        for batch in GenerationBatch.pending(stage):
+            while not client.batch_ended(batch.batch_id):
+                time.sleep(self.poll_interval)
+
+            if stage == "research":
+                self._ingest_research(client, batch)
+            else:
+                self._ingest_articles(client, batch)
+            batch.mark_ingested()
+
+    def _ingest_research(self, client: OpenAIClient, batch: GenerationBatch) -> None:
+        # Research documents are committed together with the batch's
+        # ingested_at by mark_ingested
+        missing = set(batch.article_ids)
+        for custom_id, research_document, error in client.batch_results(batch.batch_id):
+            article_id = int(custom_id.rsplit("-", 1)[1])
+            if article_id not in missing:
+                continue
+            missing.discard(article_id)
+            if article_id not in self.claimed:
+                continue
+            article = Article.query.get(article_id)
+            if article is None or article.research_result:
+                continue
+            if error:
+                logger.error(f"Error researching article '{article.title}': {error}")
+                self.errors[article_id] = error
+                continue
+            article.research_result = research_document
+
+        if missing:
+            logger.error(
+                f"No result for {len(missing)} requests of research batch "
+                f"{batch.batch_id}"
+            )
+
+    def _ingest_articles(self, client: AnthropicClient, batch: GenerationBatch) -> None:
+        existing_articles_data = ArticleGenerator.existing_articles_data()
+        # Later articles of the batch link to the ones created by earlier
+        # saves, which add them to the index, instead of creating them again
+        similarity_index = ArticleSimilarityIndex(existing_articles_data)
+
+        missing = set(batch.article_ids)
+        for custom_id, response, error in client.batch_results(batch.batch_id):
+            article_id = int(custom_id.rsplit("-", 1)[1])
+            if article_id not in missing:
+                continue
+            missing.discard(article_id)
+            if article_id not in self.claimed:
+                continue
+            article = Article.query.get(article_id)
+            if article is None or article.is_generated:
+                continue
+
+            try:
+                if error:
+                    raise ValueError(error)
+                excerpt, content, related_articles_data = (
+                    AnthropicClient._parse_response(response)
+                )
+                _, related_articles = ArticleGenerator.save_generated_article(
+                    title=article.title,
+                    research_document=article.research_result,
+                    excerpt=excerpt,
+                    content=content,
+                    related_articles_data=related_articles_data,
+                    existing_articles_data=existing_articles_data,
+                    similarity_index=similarity_index,
+                )
+            except Exception as e:
+                # Resubmitted if the batch was left by an interrupted run,
+                # failed once the stage's batches are ingested otherwise
+                db.session.rollback()
+                logger.error(
+                    f"Error generating content for article '{article.title}': {e}"
+                )
+                self.errors[article_id] = str(e)
+                continue
+
+            article.mark_generation_complete()
+            self._release(article_id)
+            logger.info(
+                f"Successfully generated article '{article.title}' "
+                f"with {len(related_articles)} related articles"
+            )
+            self._advance("written")
+
+        if missing:
+            logger.error(
+                f"No result for {len(missing)} requests of article batch "
+                f"{batch.batch_id}"
+            )
+
+    def _advance(self, counter: str) -> None:
+        setattr(self.progress, counter, getattr(self.progress, counter) + 1)
+        self._report()
+
+    def _report(self) -> None:
+        logger.info(f"Generation progress: {self.progress}")
+        if self.on_progress:
+            self.on_progress(PipelineProgress(**vars(self.progress)))
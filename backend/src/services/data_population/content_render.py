@@ -0,0 +1,96 @@
+import logging
+from typing import Callable, Optional
+
+from sqlalchemy import bindparam, select, update
+
+from api.articles.models import Article
+from extensions import db, redis_client
+from services.cache.article_cache import ArticleCache
+from services.rendering.markdown_renderer import MarkdownRenderer
+
+logger = logging.getLogger(__name__)
+
+
+class ContentRenderBackfill:
+    """Render Article.content_html and toc in resumable, fixed-size chunks.
+
+    Works like WordCountBackfill: rows stream by ascending id from a
+    server-side cursor and the last committed id is checkpointed in Redis.
+    The cached pages of each chunk are dropped once it is committed.
+    """
+
+    CHECKPOINT_KEY = "content_render:last_id"
+
+    def __init__(self, batch_size: int = 200):
+        self.batch_size = batch_size
+        self.articles = Article.__table__
+
+    def last_checkpoint(self) -> int:
+        """Return the id of the last article of the last committed chunk."""
+        return int(redis_client.get(self.CHECKPOINT_KEY) or 0)
+
+    def reset_checkpoint(self) -> None:
+        redis_client.delete(self.CHECKPOINT_KEY)
+
+    def run(
+        self,
+        start_after: int = 0,
+        rerender: bool = False,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> int:
+        """
+        Render articles with content and an id > start_after.
+
+        Args:
+            start_after: Resume after this article id
+            rerender: Also render articles that already have HTML, e.g. after
+                a renderer change
+            progress: Called with (rendered so far, last id) after each chunk
+
+        Returns:
+            Number of articles rendered
+        """
+        # updated_at is bumped, as the served article changes with its HTML
+        update_stmt = (
+            update(self.articles)
+            .where(self.articles.c.id == bindparam("article_id"))
+            .values(content_html=bindparam("html"), toc=bindparam("toc"))
+        )
+        query = (
+            select(self.articles.c.id, self.articles.c.slug, self.articles.c.content)
+            .where(self.articles.c.content.isnot(None))
+            .where(self.articles.c.id > start_after)
+            .order_by(self.articles.c.id)
+        )
+        if not rerender:
+            query = query.where(self.articles.c.content_html.is_(None))
+
+        cache = ArticleCache()
+        rendered_count = 0
+        with db.engine.connect() as connection:
+            result = connection.execution_options(
+                stream_results=True, yield_per=self.batch_size
+            ).execute(query)
+            for rows in result.partitions():
+                params = []
+                for row in rows:
+                    rendered = MarkdownRenderer.render(row.content)
+                    params.append(
+                        {
+                            "article_id": row.id,
+                            "html": rendered.html,
+                            "toc": rendered.toc,
+                        }
+                    )
+                db.session.execute(update_stmt, params)
+                db.session.commit()
+                cache.invalidate_articles(row.slug for row in rows)
+
+                last_id = rows[-1].id
+                redis_client.set(self.CHECKPOINT_KEY, last_id)
+                rendered_count += len(params)
+                if progress:
+                    progress(rendered_count, last_id)
+
+        self.reset_checkpoint()
+        return rendered_count
@@ -0,0 +1,189 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from flask import Flask
+
+from api.articles.models import Article
+from extensions import db
+from services.ai.article_generator import ArticleGenerator
+from services.ai.catalog import estimate_tokens
+from services.ai.openai_client import OpenAIClient
+from services.ai.rate_limiter import ProviderRateLimiter
+from services.generation.job_queue import GenerationQueue
+
+logger = logging.getLogger(__name__)
+
+# Completion budget reserved per research request on top of the prompt estimate
+RESEARCH_COMPLETION_TOKENS = 4000
+
+
+@dataclass
+class PipelineProgress:
+    total: int
+    researched: int = 0
+    written: int = 0
+    failed: int = 0
+    skipped: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"researched {self.researched}/{self.total}, "
+            f"written {self.written}/{self.total}, failed {self.failed}, "
+            f"skipped {self.skipped}"
+        )
+
+
+class GenerationPipeline:
+    """Two-stage research -> writing pipeline with a worker pool per provider.
+
+    Articles move to the writing (Anthropic) pool as soon as their research
+    (OpenAI) finishes, so both providers work concurrently. Each pool waits
+    on its own rate limiter before every request.
+
+    Every article is claimed through GenerationQueue.claim before its
+    research, so it is skipped while the generation worker has a job for it
+    and readers do not enqueue one meanwhile, and its status goes through the
+    Article.mark_generation_* methods like a worker job's.
+    """
+
+    def __init__(
+        self,
+        app: Flask,
+        article_generator: ArticleGenerator,
+        research_workers: int,
+        writing_workers: int,
+        research_limiter: ProviderRateLimiter,
+        writing_limiter: ProviderRateLimiter,
+        on_progress: Optional[Callable[[PipelineProgress], None]] = None,
+    ):
+        self.app = app
+        self.article_generator = article_generator
+        self.research_workers = research_workers
+        self.writing_workers = writing_workers
+        self.research_limiter = research_limiter
+        self.writing_limiter = writing_limiter
+        self.on_progress = on_progress
+        self.progress_lock = threading.Lock()
+
+    def run(self, article_ids: List[int]) -> PipelineProgress:
+        """
+        Research and write every article in article_ids.
+
+        Args:
+            article_ids: IDs of the articles to generate
+
+        Returns:
+            Final progress counters
+        """
+        self.progress = PipelineProgress(total=len(article_ids))
+        self.queue = GenerationQueue()
+
+        with ThreadPoolExecutor(
+            self.research_workers, thread_name_prefix="research"
+        ) as research_pool, ThreadPoolExecutor(
+            self.writing_workers, thread_name_prefix="writing"
+        ) as writing_pool:
+            research_futures = {
+                research_pool.submit(self._research, article_id): article_id
+                for article_id in article_ids
+            }
+            writing_futures = []
+            for future in as_completed(research_futures):
+                if future.result():
+                    writing_futures.append(
+                        writing_pool.submit(self._write, research_futures[future])
+                    )
+            for future in as_completed(writing_futures):
+                future.result()
+
+        return self.progress
+
+    def _research(self, article_id: int) -> bool:
+        with self.app.app_context():
+            if not self.queue.claim(article_id):
+                logger.info(f"Skipping article {article_id}: generation pending")
+                self._advance("skipped")
+                return False
+
+            article = Article.query.get(article_id)
+            if article is None or not article.needs_generation:
+                # Generated (or deleted) since the run started
+                self.queue.release(article_id)
+                self._advance("skipped")
+                return False
+
+            try:
+                article.mark_generation_started()
+                if not article.research_result:
+                    prompt = OpenAIClient.generate_research_prompt(
+                        title=article.title,
+                        level=article.level.value,
+                        taxonomy=article.taxonomy,
+                        category=article.category,
+                        tags=article.tags,
+                        excerpt=article.excerpt,
+                    )
+                    self.research_limiter.acquire(
+                        estimate_tokens(prompt) + RESEARCH_COMPLETION_TOKENS
+                    )
+                self.article_generator.research_article(
+                    title=article.title,
+                    level=article.level.value,
+                    taxonomy=article.taxonomy,
+                    category=article.category,
+                    tags=article.tags,
+                    excerpt=article.excerpt,
+                )
+                self._advance("researched")
+                return True
+
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error researching article '{article.title}': {str(e)}")
+                article.mark_generation_failed(str(e))
+                self.queue.release(article_id)
+                self._advance("failed")
+                return False
+
+    def _write(self, article_id: int) -> None:
+        with self.app.app_context():
+            article = Article.query.get(article_id)
+            try:
+                # Acquired before the request and each of its continuations
+                _, related_articles = self.article_generator.generate_article(
+                    title=article.title,
+                    level=article.level.value,
+                    taxonomy=article.taxonomy,
+                    category=article.category,
+                    tags=article.tags,
+                    research_document=article.research_result,
+                    rate_limiter=self.writing_limiter,
+                )
+                article.mark_generation_complete()
+                logger.info(
+                    f"Successfully generated article '{article.title}' "
+                    f"with {len(related_articles)} related articles"
+                )
+                self._advance("written")
+
+            except Exception as e:
+                db.session.rollback()
+                logger.error(
+                    f"Error generating content for article '{article.title}': {str(e)}"
+                )
+                article.mark_generation_failed(str(e))
+                self._advance("failed")
+
+            finally:
+                self.queue.release(article_id)
+
+    def _advance(self, counter: str) -> None:
+        with self.progress_lock:
+            setattr(self.progress, counter, getattr(self.progress, counter) + 1)
+            progress = PipelineProgress(**vars(self.progress))
+        logger.info(f"Generation progress: {progress}")
+        if self.on_progress:
+            self.on_progress(progress)
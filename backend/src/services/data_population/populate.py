@@ -1,11 +1,17 @@
 import logging
-import time
+from typing import Callable, Optional
 
-from api.articles.models import Article, ArticleLevel
+from flask import current_app
+
+from api.articles.models import Article, ArticleLevel, ArticleStats, GenerationBatch
 from api.articles.utils import generate_slug
 from extensions import db
+from services.cache.article_cache import ArticleCache
 from services.ai.article_generator import ArticleGenerator
+from services.ai.rate_limiter import ProviderRateLimiter
+from .batch_pipeline import BatchPipeline
 from .initial_articles import INITIAL_ARTICLES
+from .pipeline import GenerationPipeline, PipelineProgress
 
 logger = logging.getLogger(__name__)
 
@@ -14,15 +20,24 @@ class DatabasePopulator:
     def __init__(self):
         self.article_generator = ArticleGenerator()
 
-    def populate_initial_articles(self, force: bool = False) -> None:
+    def populate_initial_articles(
+        self,
+        force: bool = False,
+        on_progress: Optional[Callable[[PipelineProgress], None]] = None,
+        batch: bool = False,
+    ) -> None:
         """
         Populate the database with initial articles metadata and then generate content.
 
         Args:
             force: If True, will generate content even for existing articles
+            on_progress: Called with the pipeline counters as articles advance
+            batch: If True, generate through provider batch jobs (BatchPipeline)
         """
         try:
-            if not force and Article.query.count() > 0:
+            # A batch run resumes while its batches are pending
+            resuming = batch and GenerationBatch.any_pending()
+            if not force and not resuming and Article.query.count() > 0:
                 logger.info("Database already contains articles. Skipping population.")
                 return
 
@@ -32,7 +47,11 @@ class DatabasePopulator:
             DatabasePopulator._create_article_metadata()
 
             # Phase 2: Generate content for articles
-            self._generate_article_content()
+            self._generate_article_content(on_progress, batch)
+
+            # Once for the whole run, rather than waiting for the worker
+            if ArticleStats.refresh_if_stale():
+                ArticleCache().invalidate_listings()
 
             logger.info("Database population completed successfully.")
 
@@ -81,47 +100,57 @@ class DatabasePopulator:
 
         try:
             db.session.commit()
+            ArticleStats.mark_stale()
+            ArticleCache().invalidate_listings()
             logger.info("Successfully created all article metadata.")
         except Exception as e:
             logger.error(f"Error committing article metadata: {str(e)}")
             db.session.rollback()
             raise
 
-    def _generate_article_content(self) -> None:
+    def _generate_article_content(
+        self,
+        on_progress: Optional[Callable[[PipelineProgress], None]] = None,
+        batch: bool = False,
+    ) -> None:
         """Generate content for articles that don't have it yet."""
         logger.info("Phase 2: Generating article content...")
 
         # Get all articles that need content generation
-        articles_to_generate = Article.query.filter_by(is_generated=False).all()
-
-        for article in articles_to_generate:
-            try:
-                logger.info(f"Generating content for article: {article.title}")
-
-                (
-                    article,
-                    related_articles,
-                ) = self.article_generator.research_and_generate_article(
-                    title=article.title,
-                    level=article.level.value,
-                    taxonomy=article.taxonomy,
-                    category=article.category,
-                    tags=article.tags,
-                    excerpt=article.excerpt,
-                )
-
-                logger.info(
-                    f"Successfully generated article '{article.title}' "
-                    f"with {len(related_articles)} related articles"
-                )
-
-                # Sleep to respect API rate limits
-                time.sleep(2)
-
-            except Exception as e:
-                logger.error(
-                    f"Error generating content for article '{article.title}': {str(e)}"
-                )
-                continue
-
-        logger.info("Completed content generation phase.")
+        article_ids = [
+            article_id
+            for (article_id,) in Article.query.filter_by(is_generated=False)
+            .with_entities(Article.id)
+            .all()
+        ]
+
+        config = current_app.config
+        if batch:
+            progress = BatchPipeline(
+                article_generator=self.article_generator,
+                max_requests=config["POPULATE_BATCH_MAX_REQUESTS"],
+                poll_interval=config["POPULATE_BATCH_POLL_INTERVAL"],
+                claim_ttl=config["POPULATE_BATCH_CLAIM_TTL"],
+                on_progress=on_progress,
+            ).run(article_ids)
+            logger.info(f"Completed content generation phase: {progress}")
+            return
+
+        pipeline = GenerationPipeline(
+            app=current_app._get_current_object(),
+            article_generator=self.article_generator,
+            research_workers=config["POPULATE_RESEARCH_WORKERS"],
+            writing_workers=config["POPULATE_WRITING_WORKERS"],
+            research_limiter=ProviderRateLimiter(
+                config["OPENAI_REQUESTS_PER_MINUTE"],
+                config["OPENAI_TOKENS_PER_MINUTE"],
+            ),
+            writing_limiter=ProviderRateLimiter(
+                config["ANTHROPIC_REQUESTS_PER_MINUTE"],
+                config["ANTHROPIC_TOKENS_PER_MINUTE"],
+            ),
+            on_progress=on_progress,
+        )
+        progress = pipeline.run(article_ids)
+
+        logger.info(f"Completed content generation phase: {progress}")
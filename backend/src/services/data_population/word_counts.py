@@ -0,0 +1,153 @@
+import logging
+from typing import Callable, List, Optional
+
+from sqlalchemy import bindparam, case, func, select, update
+
+from api.articles.models import Article, article_relationships
+from extensions import db, redis_client
+from services.cache.article_cache import ArticleCache
+
+logger = logging.getLogger(__name__)
+
+
+class WordCountBackfill:
+    """Recompute Article.word_count in resumable, fixed-size chunks.
+
+    Rows are streamed by ascending id from a server-side cursor on a
+    dedicated connection, so chunk commits on the session do not close it.
+    The last committed id is checkpointed in Redis after every chunk.
+
+    Only rows whose count changes are written, and they get a new
+    updated_at: word counts are served with the article and on the related
+    cards of the articles linking to it, whose cached pages are dropped once
+    the chunk is committed.
+    """
+
+    CHECKPOINT_KEY = "word_counts:last_id"
+
+    def __init__(self, batch_size: int = 1000):
+        self.batch_size = batch_size
+        self.articles = Article.__table__
+
+    def last_checkpoint(self) -> int:
+        """Return the id of the last article of the last committed chunk."""
+        return int(redis_client.get(self.CHECKPOINT_KEY) or 0)
+
+    def reset_checkpoint(self) -> None:
+        redis_client.delete(self.CHECKPOINT_KEY)
+
+    def run(
+        self,
+        start_after: int = 0,
+        in_sql: bool = False,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> int:
+        """
+        Update word counts for articles with content and an id > start_after.
+
+        Args:
+            start_after: Resume after this article id
+            in_sql: Count words in Postgres instead of streaming content to Python
+            progress: Called with (updated so far, last id) after each chunk
+
+        Returns:
+            Number of articles updated
+        """
+        chunks = self._sql_chunks if in_sql else self._python_chunks
+        cache = ArticleCache()
+        updated_count = 0
+        for updated_ids, last_id in chunks(start_after):
+            if updated_ids:
+                slugs = self._affected_slugs(updated_ids)
+                db.session.commit()
+                cache.invalidate_articles(slugs)
+            else:
+                db.session.commit()
+            redis_client.set(self.CHECKPOINT_KEY, last_id)
+            updated_count += len(updated_ids)
+            if progress:
+                progress(updated_count, last_id)
+        self.reset_checkpoint()
+        return updated_count
+
+    def _affected_slugs(self, article_ids: List[int]) -> List[str]:
+        """Return the slugs of the articles and of the articles linking to them."""
+        linking_ids = select(article_relationships.c.article_id).where(
+            article_relationships.c.related_article_id.in_(article_ids)
+        )
+        return list(
+            db.session.scalars(
+                select(self.articles.c.slug).where(
+                    self.articles.c.id.in_(article_ids)
+                    | self.articles.c.id.in_(linking_ids)
+                )
+            )
+        )
+
+    def _python_chunks(self, start_after: int):
+        update_stmt = (
+            update(self.articles)
+            .where(self.articles.c.id == bindparam("article_id"))
+            .values(word_count=bindparam("count"))
+        )
+        query = (
+            select(
+                self.articles.c.id, self.articles.c.content, self.articles.c.word_count
+            )
+            .where(self.articles.c.content.isnot(None))
+            .where(self.articles.c.id > start_after)
+            .order_by(self.articles.c.id)
+        )
+
+        with db.engine.connect() as connection:
+            result = connection.execution_options(
+                stream_results=True, yield_per=self.batch_size
+            ).execute(query)
+            for rows in result.partitions():
+                params = [
+                    {"article_id": row.id, "count": count}
+                    for row in rows
+                    if (count := len(row.content.split())) != row.word_count
+                ]
+                if params:
+                    db.session.execute(update_stmt, params)
+                yield [param["article_id"] for param in params], rows[-1].id
+
+    def _sql_chunks(self, start_after: int):
+        content = self.articles.c.content
+        word_count = case(
+            (content.regexp_match(r"^\s*$"), 0),
+            else_=func.array_length(
+                func.regexp_split_to_array(
+                    func.regexp_replace(content, r"^\s+|\s+$", "", "g"), r"\s+"
+                ),
+                1,
+            ),
+        )
+
+        last_id = start_after
+        while True:
+            upper_id = db.session.execute(
+                select(func.max(self.articles.c.id)).select_from(
+                    select(self.articles.c.id)
+                    .where(content.isnot(None))
+                    .where(self.articles.c.id > last_id)
+                    .order_by(self.articles.c.id)
+                    .limit(self.batch_size)
+                    .subquery()
+                )
+            ).scalar()
+            if upper_id is None:
+                return
+
+            updated_ids = db.session.scalars(
+                update(self.articles)
+                .where(self.articles.c.id > last_id)
+                .where(self.articles.c.id <= upper_id)
+                .where(content.isnot(None))
+                .where(self.articles.c.word_count.is_distinct_from(word_count))
+                .values(word_count=word_count)
+                .returning(self.articles.c.id)
+            ).all()
+            last_id = upper_id
+            yield updated_ids, last_id
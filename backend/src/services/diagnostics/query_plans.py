@@ -0,0 +1,191 @@
+import logging
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, select, text, tuple_
+from sqlalchemy.dialects import postgresql
+
+from api.articles.models import Article, ArticleLevel, article_relationships
+from extensions import db
+
+logger = logging.getLogger(__name__)
+
+# Indexes added for the resolver filter and sort paths
+BENCHMARK_INDEXES = [
+    "ix_articles_relevance_score_id",
+    "ix_articles_taxonomy_category",
+    "ix_articles_category_taxonomy",
+    "ix_articles_level_relevance_score_id",
+    "ix_articles_tags",
+    "ix_article_relationships_related_article_id",
+]
+
+
+@dataclass
+class QueryPlan:
+    name: str
+    before: str
+    after: str
+
+    @staticmethod
+    def execution_ms(plan: str) -> Optional[float]:
+        match = re.search(r"Execution Time: ([\d.]+) ms", plan)
+        return float(match.group(1)) if match else None
+
+
+class QueryPlanBenchmark:
+    """Compare query plans of the resolver queries without and with the indexes.
+
+    Everything runs in one transaction that is rolled back at the end: the
+    optional synthetic rows, and the DROP INDEX statements used to capture
+    the "before" plans. DROP INDEX takes an exclusive lock on the table until
+    the rollback, so run this against a development database.
+    """
+
+    def __init__(self, synthetic_rows: int = 0, analyze: bool = True):
+        self.synthetic_rows = synthetic_rows
+        self.analyze = analyze
+
+    def run(self) -> List[QueryPlan]:
+        with db.engine.connect() as connection:
+            transaction = connection.begin()
+            try:
+                if self.synthetic_rows:
+                    self._insert_synthetic_rows(connection)
+                connection.exec_driver_sql("ANALYZE articles, article_relationships")
+
+                queries = self._queries(connection)
+                after = {name: self._explain(connection, q) for name, q in queries}
+                for index_name in BENCHMARK_INDEXES:
+                    connection.exec_driver_sql(f"DROP INDEX IF EXISTS {index_name}")
+                before = {name: self._explain(connection, q) for name, q in queries}
+            finally:
+                transaction.rollback()
+
+        return [QueryPlan(name, before[name], after[name]) for name, _ in queries]
+
+    def _queries(self, connection) -> List:
+        """Build the resolver queries with sample values taken from the data."""
+        articles = Article.__table__
+        sample = connection.execute(
+            select(
+                articles.c.id,
+                articles.c.taxonomy,
+                articles.c.category,
+                articles.c.relevance_score,
+                articles.c.tags,
+            )
+            .order_by(articles.c.relevance_score.desc(), articles.c.id.desc())
+            .offset(select(func.count() // 2).select_from(articles).scalar_subquery())
+            .limit(1)
+        ).first()
+        if sample is None:
+            raise ValueError("No articles to benchmark; use synthetic rows")
+
+        # The columns the ORM loads by default (content and search_vector are deferred)
+        columns = [
+            column
+            for column in articles.c
+            if column.name not in ("content", "search_vector")
+        ]
+        by_relevance = articles.c.relevance_score.desc(), articles.c.id.desc()
+        return [
+            (
+                "allArticles (first page)",
+                select(*columns).order_by(*by_relevance).limit(21),
+            ),
+            (
+                "allArticles (after cursor)",
+                select(*columns)
+                .where(
+                    tuple_(articles.c.relevance_score, articles.c.id)
+                    < tuple_(sample.relevance_score, sample.id)
+                )
+                .order_by(*by_relevance)
+                .limit(21),
+            ),
+            (
+                "articlesByTaxonomy",
+                select(*columns).where(articles.c.taxonomy == sample.taxonomy),
+            ),
+            (
+                "articlesByCategory",
+                select(*columns)
+                .where(articles.c.category == sample.category)
+                .where(articles.c.taxonomy == sample.taxonomy),
+            ),
+            (
+                "articlesByLevel",
+                select(*columns).where(articles.c.level == ArticleLevel.ADVANCED),
+            ),
+            (
+                "articles by tag",
+                select(*columns).where(articles.c.tags.contains(sample.tags[:1])),
+            ),
+            (
+                "allTaxonomies",
+                select(
+                    articles.c.taxonomy,
+                    func.count(articles.c.id),
+                    func.array_agg(func.distinct(articles.c.category)),
+                ).group_by(articles.c.taxonomy),
+            ),
+            (
+                "allCategories",
+                select(
+                    articles.c.category,
+                    articles.c.taxonomy,
+                    func.count(articles.c.id),
+                    func.array_agg(func.distinct(articles.c.level)),
+                ).group_by(articles.c.category, articles.c.taxonomy),
+            ),
+            (
+                "linkback count",
+                select(func.count())
+                .select_from(article_relationships)
+                .where(article_relationships.c.related_article_id == sample.id),
+            ),
+        ]
+
+    def _explain(self, connection, query) -> str:
+        options = "ANALYZE, BUFFERS" if self.analyze else "COSTS"
+        sql = query.compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+        rows = connection.exec_driver_sql(f"EXPLAIN ({options}) {sql}")
+        return "\n".join(row[0] for row in rows)
+
+    def _insert_synthetic_rows(self, connection) -> None:
+        logger.info(f"Inserting {self.synthetic_rows} synthetic articles")
+        connection.execute(
+            text("""
+                INSERT INTO articles (
+                    title, slug, level, taxonomy, category, tags, word_count,
+                    relevance_score, is_generated, created_at, updated_at
+                )
+                SELECT
+                    'Benchmark article ' || n,
+                    'benchmark-article-' || n || '-' || md5(random()::text),
+                    (ARRAY['BASIC', 'INTERMEDIATE', 'ADVANCED'])[n % 3 + 1]::articlelevel,
+                    'Taxonomy ' || n % 20,
+                    'Category ' || n % 400,
+                    ARRAY['tag-' || n % 500, 'tag-' || n % 37]::varchar(50)[],
+                    0,
+                    random() * 100,
+                    false,
+                    now(),
+                    now()
+                FROM generate_series(1, :rows) AS n
+                """),
+            {"rows": self.synthetic_rows},
+        )
+        # Three related articles per synthetic article
+        connection.execute(text("""
+                INSERT INTO article_relationships (article_id, related_article_id)
+                SELECT a.id, b.id
+                FROM articles a
+                JOIN articles b ON b.id IN (a.id - 1, a.id - 7, a.id - 31)
+                WHERE a.slug LIKE 'benchmark-article-%'
+                ON CONFLICT DO NOTHING
+                """))
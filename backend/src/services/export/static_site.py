@@ -0,0 +1,334 @@
+import gzip
+import json
+import logging
+import os
+from collections import defaultdict
+from html import escape
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import brotli
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import aliased, load_only, selectinload, undefer_group
+
+from api.articles.models import Article, ArticleStats, article_relationships
+from api.articles.utils import generate_slug
+from api.graphql.projection import LISTING_FIELDS
+from api.graphql.queries import category_stats_data, taxonomy_stats_data
+from extensions import db
+
+logger = logging.getLogger(__name__)
+
+# Compressed siblings served by nginx's gzip_static and brotli_static
+COMPRESSED_SUFFIXES = (".gz", ".br")
+
+
+def _camel(name: str) -> str:
+    head, *rest = name.split("_")
+    return head + "".join(part.title() for part in rest)
+
+
+class StaticSiteExporter:
+    """Write the wiki as prerendered JSON and HTML files for nginx to serve.
+
+    Layout, relative to the output directory:
+
+        articles/<slug>.json, .html          every generated article
+        taxonomies.json                      taxonomy and category statistics
+        taxonomies/<taxonomy>.json, .html    articles of a taxonomy
+        taxonomies/<taxonomy>/<category>.json, .html
+
+    Article JSON matches the GetArticle query's articleBySlug. Runs are
+    incremental: manifest.json records a stamp of each exported article
+    (see _article_stamps), so only articles that changed, or whose related
+    cards changed, are loaded and rewritten. Listings are rebuilt from a
+    light query on every run but only rewritten when their bytes change,
+    which keeps unchanged files' mtimes (and nginx ETags).
+    """
+
+    MANIFEST = "manifest.json"
+
+    def __init__(self, output_dir: str, batch_size: int = 100):
+        self.output_dir = output_dir
+        self.batch_size = batch_size
+        self.stats = {"written": 0, "unchanged": 0, "removed": 0}
+
+    def run(self, full: bool = False) -> Dict[str, int]:
+        """
+        Export new and updated articles and every listing.
+
+        Args:
+            full: Ignore the manifest and rewrite every article
+
+        Returns:
+            Counts of written, unchanged and removed files
+        """
+        manifest = {} if full else self._read_manifest()
+        exported = manifest.get("articles", {})
+
+        current = self._article_stamps()
+        changed = [
+            slug for slug, stamp in current.items() if exported.get(slug) != stamp
+        ]
+        for start in range(0, len(changed), self.batch_size):
+            self._export_articles(changed[start : start + self.batch_size])
+        for slug in exported.keys() - current.keys():
+            self._remove(os.path.join("articles", f"{slug}.json"))
+            self._remove(os.path.join("articles", f"{slug}.html"))
+
+        listings = self._export_listings()
+        for path in set(manifest.get("listings", [])) - listings:
+            self._remove(path)
+
+        self._write_manifest({"articles": current, "listings": sorted(listings)})
+        logger.info(
+            f"Static export: {len(changed)} articles exported, "
+            f"{self.stats['written']} files written, "
+            f"{self.stats['removed']} removed"
+        )
+        return self.stats
+
+    @staticmethod
+    def _article_stamps() -> Dict[str, str]:
+        """
+        Stamp every generated article with what its exported files depend on.
+
+        Returns:
+            Slug -> the article's updated_at, its related articles' latest
+            updated_at and their ids
+        """
+        related = aliased(Article)
+        rows = db.session.execute(
+            select(
+                Article.slug,
+                Article.updated_at,
+                func.max(related.updated_at).label("related_updated_at"),
+                func.array_agg(aggregate_order_by(related.id, related.id))
+                .filter(related.id.is_not(None))
+                .label("related_ids"),
+            )
+            .outerjoin(
+                article_relationships,
+                article_relationships.c.article_id == Article.id,
+            )
+            .outerjoin(
+                related, related.id == article_relationships.c.related_article_id
+            )
+            .where(Article.is_generated)
+            .group_by(Article.id)
+        )
+        return {
+            row.slug: " ".join(
+                [
+                    row.updated_at.isoformat(),
+                    (
+                        row.related_updated_at.isoformat()
+                        if row.related_updated_at
+                        else "-"
+                    ),
+                    ",".join(str(related_id) for related_id in row.related_ids or []),
+                ]
+            )
+            for row in rows
+        }
+
+    def _export_articles(self, slugs: List[str]) -> None:
+        articles = db.session.scalars(
+            select(Article)
+            .options(
+                undefer_group("content"),
+                selectinload(Article.related_articles).load_only(
+                    *[getattr(Article, name) for name in LISTING_FIELDS]
+                ),
+            )
+            .where(Article.slug.in_(slugs))
+        ).all()
+        for article in articles:
+            data = self.article_data(article)
+            base = os.path.join("articles", article.slug)
+            self._write(f"{base}.json", json.dumps(data).encode())
+            self._write(f"{base}.html", self.article_html(data).encode())
+        # Drop the loaded content before the next batch
+        db.session.expunge_all()
+
+    def _export_listings(self) -> Set[str]:
+        """Write every listing and return the paths of the files written."""
+        rows = db.session.execute(
+            select(Article)
+            .options(load_only(*[getattr(Article, name) for name in LISTING_FIELDS]))
+            .order_by(Article.relevance_score.desc(), Article.id)
+        ).scalars()
+
+        by_taxonomy: Dict[str, List[dict]] = defaultdict(list)
+        by_category: Dict[tuple, List[dict]] = defaultdict(list)
+        for article in rows:
+            entry = self.listing_entry(article)
+            by_taxonomy[article.taxonomy].append(entry)
+            by_category[(article.taxonomy, article.category)].append(entry)
+        db.session.expunge_all()
+
+        paths = {"taxonomies.json"}
+        self._write(
+            "taxonomies.json",
+            json.dumps(
+                {
+                    "allTaxonomies": self._camel_rows(
+                        taxonomy_stats_data(ArticleStats.taxonomies())
+                    ),
+                    "allCategories": self._camel_rows(
+                        category_stats_data(ArticleStats.categories())
+                    ),
+                }
+            ).encode(),
+        )
+        for taxonomy, entries in by_taxonomy.items():
+            base = os.path.join("taxonomies", generate_slug(taxonomy))
+            paths |= self._write_listing(base, taxonomy, entries)
+        for (taxonomy, category), entries in by_category.items():
+            base = os.path.join(
+                "taxonomies", generate_slug(taxonomy), generate_slug(category)
+            )
+            paths |= self._write_listing(base, f"{category} ({taxonomy})", entries)
+        return paths
+
+    def _write_listing(self, base: str, title: str, entries: List[dict]) -> Set[str]:
+        self._write(f"{base}.json", json.dumps({"articles": entries}).encode())
+        self._write(f"{base}.html", self.listing_html(title, entries).encode())
+        return {f"{base}.json", f"{base}.html"}
+
+    @staticmethod
+    def listing_entry(article: Article) -> Dict[str, Any]:
+        entry = {_camel(name): getattr(article, name) for name in LISTING_FIELDS}
+        entry["level"] = article.level.value
+        return entry
+
+    @staticmethod
+    def article_data(article: Article) -> Dict[str, Any]:
+        """Serialize an article like the GetArticle query returns it."""
+        return {
+            "id": article.id,
+            "title": article.title,
+            "slug": article.slug,
+            "level": article.level.value,
+            "taxonomy": article.taxonomy,
+            "category": article.category,
+            "tags": article.tags,
+            "excerpt": article.excerpt,
+            "contentHtml": article.content_html,
+            "tableOfContents": article.toc or [],
+            "isGenerated": article.is_generated,
+            "wordCount": article.word_count,
+            "updatedAt": article.updated_at.isoformat(),
+            "relatedArticles": [
+                StaticSiteExporter.listing_entry(related)
+                for related in article.related_articles
+            ],
+        }
+
+    @staticmethod
+    def article_html(data: Dict[str, Any]) -> str:
+        """Render a standalone page for crawlers and clients without JavaScript."""
+        toc = "".join(
+            f'<li class="toc-{entry["level"]}">'
+            f'<a href="#{escape(entry["anchor"])}">{escape(entry["title"])}</a></li>'
+            for entry in data["tableOfContents"]
+        )
+        # contentHtml is sanitized by MarkdownRenderer; None before rendering
+        body = data["contentHtml"] or ""
+        related = StaticSiteExporter._links(data["relatedArticles"])
+        return StaticSiteExporter._page(
+            data["title"],
+            data["excerpt"],
+            f"/articles/{data['slug']}",
+            f"<h1>{escape(data['title'])}</h1>"
+            + (f"<nav><ul>{toc}</ul></nav>" if toc else "")
+            + f"<article>{body}</article>"
+            + (f"<h2>Related Articles</h2>{related}" if related else ""),
+        )
+
+    @staticmethod
+    def listing_html(title: str, entries: List[dict]) -> str:
+        return StaticSiteExporter._page(
+            title,
+            None,
+            None,
+            f"<h1>{escape(title)}</h1>{StaticSiteExporter._links(entries)}",
+        )
+
+    @staticmethod
+    def _links(entries: Iterable[dict]) -> str:
+        items = "".join(
+            f'<li><a href="/articles/{escape(entry["slug"])}">'
+            f'{escape(entry["title"])}</a>'
+            + (f"<p>{escape(entry['excerpt'])}</p>" if entry["excerpt"] else "")
+            + "</li>"
+            for entry in entries
+        )
+        return f"<ul>{items}</ul>" if items else ""
+
+    @staticmethod
+    def _page(
+        title: str, description: Optional[str], canonical: Optional[str], body: str
+    ) -> str:
+        head = [
+            '<meta charset="utf-8">',
+            '<meta name="viewport" content="width=device-width, initial-scale=1">',
+            f"<title>{escape(title)}</title>",
+        ]
+        if description:
+            head.append(f'<meta name="description" content="{escape(description)}">')
+        if canonical:
+            head.append(f'<link rel="canonical" href="{escape(canonical)}">')
+        return (
+            f"<!doctype html><html lang=\"en\"><head>{''.join(head)}</head>"
+            f"<body>{body}</body></html>"
+        )
+
+    @staticmethod
+    def _camel_rows(rows: List[dict]) -> List[dict]:
+        return [{_camel(key): value for key, value in row.items()} for row in rows]
+
+    def _read_manifest(self) -> dict:
+        try:
+            with open(os.path.join(self.output_dir, self.MANIFEST)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _write_manifest(self, manifest: dict) -> None:
+        # Written last and uncompressed, so an interrupted run is redone
+        self._replace(self.MANIFEST, json.dumps(manifest).encode())
+
+    def _write(self, path: str, content: bytes) -> None:
+        """Write path and its compressed siblings, unless its content is unchanged."""
+        try:
+            with open(os.path.join(self.output_dir, path), "rb") as f:
+                if f.read() == content:
+                    self.stats["unchanged"] += 1
+                    return
+        except FileNotFoundError:
+            pass
+
+        # Siblings first, so nginx never pairs a new file with stale siblings
+        # for longer than it takes to replace the original
+        self._replace(f"{path}.gz", gzip.compress(content, compresslevel=9, mtime=0))
+        self._replace(f"{path}.br", brotli.compress(content))
+        self._replace(path, content)
+        self.stats["written"] += 1
+
+    def _replace(self, path: str, content: bytes) -> None:
+        """Atomically replace path, so nginx never serves a partial file."""
+        target = os.path.join(self.output_dir, path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        temporary = f"{target}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(content)
+        os.replace(temporary, target)
+
+    def _remove(self, path: str) -> None:
+        for suffix in ("", *COMPRESSED_SUFFIXES):
+            try:
+                os.remove(os.path.join(self.output_dir, path + suffix))
+            except FileNotFoundError:
+                continue
+        self.stats["removed"] += 1
@@ -0,0 +1,104 @@
+import logging
+from typing import Callable, Dict, Optional
+
+from flask import current_app
+from redis import RedisError
+from redis.client import Pipeline
+
+from extensions import async_redis_client, redis_client
+from .events import GenerationEvents
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationDraft:
+    """Partial excerpt and content of an article while it is being generated.
+
+    Content streamed from the provider is appended to Redis in chunks of at
+    least FLUSH_CHARS, so readers can follow a generation without waiting
+    for it to finish. Drafts expire after GENERATION_DRAFT_TTL and are
+    cleared once the article is saved. Every write is published as a
+    GenerationEvents event. Redis errors never fail a generation: the draft
+    just stops being written.
+    """
+
+    EXCERPT_KEY = "generation:draft:{slug}:excerpt"
+    CONTENT_KEY = "generation:draft:{slug}:content"
+    FLUSH_CHARS = 1024
+
+    def __init__(self, slug: str):
+        self.redis = redis_client
+        self.slug = slug
+        self.excerpt_key = GenerationDraft.EXCERPT_KEY.format(slug=slug)
+        self.content_key = GenerationDraft.CONTENT_KEY.format(slug=slug)
+        self.ttl = current_app.config["GENERATION_DRAFT_TTL"]
+        self.buffer = ""
+        # Length of the stored content; this is its only writer
+        self.length = 0
+        self.enabled = True
+
+    @staticmethod
+    def get(slug: str) -> Optional[Dict[str, Optional[str]]]:
+        """Return the draft's excerpt and content, or None if there is none."""
+        excerpt, content = redis_client.mget(
+            GenerationDraft.EXCERPT_KEY.format(slug=slug),
+            GenerationDraft.CONTENT_KEY.format(slug=slug),
+        )
+        if excerpt is None and content is None:
+            return None
+        return {"excerpt": excerpt, "content": content}
+
+    @staticmethod
+    async def get_async(slug: str) -> Optional[Dict[str, Optional[str]]]:
+        excerpt, content = await async_redis_client.mget(
+            GenerationDraft.EXCERPT_KEY.format(slug=slug),
+            GenerationDraft.CONTENT_KEY.format(slug=slug),
+        )
+        if excerpt is None and content is None:
+            return None
+        return {"excerpt": excerpt, "content": content}
+
+    def set_excerpt(self, excerpt: str) -> None:
+        def write(pipe: Pipeline) -> None:
+            pipe.set(self.excerpt_key, excerpt, ex=self.ttl)
+            GenerationEvents.publish_in(pipe, self.slug, "excerpt", excerpt=excerpt)
+
+        self._write(write)
+
+    def append(self, chunk: str) -> None:
+        self.buffer += chunk
+        if len(self.buffer) >= self.FLUSH_CHARS:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.buffer:
+            return
+        content, self.buffer = self.buffer, ""
+        offset = self.length
+        self.length += len(content)
+
+        def append(pipe: Pipeline) -> None:
+            pipe.append(self.content_key, content)
+            pipe.expire(self.content_key, self.ttl)
+            GenerationEvents.publish_in(
+                pipe, self.slug, "content", offset=offset, text=content
+            )
+
+        self._write(append)
+
+    def clear(self) -> None:
+        """Discard the draft, e.g. before a new attempt or once it is saved."""
+        self.buffer = ""
+        self.length = 0
+        self._write(lambda pipe: pipe.delete(self.excerpt_key, self.content_key))
+
+    def _write(self, commands: Callable[[Pipeline], None]) -> None:
+        if not self.enabled:
+            return
+        try:
+            with self.redis.pipeline(transaction=False) as pipe:
+                commands(pipe)
+                pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Not writing generation draft of {self.slug}: {e}")
+            self.enabled = False
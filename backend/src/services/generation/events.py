@@ -0,0 +1,129 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Any, Dict, Optional, Set
+
+from redis import RedisError
+from redis.client import Pipeline
+
+from extensions import async_redis_client, redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationEvents:
+    """Redis pub/sub channel of the progress of each article's generation.
+
+    Events are JSON objects with an "event" of:
+
+        status    {"status": "generating" | "complete" | "failed", "error"}
+        excerpt   {"excerpt"}
+        content   {"offset", "text"}: text appended to the draft at offset,
+                  counted in Unicode code points (Python str length)
+
+    Published by the Article.mark_generation_* methods and GenerationDraft.
+    Pub/sub keeps no history: readers start from a snapshot (the article row
+    and its draft) taken after subscribing.
+    """
+
+    CHANNEL = "generation:events:{slug}"
+    CHANNEL_PATTERN = "generation:events:*"
+
+    @staticmethod
+    def channel(slug: str) -> str:
+        return GenerationEvents.CHANNEL.format(slug=slug)
+
+    @staticmethod
+    def message(event: str, **data: Any) -> str:
+        return json.dumps({"event": event, **data})
+
+    @staticmethod
+    def publish(slug: str, event: str, **data: Any) -> None:
+        """Publish an event; readers fall back to polling if this fails."""
+        try:
+            redis_client.publish(
+                GenerationEvents.channel(slug), GenerationEvents.message(event, **data)
+            )
+        except RedisError as e:
+            logger.warning(f"Could not publish {event} event of {slug}: {e}")
+
+    @staticmethod
+    def publish_in(pipe: Pipeline, slug: str, event: str, **data: Any) -> None:
+        """Queue an event on a pipeline, with the writes it describes."""
+        pipe.publish(
+            GenerationEvents.channel(slug), GenerationEvents.message(event, **data)
+        )
+
+
+class GenerationEventHub:
+    """Fans out generation events to the readers of one process.
+
+    A single pattern subscription serves every reader, so a waiting reader
+    costs a queue rather than a Redis connection. The subscription is opened
+    with the first reader. If it fails, every reader is sent None, which ends
+    its stream; clients reconnect and start from a fresh snapshot. Each event
+    dict is shared by all readers of its slug, which must not modify it.
+    """
+
+    RECONNECT_DELAY = 1.0
+    SUBSCRIBE_TIMEOUT = 5.0
+
+    def __init__(self):
+        self.readers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self.task: Optional[asyncio.Task] = None
+        self.subscribed = asyncio.Event()
+
+    async def subscribe(self, slug: str) -> asyncio.Queue:
+        """
+        Return a queue of the slug's events, receiving from now on.
+
+        Raises:
+            TimeoutError: Redis could not be subscribed to in time
+        """
+        if self.task is None or self.task.done():
+            self.subscribed.clear()
+            self.task = asyncio.create_task(self._listen())
+        await asyncio.wait_for(self.subscribed.wait(), self.SUBSCRIBE_TIMEOUT)
+
+        queue = asyncio.Queue()
+        self.readers[slug].add(queue)
+        return queue
+
+    def unsubscribe(self, slug: str, queue: asyncio.Queue) -> None:
+        readers = self.readers.get(slug)
+        if readers is not None:
+            readers.discard(queue)
+            if not readers:
+                del self.readers[slug]
+
+    async def close(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+
+    async def _listen(self) -> None:
+        prefix = GenerationEvents.CHANNEL.format(slug="")
+        while True:
+            pubsub = async_redis_client.pubsub()
+            try:
+                await pubsub.psubscribe(GenerationEvents.CHANNEL_PATTERN)
+                self.subscribed.set()
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    slug = message["channel"][len(prefix) :]
+                    event = json.loads(message["data"])
+                    for queue in self.readers.get(slug, ()):
+                        queue.put_nowait(event)
+            except RedisError as e:
+                logger.warning(f"Generation event subscription failed: {e}")
+                self.subscribed.clear()
+                self._disconnect_readers()
+                await asyncio.sleep(self.RECONNECT_DELAY)
+            finally:
+                await pubsub.aclose()
+
+    def _disconnect_readers(self) -> None:
+        for readers in self.readers.values():
+            for queue in readers:
+                queue.put_nowait(None)
@@ -0,0 +1,188 @@
+import json
+import logging
+import time
+from typing import Optional
+
+from flask import current_app
+
+from extensions import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationQueue:
+    """Redis-backed queue of article generation jobs.
+
+    Jobs are deduplicated per article: a dedup key is claimed when a job is
+    enqueued and released only once the job finishes (successfully or after
+    its last retry), so concurrent readers of the same ungenerated article
+    enqueue a single job between them. Generations run outside the queue
+    (populate-db) take the same key through claim().
+    """
+
+    QUEUE_KEY = "generation:queue"
+    PROCESSING_KEY = "generation:processing"
+    DELAYED_KEY = "generation:delayed"
+    DEDUP_KEY = "generation:dedup:{article_id}"
+    LEASE_KEY = "generation:lease:{article_id}"
+    # Processing entries seen without a lease -> when first seen
+    UNLEASED_KEY = "generation:unleased"
+
+    def __init__(self):
+        self.redis = redis_client
+        self.dedup_ttl = current_app.config["GENERATION_DEDUP_TTL"]
+        self.lease_ttl = current_app.config["GENERATION_LEASE_TTL"]
+        self.max_retries = current_app.config["GENERATION_MAX_RETRIES"]
+        self.retry_backoff = current_app.config["GENERATION_RETRY_BACKOFF"]
+
+    def enqueue(self, article_id: int) -> bool:
+        """
+        Enqueue a generation job unless one is already pending for the article.
+
+        Args:
+            article_id: ID of the article to generate
+
+        Returns:
+            True if a new job was enqueued, False if one was already pending
+        """
+        claimed = self.redis.set(
+            self.DEDUP_KEY.format(article_id=article_id),
+            1,
+            nx=True,
+            ex=self.dedup_ttl,
+        )
+        if not claimed:
+            return False
+
+        self.redis.lpush(self.QUEUE_KEY, GenerationQueue._encode(article_id, 0))
+        logger.info(f"Enqueued generation job for article {article_id}")
+        return True
+
+    def claim(self, article_id: int, ttl: Optional[int] = None) -> bool:
+        """
+        Claim an article for a generation run outside the queue.
+
+        Takes the article's dedup key, so no job is enqueued for it until
+        release() is called.
+
+        Args:
+            article_id: ID of the article to claim
+            ttl: Seconds before an unreleased claim expires; defaults to
+                GENERATION_DEDUP_TTL
+
+        Returns:
+            True if the article was claimed, False if a job is already pending
+            or running
+        """
+        return bool(
+            self.redis.set(
+                self.DEDUP_KEY.format(article_id=article_id),
+                1,
+                nx=True,
+                ex=ttl or self.dedup_ttl,
+            )
+        )
+
+    def release(self, article_id: int) -> None:
+        """Release an article claimed with claim()."""
+        self.redis.delete(self.DEDUP_KEY.format(article_id=article_id))
+
+    def dequeue(self, timeout: int = 5) -> Optional[dict]:
+        """
+        Move the next job to the processing list and take a lease on it.
+
+        The lease is taken right after the move; recover_abandoned gives
+        unleased entries a grace period to cover the gap.
+        """
+        raw = self.redis.brpoplpush(self.QUEUE_KEY, self.PROCESSING_KEY, timeout)
+        if raw is None:
+            return None
+
+        job = json.loads(raw)
+        job["raw"] = raw
+        self.redis.set(
+            self.LEASE_KEY.format(article_id=job["article_id"]), 1, ex=self.lease_ttl
+        )
+        return job
+
+    def renew_lease(self, job: dict) -> None:
+        """Extend the lease of a job that is still being processed."""
+        self.redis.expire(
+            self.LEASE_KEY.format(article_id=job["article_id"]), self.lease_ttl
+        )
+
+    def complete(self, job: dict) -> None:
+        """Remove a finished job and release its dedup key."""
+        article_id = job["article_id"]
+        with self.redis.pipeline() as pipe:
+            pipe.lrem(self.PROCESSING_KEY, 1, job["raw"])
+            pipe.hdel(self.UNLEASED_KEY, job["raw"])
+            pipe.delete(self.LEASE_KEY.format(article_id=article_id))
+            pipe.delete(self.DEDUP_KEY.format(article_id=article_id))
+            pipe.execute()
+
+    def retry(self, job: dict) -> bool:
+        """
+        Schedule a failed job for another attempt with exponential backoff.
+
+        Returns:
+            True if the job was rescheduled, False if it exhausted its retries
+        """
+        attempts = job["attempts"] + 1
+        if attempts > self.max_retries:
+            self.complete(job)
+            return False
+
+        article_id = job["article_id"]
+        run_at = time.time() + self.retry_backoff * (2 ** (attempts - 1))
+        with self.redis.pipeline() as pipe:
+            pipe.lrem(self.PROCESSING_KEY, 1, job["raw"])
+            pipe.hdel(self.UNLEASED_KEY, job["raw"])
+            pipe.delete(self.LEASE_KEY.format(article_id=article_id))
+            pipe.zadd(
+                self.DELAYED_KEY,
+                {GenerationQueue._encode(article_id, attempts): run_at},
+            )
+            pipe.expire(self.DEDUP_KEY.format(article_id=article_id), self.dedup_ttl)
+            pipe.execute()
+        return True
+
+    def promote_delayed(self) -> int:
+        """Move delayed jobs whose backoff has elapsed back onto the queue."""
+        promoted = 0
+        for raw in self.redis.zrangebyscore(self.DELAYED_KEY, 0, time.time()):
+            # Only the worker that wins the ZREM pushes the job
+            if self.redis.zrem(self.DELAYED_KEY, raw):
+                self.redis.lpush(self.QUEUE_KEY, raw)
+                promoted += 1
+        return promoted
+
+    def recover_abandoned(self) -> int:
+        """
+        Requeue jobs left in the processing list by a worker that died.
+
+        A job is only requeued once it has had no lease for a whole lease
+        TTL, as seen by any worker, so a job just moved by dequeue() is not
+        taken from a live worker before its lease is set.
+        """
+        recovered = 0
+        now = time.time()
+        for raw in self.redis.lrange(self.PROCESSING_KEY, 0, -1):
+            article_id = json.loads(raw)["article_id"]
+            if self.redis.exists(self.LEASE_KEY.format(article_id=article_id)):
+                self.redis.hdel(self.UNLEASED_KEY, raw)
+                continue
+            if self.redis.hsetnx(self.UNLEASED_KEY, raw, now):
+                continue
+            unleased_since = float(self.redis.hget(self.UNLEASED_KEY, raw) or now)
+            if now - unleased_since < self.lease_ttl:
+                continue
+            if self.redis.lrem(self.PROCESSING_KEY, 1, raw):
+                self.redis.lpush(self.QUEUE_KEY, raw)
+                recovered += 1
+            self.redis.hdel(self.UNLEASED_KEY, raw)
+        return recovered
+
+    @staticmethod
+    def _encode(article_id: int, attempts: int) -> str:
+        return json.dumps({"article_id": article_id, "attempts": attempts})
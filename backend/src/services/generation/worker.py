@@ -0,0 +1,118 @@
+import logging
+import threading
+from typing import Dict
+
+from flask import Flask
+
+from api.articles.models import Article, ArticleStats
+from extensions import db
+from services.ai.article_generator import ArticleGenerator
+from services.cache.article_cache import ArticleCache
+from .job_queue import GenerationQueue
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationWorker:
+    """Pool of threads that consume jobs from the generation queue."""
+
+    POLL_INTERVAL = 5
+
+    def __init__(self, app: Flask, concurrency: int):
+        self.app = app
+        self.concurrency = concurrency
+        self.stop_event = threading.Event()
+        self.active_jobs: Dict[int, dict] = {}
+        self.active_lock = threading.Lock()
+
+    def run(self) -> None:
+        """Start the worker threads and supervise them until interrupted."""
+        threads = [
+            threading.Thread(
+                target=self._consume, name=f"generation-worker-{i}", daemon=True
+            )
+            for i in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+
+        logger.info(f"Generation worker started with {self.concurrency} threads")
+
+        try:
+            with self.app.app_context():
+                queue = GenerationQueue()
+                while not self.stop_event.wait(self.POLL_INTERVAL):
+                    with self.active_lock:
+                        active = list(self.active_jobs.values())
+                    for job in active:
+                        queue.renew_lease(job)
+                    queue.promote_delayed()
+                    queue.recover_abandoned()
+                    # Debounced: once per interval however many saves marked it
+                    if ArticleStats.refresh_if_stale(
+                        self.app.config["STATS_REFRESH_INTERVAL"]
+                    ):
+                        ArticleCache().invalidate_listings()
+        except KeyboardInterrupt:
+            logger.info("Stopping generation worker...")
+        finally:
+            self.stop_event.set()
+            for thread in threads:
+                thread.join()
+
+    def _consume(self) -> None:
+        with self.app.app_context():
+            queue = GenerationQueue()
+            generator = ArticleGenerator()
+
+            while not self.stop_event.is_set():
+                job = queue.dequeue(timeout=self.POLL_INTERVAL)
+                if job is None:
+                    continue
+
+                with self.active_lock:
+                    self.active_jobs[job["article_id"]] = job
+                try:
+                    self._process(queue, generator, job)
+                finally:
+                    with self.active_lock:
+                        self.active_jobs.pop(job["article_id"], None)
+
+    def _process(
+        self, queue: GenerationQueue, generator: ArticleGenerator, job: dict
+    ) -> None:
+        article = Article.query.get(job["article_id"])
+        if article is None or not article.needs_generation:
+            queue.complete(job)
+            return
+
+        try:
+            logger.info(
+                f"Generating article '{article.title}' (attempt {job['attempts'] + 1})"
+            )
+            article.mark_generation_started()
+            generator.research_and_generate_article(
+                article.title,
+                article.level.value,
+                article.taxonomy,
+                article.category,
+                article.tags,
+                article.excerpt,
+            )
+            article.mark_generation_complete()
+            queue.complete(job)
+
+        except Exception as e:
+            db.session.rollback()
+            if queue.retry(job):
+                logger.warning(
+                    f"Generation of article {job['article_id']} failed, retrying: {e}"
+                )
+            else:
+                logger.error(
+                    f"Generation of article {job['article_id']} failed permanently: {e}"
+                )
+                article.mark_generation_failed(str(e))
+
+        finally:
+            db.session.remove()
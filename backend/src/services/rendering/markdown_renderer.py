@@ -0,0 +1,117 @@
+import logging
+from dataclasses import dataclass
+from html import escape
+from typing import Dict, List, Union
+
+import nh3
+from markdown_it import MarkdownIt
+from mdit_py_plugins.anchors import anchors_plugin
+from pygments import highlight
+from pygments.formatters import HtmlFormatter
+from pygments.lexers import get_lexer_by_name
+from pygments.util import ClassNotFound
+
+logger = logging.getLogger(__name__)
+
+# Headings given anchors and listed in the table of contents
+TOC_MIN_LEVEL = 2
+TOC_MAX_LEVEL = 3
+
+# Pygments CSS class prefix; the matching stylesheet is generated with
+# `pygmentize -S one-dark -f html -a .highlight`
+HIGHLIGHT_CSS_CLASS = "highlight"
+
+# Markup the renderer emits. Anything else in the model's Markdown (raw HTML,
+# scripts, event handlers, javascript: links) is stripped by nh3.
+ALLOWED_TAGS = {
+    "a", "blockquote", "br", "code", "del", "div", "em", "h1", "h2", "h3", "h4",
+    "h5", "h6", "hr", "img", "li", "ol", "p", "pre", "span", "strong", "table",
+    "tbody", "td", "th", "thead", "tr", "ul",
+}  # fmt: skip
+ALLOWED_ATTRIBUTES = {
+    "a": {"href", "title"},
+    "code": {"class"},
+    "div": {"class"},
+    "img": {"src", "alt", "title"},
+    "pre": {"class"},
+    "span": {"class"},
+    "td": {"style"},
+    "th": {"style"},
+    **{f"h{level}": {"id"} for level in range(1, 7)},
+}
+
+
+@dataclass
+class RenderedArticle:
+    html: str
+    # Headings in document order: {"level", "anchor", "title"}
+    toc: List[Dict[str, Union[int, str]]]
+
+
+def _highlight(code: str, language: str, attributes: str) -> str:
+    """Highlight a fenced code block, or return "" to fall back to plain <pre>."""
+    if not language:
+        return ""
+    try:
+        lexer = get_lexer_by_name(language)
+    except ClassNotFound:
+        logger.debug(f"No lexer for code block language '{language}'")
+        return ""
+    spans = highlight(code, lexer, HtmlFormatter(nowrap=True))
+    return (
+        f'<pre class="{HIGHLIGHT_CSS_CLASS}">'
+        f'<code class="language-{escape(language)}">{spans}</code></pre>'
+    )
+
+
+class MarkdownRenderer:
+    """Render article Markdown to sanitized, pre-highlighted HTML."""
+
+    _markdown = (
+        MarkdownIt("commonmark", {"html": False, "highlight": _highlight})
+        .enable(["table", "strikethrough"])
+        .use(anchors_plugin, min_level=TOC_MIN_LEVEL, max_level=TOC_MAX_LEVEL)
+    )
+
+    @staticmethod
+    def render(markdown: str) -> RenderedArticle:
+        """
+        Render an article's Markdown.
+
+        Args:
+            markdown: Article content as generated
+
+        Returns:
+            The sanitized HTML, with anchored headings, and its table of contents
+        """
+        md = MarkdownRenderer._markdown
+        env: dict = {}
+        tokens = md.parse(markdown, env)
+
+        toc = []
+        for i, token in enumerate(tokens):
+            if token.type == "heading_open" and token.attrGet("id"):
+                toc.append(
+                    {
+                        "level": int(token.tag[1]),
+                        "anchor": token.attrGet("id"),
+                        "title": "".join(
+                            child.content
+                            for child in tokens[i + 1].children
+                            if child.type in ("text", "code_inline")
+                        ),
+                    }
+                )
+
+        html = md.renderer.render(tokens, md.options, env)
+        return RenderedArticle(html=MarkdownRenderer.sanitize(html), toc=toc)
+
+    @staticmethod
+    def sanitize(html: str) -> str:
+        return nh3.clean(
+            html,
+            tags=ALLOWED_TAGS,
+            attributes=ALLOWED_ATTRIBUTES,
+            url_schemes={"http", "https", "mailto"},
+            link_rel="noopener noreferrer",
+        )
@@ -0,0 +1,5 @@
+"""WSGI entry point, without the generation event streams of asgi.py."""
+
+from app import create_app
+
+app = create_app()
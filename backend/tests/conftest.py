@@ -0,0 +1,69 @@
+import os
+
+# Read by config at import time: no provider, LLM cache or Redis server is
+# needed to run the tests
+os.environ["OPENAI_PROVIDER"] = "fake"
+os.environ["ANTHROPIC_PROVIDER"] = "fake"
+os.environ["LLM_CACHE_ENABLED"] = "false"
+
+import fakeredis
+import pytest
+from fakeredis import aioredis
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+import extensions
+from app import create_app
+from config import TestingConfig
+from services.ai.article_generator import ArticleSimilarityIndex
+from services.ai.catalog import CatalogSnapshot
+
+
+@pytest.fixture
+def app(tmp_path):
+    """The testing app, with both Redis clients on one in-memory server."""
+    app = create_app("testing")
+    app.config["LLM_CACHE_DIR"] = str(tmp_path / "llm_cache")
+
+    server = fakeredis.FakeServer()
+    extensions.redis_client.client = fakeredis.FakeRedis(
+        server=server, decode_responses=True
+    )
+    extensions.async_redis_client.client = aioredis.FakeRedis(
+        server=server, decode_responses=True
+    )
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def database(app):
+    """
+    Migrate the test database (TestingConfig) and clear it afterwards.
+
+    Tests using it are skipped when the database cannot be reached.
+    """
+    from flask_migrate import upgrade
+
+    engine = create_engine(TestingConfig.SQLALCHEMY_DATABASE_URI)
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    except OperationalError:
+        pytest.skip("test database unavailable")
+    finally:
+        engine.dispose()
+
+    migrations = os.path.join(os.path.dirname(__file__), "..", "migrations")
+    upgrade(directory=migrations)
+    # Per-process catalog caches of a previous test's articles
+    ArticleSimilarityIndex._shared = None
+    CatalogSnapshot._sections.clear()
+    try:
+        yield extensions.db
+    finally:
+        extensions.db.session.remove()
+        # Downgrading leaves the enum types of the initial migration behind
+        with extensions.db.engine.begin() as connection:
+            connection.execute(text("DROP SCHEMA public CASCADE"))
+            connection.execute(text("CREATE SCHEMA public"))
@@ -0,0 +1,142 @@
+from unittest import mock
+
+import pytest
+
+from services.ai.anthropic_client import AnthropicClient
+from services.ai.constants import ARTICLE_SYSTEM_PROMPT
+from services.ai.fake_provider import FakeAnthropic
+from services.ai.rate_limiter import ProviderRateLimiter
+from services.ai.usage import LLMUsage
+
+CATALOG_SECTION = [
+    {
+        "id": article_id,
+        "title": f"Data Structure {article_id}",
+        "taxonomy": "Data Structures",
+        "category": "Trees",
+        "level": "basic",
+        "tags": ["trees"],
+    }
+    for article_id in range(1, 41)
+]
+
+EPHEMERAL = {"type": "ephemeral"}
+
+
+@pytest.fixture
+def client(app):
+    FakeAnthropic._prompt_cache.clear()
+    return AnthropicClient()
+
+
+def generate(client, title):
+    return client.generate_article_content(
+        title=title,
+        level="basic",
+        taxonomy="Data Structures",
+        category="Trees",
+        tags=["trees"],
+        research_document=f"Research on {title}",
+        catalog_section=CATALOG_SECTION,
+        related_candidates=CATALOG_SECTION[:2],
+    )
+
+
+@pytest.mark.parametrize("streaming", [True, False])
+def test_generation_request_blocks(app, client, streaming):
+    app.config["ANTHROPIC_STREAMING"] = streaming
+    messages = client.client.beta.prompt_caching.messages
+    method = "stream" if streaming else "create"
+
+    with mock.patch.object(
+        messages, method, wraps=getattr(messages, method)
+    ) as complete:
+        excerpt, content, related_articles = generate(client, "Heaps")
+
+    assert excerpt and content.startswith("# Heaps")
+    assert related_articles
+    request = complete.call_args.kwargs
+    assert request["system"] == [
+        {"type": "text", "text": ARTICLE_SYSTEM_PROMPT, "cache_control": EPHEMERAL}
+    ]
+    [message] = request["messages"]
+    catalog_block, article_block = message["content"]
+    # The category's catalog section ends the cached prefix
+    assert catalog_block["cache_control"] == EPHEMERAL
+    assert '"t":"Data Structure 40"' in catalog_block["text"]
+    assert "Heaps" not in catalog_block["text"]
+    # The per-article request follows the last breakpoint
+    assert "cache_control" not in article_block
+    assert "- Title: Heaps" in article_block["text"]
+    assert "Research on Heaps" in article_block["text"]
+
+
+def test_usage_records_prompt_cache_tokens(app, client):
+    generate(client, "Heaps")
+    first = LLMUsage.stats()["anthropic:article"]
+    assert first["requests"] == 1
+    assert first["cache_creation_input_tokens"] > 0
+    assert first["cache_read_input_tokens"] == 0
+
+    # Another article of the taxonomy reads the shared prefix
+    generate(client, "Tries")
+    second = LLMUsage.stats()["anthropic:article"]
+    assert second["requests"] == 2
+    assert second["cache_creation_input_tokens"] == first["cache_creation_input_tokens"]
+    assert second["cache_read_input_tokens"] == first["cache_creation_input_tokens"]
+    assert second["input_tokens"] > first["input_tokens"]
+
+
+def test_prompt_caching_disabled(app, client):
+    app.config["ANTHROPIC_PROMPT_CACHING"] = False
+
+    with mock.patch.object(
+        client.client.messages, "stream", wraps=client.client.messages.stream
+    ) as stream:
+        generate(client, "Heaps")
+        generate(client, "Tries")
+
+    for call in stream.call_args_list:
+        request = call.kwargs
+        assert "cache_control" not in request["system"][0]
+        assert all(
+            "cache_control" not in block for block in request["messages"][0]["content"]
+        )
+    usage = LLMUsage.stats()["anthropic:article"]
+    assert usage["cache_creation_input_tokens"] == 0
+    assert usage["cache_read_input_tokens"] == 0
+
+
+def test_rate_limiter_acquired_for_continuations(app, client):
+    article_request = AnthropicClient.article_request
+
+    def truncating_request(**kwargs):
+        # Cut the response off, so that it is continued
+        return {**article_request(**kwargs), "max_tokens": 400}
+
+    limiter = mock.Mock(spec=ProviderRateLimiter)
+    messages = client.client.beta.prompt_caching.messages
+    with mock.patch.object(
+        AnthropicClient, "article_request", side_effect=truncating_request
+    ), mock.patch.object(messages, "stream", wraps=messages.stream) as stream:
+        _, content, _ = client.generate_article_content(
+            title="Heaps",
+            level="basic",
+            taxonomy="Data Structures",
+            category="Trees",
+            tags=["trees"],
+            research_document="Research on Heaps",
+            catalog_section=CATALOG_SECTION,
+            related_candidates=[],
+            rate_limiter=limiter,
+        )
+
+    assert content.startswith("# Heaps")
+    assert stream.call_count > 1
+    estimates = [call.args[0] for call in limiter.acquire.call_args_list]
+    assert estimates == [
+        AnthropicClient.estimate_request_tokens(call.kwargs)
+        for call in stream.call_args_list
+    ]
+    # Continuations resend the text received so far
+    assert estimates == sorted(set(estimates))
@@ -0,0 +1,83 @@
+from unittest import mock
+
+from redis import RedisError
+
+from api.articles.models import Article, ArticleLevel
+from extensions import redis_client
+from services.ai.article_generator import ArticleGenerator
+from services.cache.article_cache import ArticleCache
+
+
+def test_invalidate_listings_drops_tracked_keys(app):
+    cache = ArticleCache()
+    cache.all_articles("first page", lambda: ["heaps"])
+    cache.taxonomies(lambda: ["Data Structures"])
+    cache.article("heaps", lambda: {"slug": "heaps", "is_generated": True})
+
+    cache.invalidate_listings()
+
+    assert cache.all_articles("first page", lambda: ["tries"]) == ["tries"]
+    assert cache.taxonomies(lambda: ["Algorithms"]) == ["Algorithms"]
+    # Article pages are versioned separately
+    assert cache.article("heaps", lambda: None) == {
+        "slug": "heaps",
+        "is_generated": True,
+    }
+
+
+def test_listing_loaded_during_invalidation_is_not_stored(app):
+    cache = ArticleCache()
+
+    def loader():
+        cache.invalidate_listings()
+        return ["stale"]
+
+    assert cache.all_articles("first page", loader) == ["stale"]
+    assert cache.all_articles("first page", lambda: ["fresh"]) == ["fresh"]
+
+
+def test_stats_without_redis(app):
+    cache = ArticleCache()
+    cache.taxonomies(lambda: [])
+    assert cache.stats() == {"taxonomies": {"hits": 0, "misses": 1}}
+
+    with mock.patch.object(
+        redis_client.client, "hgetall", side_effect=RedisError("down")
+    ):
+        assert cache.stats() == {}
+
+
+def test_save_invalidates_referrers(app, database):
+    def article(slug, **fields):
+        return Article(
+            title=slug.title(),
+            slug=slug,
+            level=ArticleLevel.BASIC,
+            taxonomy="Data Structures",
+            category="Trees",
+            tags=[],
+            is_generated=False,
+            **fields,
+        )
+
+    heaps = article("heaps")
+    tries = article("tries")
+    tries.related_articles.append(heaps)
+    database.session.add_all([heaps, tries])
+    database.session.commit()
+
+    cache = ArticleCache()
+    for slug in ("heaps", "tries"):
+        cache.article(slug, lambda: {"slug": slug, "is_generated": True})
+
+    ArticleGenerator.save_generated_article(
+        title="Heaps",
+        research_document="Research",
+        excerpt="Excerpt",
+        content="# Heaps\n\nContent",
+        related_articles_data=[],
+    )
+
+    # The page of tries shows the card of heaps
+    for slug in ("heaps", "tries"):
+        assert cache.article(slug, lambda: {"slug": "reloaded"}) == {"slug": "reloaded"}
@@ -0,0 +1,82 @@
+from api.articles.models import Article, ArticleLevel
+from services.ai.article_generator import ArticleMatcher, ArticleSimilarityIndex
+
+CATALOG = [
+    {
+        "id": 1,
+        "title": "Binary Search Trees",
+        "taxonomy": "Data Structures",
+        "category": "Trees",
+        "level": "basic",
+        "tags": ["trees", "search"],
+    },
+    {
+        "id": 2,
+        "title": "Hash Tables",
+        "taxonomy": "Data Structures",
+        "category": "Hashing",
+        "level": "basic",
+        "tags": ["hashing"],
+    },
+]
+
+
+def suggestion(title, category="Trees"):
+    return {
+        "title": title,
+        "taxonomy": "Data Structures",
+        "category": category,
+        "tags": [],
+    }
+
+
+def test_find_similar_article_builds_index():
+    assert (
+        ArticleMatcher.find_similar_article(suggestion("Binary Search Tree"), CATALOG)
+        == 1
+    )
+    assert ArticleMatcher.find_similar_article(suggestion("Tries"), CATALOG) is None
+
+
+def test_find_similar_article_with_index():
+    catalog = list(CATALOG)
+    index = ArticleSimilarityIndex(catalog)
+    index.add({**suggestion("Red-Black Trees"), "id": 3, "level": "advanced"})
+
+    assert (
+        ArticleMatcher.find_similar_article(
+            suggestion("Red Black Trees"), catalog, index
+        )
+        == 3
+    )
+
+
+def test_shared_index_catches_up(app, database):
+    def add(title):
+        article = Article(
+            title=title,
+            slug=title.lower().replace(" ", "-"),
+            level=ArticleLevel.BASIC,
+            taxonomy="Data Structures",
+            category="Trees",
+            tags=[],
+            is_generated=False,
+        )
+        database.session.add(article)
+        database.session.commit()
+        return article
+
+    first = add("Binary Search Trees")
+    index = ArticleSimilarityIndex.shared(max_age=60)
+    second = add("AVL Trees")
+
+    # Not rebuilt: the new article is added to the same index
+    assert ArticleSimilarityIndex.shared(max_age=60) is index
+    assert [article["id"] for article in index.articles] == [first.id, second.id]
+    assert (
+        ArticleMatcher.find_similar_article(
+            suggestion("AVL Tree"), index.articles, index
+        )
+        == second.id
+    )
+    assert ArticleSimilarityIndex.shared(max_age=0) is not index
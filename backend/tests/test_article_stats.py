@@ -0,0 +1,62 @@
+from api.articles.models import Article, ArticleLevel, ArticleStats
+from extensions import redis_client
+
+
+def add_article(database, title, taxonomy):
+    database.session.add(
+        Article(
+            title=title,
+            slug=title.lower().replace(" ", "-"),
+            level=ArticleLevel.BASIC,
+            taxonomy=taxonomy,
+            category="General",
+            tags=[],
+            is_generated=False,
+        )
+    )
+    database.session.commit()
+
+
+def taxonomies():
+    return {row.taxonomy: row.total_articles for row in ArticleStats.taxonomies()}
+
+
+def test_refresh_if_stale(app, database):
+    add_article(database, "Heaps", "Data Structures")
+    assert not ArticleStats.refresh_if_stale()
+    assert taxonomies() == {}
+
+    ArticleStats.mark_stale()
+    assert ArticleStats.refresh_if_stale()
+    assert taxonomies() == {"Data Structures": 1}
+    # Cleared by the refresh
+    assert not ArticleStats.refresh_if_stale()
+
+
+def test_refresh_if_stale_is_debounced(app, database):
+    add_article(database, "Heaps", "Data Structures")
+    ArticleStats.mark_stale()
+    assert ArticleStats.refresh_if_stale(min_interval=60)
+
+    add_article(database, "Sorting", "Algorithms")
+    ArticleStats.mark_stale()
+    # Refreshed less than min_interval ago: left stale for later
+    assert not ArticleStats.refresh_if_stale(min_interval=60)
+    assert taxonomies() == {"Data Structures": 1}
+
+    redis_client.delete(ArticleStats.REFRESHED_KEY)
+    assert ArticleStats.refresh_if_stale(min_interval=60)
+    assert taxonomies() == {"Algorithms": 1, "Data Structures": 1}
+
+
+def test_refresh_stats_if_stale_command(app, database):
+    add_article(database, "Heaps", "Data Structures")
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=["refresh-stats", "--if-stale"])
+    assert "up to date" in result.output
+
+    ArticleStats.mark_stale()
+    result = runner.invoke(args=["refresh-stats", "--if-stale"])
+    assert "refreshed" in result.output
+    assert taxonomies() == {"Data Structures": 1}
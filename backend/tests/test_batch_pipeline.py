@@ -0,0 +1,93 @@
+from api.articles.models import Article, GenerationBatch
+from extensions import redis_client
+from services.ai.openai_client import OpenAIClient
+from services.data_population.initial_articles import INITIAL_ARTICLES
+from services.data_population.populate import DatabasePopulator
+from services.generation.job_queue import GenerationQueue
+
+
+def populate(app, *options):
+    result = app.test_cli_runner().invoke(args=["populate-db", "--batch", *options])
+    assert result.exit_code == 0, result.output
+    return result
+
+
+def assert_generated(titles):
+    articles = Article.query.filter(Article.title.in_(titles)).all()
+    assert len(articles) == len(titles)
+    for article in articles:
+        assert article.is_generated, article.title
+        assert article.content
+        assert article.generation_started_at is None
+        assert article.last_generation_error is None
+
+
+def test_populate_batch(app, database):
+    populate(app)
+
+    assert_generated([data["title"] for data in INITIAL_ARTICLES])
+    batches = GenerationBatch.query.all()
+    assert {batch.stage for batch in batches} == {"research", "article"}
+    assert all(batch.ingested_at is not None for batch in batches)
+    # Every claim is released
+    assert not redis_client.keys("generation:dedup:*")
+
+
+def test_populate_batch_resumes_pending_batch(app, database):
+    DatabasePopulator._create_article_metadata()
+    resumed = Article.query.order_by(Article.id).limit(3).all()
+    resumed_ids = [article.id for article in resumed]
+
+    # A research batch checkpointed by an interrupted run
+    batch_id = OpenAIClient().submit_batch(
+        {
+            f"research-{article.id}": OpenAIClient.research_request(
+                OpenAIClient.generate_research_prompt(
+                    title=article.title,
+                    level=article.level.value,
+                    taxonomy=article.taxonomy,
+                    category=article.category,
+                    tags=article.tags,
+                    excerpt=article.excerpt,
+                )
+            )
+            for article in resumed
+        }
+    )
+    database.session.add(
+        GenerationBatch(
+            stage="research",
+            provider="openai",
+            batch_id=batch_id,
+            article_ids=resumed_ids,
+        )
+    )
+    database.session.commit()
+
+    populate(app)
+
+    assert_generated([data["title"] for data in INITIAL_ARTICLES])
+    checkpointed = GenerationBatch.query.filter_by(batch_id=batch_id).one()
+    assert checkpointed.ingested_at is not None
+    # The checkpointed requests are not submitted again
+    for batch in GenerationBatch.query.filter_by(stage="research"):
+        if batch.batch_id != batch_id:
+            assert not set(batch.article_ids) & set(resumed_ids)
+
+
+def test_populate_batch_skips_claimed_articles(app, database):
+    DatabasePopulator._create_article_metadata()
+    pending = Article.query.order_by(Article.id).first()
+    # A generation job is pending for the article
+    assert GenerationQueue().enqueue(pending.id)
+
+    populate(app, "--force")
+
+    database.session.refresh(pending)
+    assert not pending.is_generated
+    assert pending.generation_started_at is None
+    for batch in GenerationBatch.query:
+        assert pending.id not in batch.article_ids
+    assert_generated(
+        [data["title"] for data in INITIAL_ARTICLES if data["title"] != pending.title]
+    )
@@ -0,0 +1,90 @@
+from api.articles.models import Article, ArticleLevel
+from services.ai.article_generator import ArticleGenerator
+from services.ai.catalog import CatalogSnapshot
+
+
+def entry(article_id, taxonomy, category, tags=()):
+    return {
+        "id": article_id,
+        "title": f"Article {article_id}",
+        "taxonomy": taxonomy,
+        "category": category,
+        "level": "basic",
+        "tags": list(tags),
+    }
+
+
+def test_section_lists_the_category_first(app):
+    CatalogSnapshot._sections.clear()
+    catalog = [
+        entry(1, "Data Structures", "Hashing"),
+        entry(2, "Algorithms", "Trees"),
+        entry(3, "Data Structures", "Trees"),
+        entry(4, "Data Structures", "Graphs"),
+        entry(5, "Data Structures", "Trees"),
+    ]
+
+    def section(category, limit=10):
+        return [
+            article["id"]
+            for article in CatalogSnapshot.section(
+                "Data Structures",
+                category,
+                catalog,
+                limit=limit,
+                token_budget=10000,
+                max_age=60,
+            )
+        ]
+
+    assert section("Trees") == [3, 5, 1, 4]
+    assert section("Graphs") == [4, 1, 3, 5]
+    # Frozen until max_age, whatever the catalog passed
+    catalog.append(entry(6, "Data Structures", "Trees"))
+    assert section("Trees") == [3, 5, 1, 4]
+
+    CatalogSnapshot._sections.clear()
+    assert section("Trees", limit=2) == [3, 5]
+
+
+def test_catalog_candidates(app, database):
+    rows = [
+        ("Heaps", "Data Structures", "Trees", ["priority-queue"]),
+        ("Dijkstra", "Algorithms", "Graphs", ["priority-queue"]),
+        ("Tree Traversal", "Algorithms", "Trees", []),
+        ("Hash Tables", "Data Structures", "Hashing", []),
+        ("TCP Handshake", "Networking", "Protocols", ["tcp"]),
+    ]
+    for title, taxonomy, category, tags in rows:
+        database.session.add(
+            Article(
+                title=title,
+                slug=title.lower().replace(" ", "-"),
+                level=ArticleLevel.BASIC,
+                taxonomy=taxonomy,
+                category=category,
+                tags=tags,
+                is_generated=False,
+            )
+        )
+    database.session.commit()
+
+    candidates = ArticleGenerator.catalog_candidates(
+        "Data Structures", "Trees", ["priority-queue"]
+    )
+
+    # Same taxonomy, same category or a shared tag
+    assert [article["title"] for article in candidates] == [
+        "Heaps",
+        "Dijkstra",
+        "Tree Traversal",
+        "Hash Tables",
+    ]
+    assert candidates[0] == {
+        "id": candidates[0]["id"],
+        "title": "Heaps",
+        "taxonomy": "Data Structures",
+        "category": "Trees",
+        "level": "basic",
+        "tags": ["priority-queue"],
+    }
@@ -0,0 +1,80 @@
+import asyncio
+from collections import namedtuple
+
+from api.articles.events import GenerationEventStream
+from services.generation.events import GenerationEventHub, GenerationEvents
+
+ArticleRow = namedtuple(
+    "ArticleRow", "is_generated generation_started_at last_generation_error"
+)
+
+
+class FakeResult:
+    def __init__(self, row):
+        self.row = row
+
+    def first(self):
+        return self.row
+
+
+class FakeSession:
+    """AsyncSession stand-in returning a generating article for every slug."""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def execute(self, statement):
+        return FakeResult(ArticleRow(False, "2024-12-01T00:00:00", None))
+
+
+async def read_stream(stream, slug):
+    """Run the ASGI stream for slug and return the status and body chunks."""
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": f"/api/articles/{slug}/events",
+        "path_params": {"slug": slug},
+        "headers": [],
+        "query_string": b"",
+    }
+    disconnected = asyncio.Event()
+    messages = []
+
+    async def receive():
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+
+    await stream(scope, receive, send)
+    status = messages[0]["status"]
+    body = "".join(message.get("body", b"").decode() for message in messages[1:])
+    return status, body
+
+
+def test_readers_of_one_slug_all_receive_every_event(app):
+    async def run():
+        hub = GenerationEventHub()
+        stream = GenerationEventStream(FakeSession, hub, timeout=5)
+        readers = [asyncio.create_task(read_stream(stream, "heaps")) for _ in range(2)]
+        while len(hub.readers.get("heaps", ())) < 2:
+            await asyncio.sleep(0.01)
+
+        await asyncio.to_thread(
+            GenerationEvents.publish, "heaps", "excerpt", excerpt="Heaps"
+        )
+        await asyncio.to_thread(
+            GenerationEvents.publish, "heaps", "status", status="complete"
+        )
+        results = await asyncio.wait_for(asyncio.gather(*readers), 5)
+        await hub.close()
+        return results
+
+    for status, body in asyncio.run(run()):
+        assert status == 200
+        assert 'event: excerpt\ndata: {"excerpt": "Heaps"}' in body
+        assert 'event: status\ndata: {"status": "complete"}' in body
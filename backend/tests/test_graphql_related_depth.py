@@ -0,0 +1,81 @@
+import pytest
+
+from api.articles.models import Article, ArticleLevel
+
+NESTED_QUERY = """
+query {
+  articleBySlug(slug: "heaps") {
+    slug
+    %s {
+      slug
+      %s {
+        slug
+        %s { slug }
+      }
+    }
+  }
+}
+"""
+
+
+@pytest.fixture
+def related_chain(database):
+    """heaps -> binary-trees -> graphs -> tries, each related to the next."""
+    articles = [
+        Article(
+            title=slug.replace("-", " ").title(),
+            slug=slug,
+            level=ArticleLevel.BASIC,
+            taxonomy="Data Structures",
+            category="Trees",
+            tags=[],
+            is_generated=False,
+        )
+        for slug in ("heaps", "binary-trees", "graphs", "tries")
+    ]
+    for article, related in zip(articles, articles[1:]):
+        article.related_articles.append(related)
+    database.session.add_all(articles)
+    database.session.commit()
+    return articles
+
+
+def query(app, *fields):
+    response = app.test_client().post(
+        "/api/graphql", json={"query": NESTED_QUERY % fields}
+    )
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_related_articles_within_max_depth(app, related_chain):
+    app.config["GRAPHQL_MAX_RELATED_DEPTH"] = 3
+
+    data = query(app, "relatedArticles", "relatedArticles", "relatedArticles")
+
+    assert "errors" not in data
+    article = data["data"]["articleBySlug"]
+    assert article["relatedArticles"][0]["relatedArticles"][0]["relatedArticles"] == [
+        {"slug": "tries"}
+    ]
+
+
+@pytest.mark.parametrize(
+    "fields",
+    [
+        ("relatedArticles", "relatedArticles", "relatedArticles"),
+        (
+            "related: relatedArticles",
+            "more: relatedArticles",
+            "deeper: relatedArticles",
+        ),
+    ],
+)
+def test_related_articles_nested_too_deep(app, related_chain, fields):
+    app.config["GRAPHQL_MAX_RELATED_DEPTH"] = 2
+
+    data = query(app, *fields)
+
+    assert data["errors"][0]["message"] == (
+        "relatedArticles cannot be nested more than 2 levels deep"
+    )
@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta, timezone
+
+from api.articles.models import Article, ArticleLevel
+
+
+def add_article(database, slug, **fields):
+    article = Article(
+        title=slug.title(),
+        slug=slug,
+        level=ArticleLevel.BASIC,
+        taxonomy="Data Structures",
+        category="Trees",
+        tags=[],
+        is_generated=False,
+        **fields,
+    )
+    database.session.add(article)
+    database.session.commit()
+    return article
+
+
+def update_scores(app):
+    result = app.test_cli_runner().invoke(
+        args=["update-relevance-scores", "--incremental"]
+    )
+    assert result.exit_code == 0, result.output
+    return result
+
+
+def test_incremental_rescore_reaches_rows_committed_late(app, database):
+    add_article(database, "heaps")
+    update_scores(app)
+
+    # Stamped before the last run started, but committed after it
+    stamped_at = datetime.now(timezone.utc) - timedelta(minutes=1)
+    late = add_article(database, "tries", created_at=stamped_at, updated_at=stamped_at)
+    assert not late.relevance_score
+
+    result = update_scores(app)
+
+    database.session.refresh(late)
+    assert late.relevance_score
+    assert "Updated relevance scores for 2 articles." in result.output
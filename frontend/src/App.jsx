@@ -1,11 +1,24 @@
-import {ApolloClient, InMemoryCache, ApolloProvider} from '@apollo/client';
+import {ApolloClient, InMemoryCache, ApolloProvider, HttpLink} from '@apollo/client';
+import {createPersistedQueryLink} from '@apollo/client/link/persisted-queries';
 import {BrowserRouter, Routes, Route} from 'react-router-dom';
 import Layout from './components/layout/Layout';
 import HomePage from './pages/HomePage';
 import ArticlePage from './pages/ArticlePage';
+import {GRAPHQL_URL} from './config';
+
+async function sha256(query) {
+  const digest = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(query));
+  return [...new Uint8Array(digest)].map(byte => byte.toString(16).padStart(2, '0')).join('');
+}
+
+// Queries are sent as GETs carrying only their hash, so the browser (and any
+// proxy) can cache responses and revalidate them with If-None-Match
+const link = createPersistedQueryLink({sha256, useGETForHashedQueries: true}).concat(
+  new HttpLink({uri: GRAPHQL_URL})
+);
 
 const client = new ApolloClient({
-  uri: 'http://localhost:5000/api/graphql',
+  link,
   cache: new InMemoryCache(),
   defaultOptions: {
     watchQuery: {
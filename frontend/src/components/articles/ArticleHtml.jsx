@@ -0,0 +1,29 @@
+import {useEffect, useRef} from 'react';
+
+const COPY_BUTTON_CLASS = 'absolute right-2 top-2 px-2 py-1 text-xs text-white bg-gray-700 rounded hover:bg-gray-600 transition-colors';
+
+// Server-rendered article HTML. Highlighting is already in the markup; only
+// the copy buttons of code blocks are added here.
+export default function ArticleHtml({html}) {
+  const ref = useRef(null);
+
+  useEffect(() => {
+    const buttons = [...ref.current.querySelectorAll('pre')].map(pre => {
+      const button = document.createElement('button');
+      button.className = COPY_BUTTON_CLASS;
+      button.textContent = 'Copy';
+      button.setAttribute('aria-label', 'Copy code');
+      button.onclick = () => {
+        navigator.clipboard.writeText(pre.querySelector('code')?.textContent ?? pre.textContent);
+        button.textContent = 'Copied';
+        setTimeout(() => (button.textContent = 'Copy'), 2000);
+      };
+      pre.classList.add('relative');
+      pre.appendChild(button);
+      return button;
+    });
+    return () => buttons.forEach(button => button.remove());
+  }, [html]);
+
+  return <div ref={ref} dangerouslySetInnerHTML={{__html: html}}/>;
+}
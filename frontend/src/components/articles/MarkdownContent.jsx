@@ -0,0 +1,20 @@
+import {useQuery} from '@apollo/client';
+import ReactMarkdown from 'react-markdown';
+import {GET_ARTICLE_MARKDOWN} from '../../graphql/queries';
+import CodeBlock from './CodeBlock';
+
+// Client-side rendering for articles the server has not rendered yet. Loaded
+// lazily so react-markdown and the highlighter stay out of the main bundle.
+export default function MarkdownContent({slug}) {
+  const {data} = useQuery(GET_ARTICLE_MARKDOWN, {variables: {slug}});
+
+  return (
+    <ReactMarkdown
+      components={{
+        code: CodeBlock,
+      }}
+    >
+      {data?.articleBySlug?.content ?? ''}
+    </ReactMarkdown>
+  );
+}
@@ -0,0 +1,20 @@
+export default function TableOfContents({entries}) {
+  if (!entries || entries.length === 0) {
+    return null;
+  }
+
+  return (
+    <nav className="mb-8 not-prose border-l-4 border-gray-200 pl-4" aria-label="Table of contents">
+      <p className="font-semibold mb-2">Contents</p>
+      <ul className="space-y-1">
+        {entries.map(entry => (
+          <li key={entry.anchor} className={entry.level > 2 ? 'ml-4' : ''}>
+            <a href={`#${entry.anchor}`} className="text-gray-600 hover:text-blue-600">
+              {entry.title}
+            </a>
+          </li>
+        ))}
+      </ul>
+    </nav>
+  );
+}
@@ -0,0 +1,9 @@
+// Base URL of the backend API. Vite inlines VITE_API_URL when the bundle is
+// built (e.g. /api behind the nginx proxy).
+export const API_URL = import.meta.env.VITE_API_URL ?? 'http://localhost:5000/api';
+
+export const GRAPHQL_URL = `${API_URL}/graphql`;
+
+// Server-Sent Events of generations: `${EVENTS_URL}/<slug>/events`, served by
+// the ASGI app
+export const EVENTS_URL = `${API_URL}/articles`;
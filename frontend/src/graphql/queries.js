@@ -1,17 +1,26 @@
 import {gql} from '@apollo/client';
 
 export const GET_ARTICLES = gql`
-    query GetArticles {
-        allArticles {
-            id
-            title
-            slug
-            excerpt
-            taxonomy
-            category
-            tags
-            wordCount
-            isGenerated
+    query GetArticles($first: Int, $after: String) {
+        allArticles(first: $first, after: $after) {
+            edges {
+                cursor
+                node {
+                    id
+                    title
+                    slug
+                    excerpt
+                    taxonomy
+                    category
+                    tags
+                    wordCount
+                    isGenerated
+                }
+            }
+            pageInfo {
+                hasNextPage
+                endCursor
+            }
         }
     }
 `;
@@ -21,7 +30,12 @@ export const GET_ARTICLE = gql`
         articleBySlug(slug: $slug) {
             id
             title
-            content
+            contentHtml
+            tableOfContents {
+                level
+                anchor
+                title
+            }
             taxonomy
             category
             tags
@@ -38,4 +52,14 @@ export const GET_ARTICLE = gql`
             }
         }
     }
-`;
\ No newline at end of file
+`;
+
+// Raw Markdown, only fetched for articles not yet rendered on the server
+export const GET_ARTICLE_MARKDOWN = gql`
+    query GetArticleMarkdown($slug: String!) {
+        articleBySlug(slug: $slug) {
+            id
+            content
+        }
+    }
+`;
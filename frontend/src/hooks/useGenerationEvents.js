@@ -0,0 +1,93 @@
+import {useEffect, useState} from 'react';
+import {EVENTS_URL} from '../config';
+
+// Content offsets are counted in Unicode code points, like Python string
+// lengths on the server, not in the UTF-16 units of String.length
+const codePoints = text => [...text].length;
+
+const INITIAL_STATE = {connected: false, status: null, error: null, excerpt: null, content: ''};
+
+// Follow an article's generation over Server-Sent Events, which the ASGI app
+// serves. `connected` stays false when no stream is available (e.g. behind
+// the WSGI app), so callers keep polling instead. The stream closes once the
+// generation is complete or has failed.
+export default function useGenerationEvents(slug, enabled) {
+  const [state, setState] = useState(INITIAL_STATE);
+
+  useEffect(() => {
+    if (!enabled) {
+      return undefined;
+    }
+
+    let source;
+    let current = INITIAL_STATE;
+    // Length of current.content in code points
+    let contentLength = 0;
+    const update = changes => {
+      current = {...current, ...changes};
+      setState(current);
+    };
+
+    const connect = () => {
+      source = new EventSource(`${EVENTS_URL}/${encodeURIComponent(slug)}/events`);
+      const listen = (type, handler) =>
+        source.addEventListener(type, event => handler(JSON.parse(event.data)));
+
+      source.onopen = () => update({connected: true});
+      source.onerror = () => {
+        // EventSource reconnects by itself, unless the response was no stream
+        if (source.readyState === EventSource.CLOSED) {
+          update({connected: false});
+        }
+      };
+
+      listen('snapshot', data => {
+        contentLength = codePoints(data.content ?? '');
+        update({
+          status: data.status,
+          error: data.error ?? null,
+          excerpt: data.excerpt ?? null,
+          content: data.content ?? '',
+        });
+        closeWhenDone(data.status);
+      });
+      listen('status', data => {
+        if (data.status === 'generating') {
+          // A new attempt starts from scratch
+          contentLength = 0;
+          update({status: data.status, error: null, excerpt: null, content: ''});
+        } else {
+          update({status: data.status, error: data.error ?? null});
+        }
+        closeWhenDone(data.status);
+      });
+      listen('excerpt', data => update({excerpt: data.excerpt}));
+      listen('content', data => {
+        if (data.offset === contentLength) {
+          contentLength += codePoints(data.text);
+          update({content: current.content + data.text});
+        } else if (data.offset > contentLength) {
+          // Missed a chunk; start over from a new snapshot
+          source.close();
+          connect();
+        }
+        // Chunks before the end are already part of the snapshot
+      });
+    };
+
+    const closeWhenDone = status => {
+      if (status === 'complete' || status === 'failed') {
+        source.close();
+        update({connected: false});
+      }
+    };
+
+    connect();
+    return () => {
+      source.close();
+      setState(INITIAL_STATE);
+    };
+  }, [slug, enabled]);
+
+  return state;
+}
@@ -0,0 +1,27 @@
+import {useEffect, useState} from 'react';
+
+// Fetch an article from the snapshot written by `flask export-static`, which
+// nginx serves without reaching the API. `article` is null when the article
+// has no snapshot yet (not generated, or not exported), so callers fall back
+// to GraphQL.
+export default function useStaticArticle(slug) {
+  const [state, setState] = useState({loading: true, article: null});
+
+  useEffect(() => {
+    let cancelled = false;
+    setState({loading: true, article: null});
+    fetch(`/static/articles/${encodeURIComponent(slug)}.json`)
+      .then(response => (response.ok ? response.json() : null))
+      .catch(() => null)
+      .then(article => {
+        if (!cancelled) {
+          setState({loading: false, article});
+        }
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, [slug]);
+
+  return state;
+}
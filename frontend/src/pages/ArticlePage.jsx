@@ -1,10 +1,15 @@
-import {useState, useEffect} from 'react';
+import {useState, useEffect, lazy, Suspense} from 'react';
 import {useParams} from 'react-router-dom';
 import {useQuery} from '@apollo/client';
-import ReactMarkdown from 'react-markdown';
 import {GET_ARTICLE} from '../graphql/queries';
+import ArticleHtml from '../components/articles/ArticleHtml';
 import RelatedArticles from '../components/articles/RelatedArticles';
-import CodeBlock from '../components/articles/CodeBlock';
+import TableOfContents from '../components/articles/TableOfContents';
+import useGenerationEvents from '../hooks/useGenerationEvents';
+import useStaticArticle from '../hooks/useStaticArticle';
+import '../styles/highlight.css';
+
+const MarkdownContent = lazy(() => import('../components/articles/MarkdownContent'));
 
 const LOADING_MESSAGES = [
   "Teaching GPT-4 how to write better code...",
@@ -22,27 +27,59 @@ const LOADING_MESSAGES = [
 function ArticlePage() {
   const [loadingMessage, setLoadingMessage] = useState(LOADING_MESSAGES[0]);
   const {slug} = useParams();
-  const {loading, error, data, refetch} = useQuery(GET_ARTICLE, {
+  const snapshot = useStaticArticle(slug);
+  const [streaming, setStreaming] = useState(false);
+  const query = useQuery(GET_ARTICLE, {
     variables: {slug},
-    pollInterval: 10000,
+    // Generation progress is pushed while its event stream is open
+    pollInterval: streaming ? 0 : 10000,
+    skip: snapshot.loading || snapshot.article !== null,
   });
+  const {error, refetch} = query;
+  const loading = snapshot.loading || query.loading;
+  const data = snapshot.article ? {articleBySlug: snapshot.article} : query.data;
+  const generation = useGenerationEvents(
+    slug,
+    Boolean(data?.articleBySlug) && !data.articleBySlug.isGenerated
+  );
 
   useEffect(() => {
-    if (data?.articleBySlug?.isGenerated) {
+    setStreaming(generation.connected);
+  }, [generation.connected]);
+
+  useEffect(() => {
+    if (generation.status === 'complete') {
       refetch();
+    }
+  }, [generation.status, refetch]);
+
+  useEffect(() => {
+    if (data?.articleBySlug?.isGenerated) {
+      if (!snapshot.article) {
+        refetch();
+      }
     } else {
       const interval = setInterval(() => {
         setLoadingMessage(LOADING_MESSAGES[Math.floor(Math.random() * LOADING_MESSAGES.length)]);
       }, 10000);
       return () => clearInterval(interval);
     }
-  }, [data?.articleBySlug?.isGenerated, refetch]);
+  }, [data?.articleBySlug?.isGenerated, snapshot.article, refetch]);
 
   if (loading || !data?.articleBySlug?.isGenerated) {
     return (
       <div className="flex flex-col items-center justify-center min-h-[calc(100vh-200px)]">
         <div className="animate-spin w-12 h-12 border-4 border-blue-500 border-t-transparent rounded-full mb-4"/>
         <p className="text-lg text-center animate-pulse">{loadingMessage}</p>
+        {/* Streamed as it is generated, rendered once complete */}
+        {generation.excerpt && (
+          <p className="mt-6 max-w-2xl text-center text-gray-600">{generation.excerpt}</p>
+        )}
+        {generation.content && (
+          <div className="mt-6 w-full max-w-3xl whitespace-pre-wrap text-sm text-gray-700">
+            {generation.content}
+          </div>
+        )}
       </div>
     );
   }
@@ -107,14 +144,16 @@ function ArticlePage() {
           </span>
         </div>
 
-        {/* Article content */}
-        <ReactMarkdown
-          components={{
-            code: CodeBlock,
-          }}
-        >
-          {article.content}
-        </ReactMarkdown>
+        <TableOfContents entries={article.tableOfContents}/>
+
+        {/* Article content, rendered and sanitized on the server */}
+        {article.contentHtml !== null ? (
+          <ArticleHtml html={article.contentHtml}/>
+        ) : (
+          <Suspense fallback={null}>
+            <MarkdownContent slug={slug}/>
+          </Suspense>
+        )}
       </article>
 
       {/* Related articles section */}
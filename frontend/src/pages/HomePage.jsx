@@ -3,8 +3,23 @@ import {GET_ARTICLES} from '../graphql/queries';
 import ArticleCard from '../components/articles/ArticleCard';
 import ArticleSkeleton from '../components/articles/ArticleSkeleton';
 
+const PAGE_SIZE = 20;
+
 function HomePage() {
-  const {loading, error, data} = useQuery(GET_ARTICLES);
+  const {loading, error, data, fetchMore} = useQuery(GET_ARTICLES, {
+    variables: {first: PAGE_SIZE},
+    pollInterval: 0,
+  });
+
+  const loadMore = () => fetchMore({
+    variables: {first: PAGE_SIZE, after: data.allArticles.pageInfo.endCursor},
+    updateQuery: (previous, {fetchMoreResult}) => ({
+      allArticles: {
+        ...fetchMoreResult.allArticles,
+        edges: [...previous.allArticles.edges, ...fetchMoreResult.allArticles.edges],
+      },
+    }),
+  });
 
   if (loading) {
     return (
@@ -34,12 +49,20 @@ function HomePage() {
     <div className="py-8 w-full">
       <h1 className="text-3xl font-bold mb-6">Latest Articles</h1>
       <div className="space-y-12 w-full">
-        {data.allArticles.map(article => (
+        {data.allArticles.edges.map(({node: article}) => (
           <div key={article.id} className="w-full">
             <ArticleCard article={article}/>
           </div>
         ))}
       </div>
+      {data.allArticles.pageInfo.hasNextPage && (
+        <button
+          onClick={loadMore}
+          className="mt-12 px-4 py-2 border border-gray-300 rounded hover:bg-gray-50"
+        >
+          Load more articles
+        </button>
+      )}
     </div>
   );
 }